@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import dj_database_url
-from decouple import config
+from decouple import config, Csv
 from datetime import timedelta
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Búsqueda full-text y trigram del catálogo
     'rest_framework',
     'corsheaders',
     'administracion',
@@ -94,6 +95,23 @@ DATABASES = {
     )
 }
 
+# Caché (respuestas de lectura versionadas, ver administracion/core/cache.py)
+# CACHE_BACKEND: memoria local (por defecto), django.core.cache.backends.filebased.FileBasedCache
+# (CACHE_LOCATION = carpeta) o django.core.cache.backends.redis.RedisCache (CACHE_LOCATION = redis://...)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='smartsales365'),
+    },
+    # Carritos de AlmacenCarritoCache (ventas/carrito.py): exige RedisCache, ej.
+    # CARRITO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CARRITO_CACHE_LOCATION=redis://localhost:6379/1
+    'carritos': {
+        'BACKEND': config('CARRITO_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CARRITO_CACHE_LOCATION', default='smartsales365-carritos'),
+    },
+}
+CACHE_RESPUESTAS_TIMEOUT = config('CACHE_RESPUESTAS_TIMEOUT', default=3600, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -131,6 +149,11 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+# Dominio con el que se arman URLs absolutas de archivos locales (ej: https://api.midominio.com)
+MEDIA_URL_BASE = config('MEDIA_URL_BASE', default='http://localhost:8000')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -150,6 +173,9 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny", # Lo estándar para APIs
     ),
+    # Paginación por cursor en todos los listados (ver administracion/core/paginacion.py)
+    "DEFAULT_PAGINATION_CLASS": "administracion.core.paginacion.CursorPaginacion",
+    "PAGE_SIZE": config('API_PAGE_SIZE', default=50, cast=int),
 }
 
 CORS_ALLOW_CREDENTIALS = True
@@ -167,6 +193,78 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 API_KEY_IMGBB= config('API_KEY_IMGBB', default='')
+IMGBB_TIMEOUT = config('IMGBB_TIMEOUT', default=15, cast=int)  # segundos
+
+# Subida asíncrona de imágenes del catálogo (catalogo/imagenes.py)
+# Backends: catalogo.almacenamiento.ImgBBAlmacenamiento | catalogo.almacenamiento.LocalAlmacenamiento
+CATALOGO_IMAGEN_BACKEND = config('CATALOGO_IMAGEN_BACKEND', default='catalogo.almacenamiento.ImgBBAlmacenamiento')
+CATALOGO_IMAGEN_SPOOL_DIR = config('CATALOGO_IMAGEN_SPOOL_DIR', default=str(BASE_DIR / 'spool' / 'imagenes'))
+# 'hilo': un hilo del proceso web hace el primer intento | 'comando': python manage.py procesar_imagenes
+# En ambos modos los reintentos los hace procesar_imagenes (cron)
+CATALOGO_IMAGEN_MODO_WORKER = config('CATALOGO_IMAGEN_MODO_WORKER', default='hilo')
+CATALOGO_IMAGEN_MAX_INTENTOS = config('CATALOGO_IMAGEN_MAX_INTENTOS', default=6, cast=int)
+CATALOGO_IMAGEN_REINTENTO_BASE = 10  # segundos, se duplica en cada intento
+CATALOGO_IMAGEN_REINTENTO_MAX = 600
+CATALOGO_IMAGEN_TIMEOUT_PROCESO = 300  # una subida 'procesando' más tiempo se considera abandonada
+# Derivadas generadas al registrar cada imagen (las claves son campos url_<clave> de ImagenMedia)
+CATALOGO_IMAGEN_DERIVADAS = {
+    'miniatura': (160, 160),
+    'mediana': (640, 640),
+}
+CATALOGO_IMAGEN_FORMATO_DERIVADAS = config('CATALOGO_IMAGEN_FORMATO_DERIVADAS', default='WEBP')  # WEBP | JPEG
+CATALOGO_IMAGEN_CALIDAD = 82
+
+# Autocompletado del catálogo (/api/catalogo/autocomplete/)
+CATALOGO_AUTOCOMPLETAR_LIMITE = config('CATALOGO_AUTOCOMPLETAR_LIMITE', default=10, cast=int)
+CATALOGO_AUTOCOMPLETAR_LIMITE_MAX = 25
+
+# Facetas del catálogo (/api/catalogo/facets/): límites de los rangos de precio
+CATALOGO_FACETAS_LIMITES_PRECIO = config('CATALOGO_FACETAS_LIMITES_PRECIO', default='100,500,1000,5000', cast=Csv(int))
+
+# Popularidad del catálogo (manage.py actualizar_popularidad, ?ordering=-popularidad)
+CATALOGO_POPULARIDAD_VIDA_MEDIA_DIAS = config('CATALOGO_POPULARIDAD_VIDA_MEDIA_DIAS', default=14, cast=float)
+CATALOGO_POPULARIDAD_VENTANA_DIAS = config('CATALOGO_POPULARIDAD_VENTANA_DIAS', default=90, cast=int)
+
+# Importación masiva del catálogo (/api/catalogo/importar/ y manage.py importar_catalogo)
+CATALOGO_IMPORTACION_LOTE = config('CATALOGO_IMPORTACION_LOTE', default=1000, cast=int)
+CATALOGO_IMPORTACION_MAX_ERRORES = 1000  # errores detallados en el resumen (el total se cuenta siempre)
+
+# Operaciones masivas de inventario (catalogo/inventario.py)
+CATALOGO_INGRESO_MAX_ITEMS = config('CATALOGO_INGRESO_MAX_ITEMS', default=50000, cast=int)
+CATALOGO_INVENTARIO_BLOQUE = 1000  # tamaño de las consultas IN / INSERT por bloque
+CATALOGO_CONSULTA_MAX_SERIES = config('CATALOGO_CONSULTA_MAX_SERIES', default=500, cast=int)  # /productos/consultar_series/
+
+# Eliminación de catálogos en segundo plano (catalogo/eliminacion.py)
+# 'hilo': un hilo del proceso web | 'comando': python manage.py procesar_eliminaciones
+CATALOGO_ELIMINACION_MODO_WORKER = config('CATALOGO_ELIMINACION_MODO_WORKER', default='hilo')
+CATALOGO_ELIMINACION_LOTE = config('CATALOGO_ELIMINACION_LOTE', default=1000, cast=int)  # ítems por transacción
+CATALOGO_ELIMINACION_TIMEOUT_PROCESO = 300  # sin avance en este tiempo se considera abandonada
+
+# Sincronización incremental (/api/catalogo/changes/): máximo de cambios por respuesta
+CATALOGO_CAMBIOS_LIMITE = config('CATALOGO_CAMBIOS_LIMITE', default=1000, cast=int)
+# Días que se conserva el log (manage.py podar_cambios); un cursor más viejo exige descarga completa
+CATALOGO_CAMBIOS_RETENCION_DIAS = config('CATALOGO_CAMBIOS_RETENCION_DIAS', default=30, cast=int)
+CATALOGO_CAMBIOS_PODA_BLOQUE = 10000  # registros por DELETE
+
+# Snapshot estático del catálogo para la tienda (catalogo/snapshot.py, manage.py generar_snapshot)
+CATALOGO_SNAPSHOT_DIR = config('CATALOGO_SNAPSHOT_DIR', default=str(MEDIA_ROOT / 'snapshot' / 'catalogo'))
+CATALOGO_SNAPSHOT_POR_CATEGORIA = config('CATALOGO_SNAPSHOT_POR_CATEGORIA', default=True, cast=bool)
+# 'hilo': se regenera en un hilo tras cada cambio | 'comando': solo con manage.py generar_snapshot
+CATALOGO_SNAPSHOT_MODO = config('CATALOGO_SNAPSHOT_MODO', default='hilo')
+CATALOGO_SNAPSHOT_MARGEN = 60  # segundos que cada corrida incremental revisa hacia atrás
+
+# Carrito de compras (ventas/carrito.py)
+# 'ventas.carrito.AlmacenCarritoBase': cada operación escribe en Cart / CartItem
+# 'ventas.carrito.AlmacenCarritoCache': carrito vivo en CACHES['carritos'] (Redis) y persistencia diferida
+CARRITO_ALMACEN = config('CARRITO_ALMACEN', default='ventas.carrito.AlmacenCarritoBase')
+# 'hilo': un hilo del proceso web persiste los carritos modificados | 'comando': python manage.py persistir_carritos
+CARRITO_PERSISTENCIA_MODO = config('CARRITO_PERSISTENCIA_MODO', default='hilo')
+CARRITO_PERSISTENCIA_RETARDO = config('CARRITO_PERSISTENCIA_RETARDO', default=5, cast=float)  # segundos
+CARRITO_CACHE_TIMEOUT = 60 * 60 * 24 * 7  # un carrito sin uso sale de la caché (ya persistido) a la semana
+# Limpieza de carritos abandonados (python manage.py limpiar_carritos)
+CARRITO_TTL_DIAS = config('CARRITO_TTL_DIAS', default=30, cast=int)
+CARRITO_VACIO_TTL_DIAS = config('CARRITO_VACIO_TTL_DIAS', default=1, cast=int)
+CARRITO_LIMPIEZA_LOTE = config('CARRITO_LIMPIEZA_LOTE', default=500, cast=int)  # carritos por transacción
 
 # ============================================
 # CONFIGURACIÓN DE STRIPE
@@ -14,6 +14,8 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
@@ -25,3 +27,6 @@ urlpatterns = [
     path('api/finanzas/', include('finanzas.urls')),  # Rutas de pagos con Stripe
     path('admin/', admin.site.urls),  # Admin de Django en /admin/
 ]
+
+# Imágenes guardadas con LocalAlmacenamiento (solo en desarrollo)
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
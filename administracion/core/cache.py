@@ -0,0 +1,157 @@
+"""
+Caché de respuestas de lectura versionada por recurso.
+
+Cada recurso ('catalogo', 'marca', 'categoria', ...) tiene un contador en VersionRecurso.
+Las respuestas de list/retrieve se guardan con la versión actual en la clave, así que una
+escritura solo tiene que llamar a incrementar_version(...) (en la misma transacción) para
+que todas las respuestas anteriores dejen de usarse; no hace falta borrar claves.
+
+Las mismas versiones dan los validadores HTTP (ETag / Last-Modified): un cliente que envía
+If-None-Match o If-Modified-Since recibe 304 sin que se consulte ni serialice nada más.
+
+El backend es el CACHES['default'] configurado en settings (CACHE_BACKEND / CACHE_LOCATION):
+memoria local, archivos o un servicio externo como Redis.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from ..models import VersionRecurso
+
+# Se envía en cada incrementar_version(...) con recursos=(...); permite a otras apps
+# reaccionar a los cambios (ej: catalogo/snapshot.py regenera el snapshot estático).
+version_incrementada = Signal()
+
+
+def obtener_versiones(recursos):
+    """Devuelve {recurso: (version, actualizado)} en una consulta; los que no existen quedan en (0, None)."""
+    versiones = {recurso: (0, None) for recurso in recursos}
+    for recurso, version, actualizado in VersionRecurso.objects.filter(recurso__in=recursos).values_list(
+        'recurso', 'version', 'actualizado'
+    ):
+        versiones[recurso] = (version, actualizado)
+    return versiones
+
+
+def incrementar_version(*recursos):
+    """Invalida las respuestas cacheadas de los recursos indicados."""
+    ahora = timezone.now()
+    for recurso in recursos:
+        actualizados = VersionRecurso.objects.filter(recurso=recurso).update(
+            version=F('version') + 1, actualizado=ahora
+        )
+        if not actualizados:
+            _, creado = VersionRecurso.objects.get_or_create(recurso=recurso, defaults={'version': 1})
+            if not creado:
+                VersionRecurso.objects.filter(recurso=recurso).update(version=F('version') + 1, actualizado=ahora)
+    version_incrementada.send(sender=VersionRecurso, recursos=recursos)
+
+
+def registrar_acceso(recurso, acierto):
+    clave = f'cache_metricas:{recurso}:{"aciertos" if acierto else "fallos"}'
+    try:
+        cache.incr(clave)
+    except ValueError:
+        if not cache.add(clave, 1, timeout=None):
+            cache.incr(clave)
+
+
+def obtener_metricas():
+    """Aciertos/fallos de la caché por recurso, junto con su versión actual."""
+    versiones = dict(VersionRecurso.objects.values_list('recurso', 'version'))
+    claves = [
+        f'cache_metricas:{recurso}:{tipo}' for recurso in versiones for tipo in ('aciertos', 'fallos')
+    ]
+    contadores = cache.get_many(claves)
+    metricas = []
+    for recurso, version in sorted(versiones.items()):
+        aciertos = contadores.get(f'cache_metricas:{recurso}:aciertos', 0)
+        fallos = contadores.get(f'cache_metricas:{recurso}:fallos', 0)
+        total = aciertos + fallos
+        metricas.append({
+            'recurso': recurso,
+            'version': version,
+            'aciertos': aciertos,
+            'fallos': fallos,
+            'tasa_aciertos': round(aciertos / total, 4) if total else None,
+        })
+    return metricas
+
+
+class CacheVersionadaMixin:
+    """
+    Mixin para ViewSets: cachea las respuestas de list y retrieve y responde 304 a las
+    peticiones condicionales cuyo ETag / Last-Modified sigue vigente.
+    La vista define `recursos_cache` (ej: ('catalogo',)); el primero se usa para las métricas.
+    La respuesta incluye la cabecera X-Cache: HIT | MISS.
+    """
+    recursos_cache = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.responder_con_cache(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.responder_con_cache(request, super().retrieve, *args, **kwargs)
+
+    def clave_cache(self, request, versiones):
+        estado = ','.join(f'{recurso}={version}' for recurso, (version, _) in sorted(versiones.items()))
+        url = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+        return f'respuesta:{estado}:{url}'
+
+    def calcular_etag(self, request, clave):
+        # La clave ya identifica versiones + URL; el formato negociado cambia los bytes
+        contenido = f'{clave}:{getattr(request, "accepted_media_type", "")}'
+        return f'"{hashlib.sha1(contenido.encode()).hexdigest()}"'
+
+    def no_modificado(self, request, etag, ultima_modificacion):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            etags = [e.removeprefix('W/') for e in parse_etags(if_none_match)]
+            return '*' in etags or etag in etags
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if if_modified_since and ultima_modificacion:
+            return int(ultima_modificacion.timestamp()) <= if_modified_since
+        return False
+
+    def responder_con_cache(self, request, accion, *args, **kwargs):
+        recurso = self.recursos_cache[0]
+        versiones = obtener_versiones(self.recursos_cache)
+        clave = self.clave_cache(request, versiones)
+        etag = self.calcular_etag(request, clave)
+        fechas = [actualizado for _, actualizado in versiones.values() if actualizado]
+        ultima_modificacion = max(fechas) if len(fechas) == len(versiones) else None
+
+        if self.no_modificado(request, etag, ultima_modificacion):
+            return self.agregar_validadores(
+                Response(status=status.HTTP_304_NOT_MODIFIED), etag, ultima_modificacion
+            )
+
+        datos = cache.get(clave)
+        if datos is not None:
+            registrar_acceso(recurso, acierto=True)
+            response = Response(datos)
+            response['X-Cache'] = 'HIT'
+            return self.agregar_validadores(response, etag, ultima_modificacion)
+
+        registrar_acceso(recurso, acierto=False)
+        response = accion(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        cache.set(clave, response.data, settings.CACHE_RESPUESTAS_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return self.agregar_validadores(response, etag, ultima_modificacion)
+
+    def agregar_validadores(self, response, etag, ultima_modificacion):
+        response['ETag'] = etag
+        if ultima_modificacion:
+            response['Last-Modified'] = http_date(ultima_modificacion.timestamp())
+        # El navegador puede guardar la respuesta pero debe revalidarla en cada uso
+        response['Cache-Control'] = 'no-cache'
+        return response
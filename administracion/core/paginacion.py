@@ -0,0 +1,46 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination
+
+
+class CursorPaginacion(CursorPagination):
+    """
+    Paginación por cursor (keyset) para todos los listados.
+
+    - No ejecuta COUNT(*): la respuesta trae `next`/`previous` (cursores opacos) y `results`.
+    - El orden lo define cada vista con `cursor_ordering` (ej: ('-fecha', '-id')) o con
+      `get_cursor_ordering(request)`; por defecto '-id'. Si la vista usa OrderingFilter y la
+      petición trae ?ordering=..., manda ese orden (con 'id' como desempate).
+    - Tamaño de página: REST_FRAMEWORK['PAGE_SIZE'], o ?page_size=N hasta `max_page_size`.
+    """
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        filtro = next(
+            (backend for backend in getattr(view, 'filter_backends', []) if issubclass(backend, OrderingFilter)),
+            None,
+        )
+        if filtro is not None and request.query_params.get(filtro.ordering_param):
+            ordering = filtro().get_ordering(request, queryset, view)
+            # Las acciones que paginan otro modelo (ej: historial) ignoran ?ordering
+            if ordering and all(self.es_campo(queryset.model, campo.lstrip('-')) for campo in ordering):
+                # Desempate por id en el mismo sentido: el orden queda total y usa el índice (campo, id)
+                desempate = '-id' if ordering[0].startswith('-') else 'id'
+                return tuple(campo for campo in ordering if campo.lstrip('-') != 'id') + (desempate,)
+
+        if hasattr(view, 'get_cursor_ordering'):
+            ordering = view.get_cursor_ordering(request)
+        else:
+            ordering = getattr(view, 'cursor_ordering', self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+    def es_campo(self, modelo, nombre):
+        try:
+            modelo._meta.get_field(nombre)
+        except FieldDoesNotExist:
+            return False
+        return True
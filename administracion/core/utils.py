@@ -10,7 +10,8 @@ def get_client_ip(request):
 
 def registrar_bitacora(request, usuario, accion, descripcion, modulo=None):
     try:
-        ip = get_client_ip(request)
+        # Sin request (comandos de gestión) no hay IP
+        ip = get_client_ip(request) if request else None
         usuario_a_registrar = None
         if usuario and usuario.is_authenticated:
             usuario_a_registrar = usuario
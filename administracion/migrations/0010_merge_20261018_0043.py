@@ -0,0 +1,14 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:43
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administracion', '0008_alter_cliente_estado_alter_cliente_razon_social_and_more'),
+        ('administracion', '0009_add_venta_detalleventa'),
+    ]
+
+    operations = [
+    ]
@@ -79,4 +79,20 @@ class Cliente(models.Model):
     class Meta:
         verbose_name = 'Cliente'
         verbose_name_plural = 'Clientes'
-        ordering = ['-id']
\ No newline at end of file
+        ordering = ['-id']
+
+class VersionRecurso(models.Model):
+    """
+    Contador de versión por recurso ('catalogo', 'marca', ...).
+    Cada escritura lo incrementa; la caché de respuestas usa la versión en sus claves.
+    """
+    recurso = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.recurso} v{self.version}'
+
+    class Meta:
+        verbose_name = 'Versión de Recurso'
+        verbose_name_plural = 'Versiones de Recursos'
@@ -1,3 +1,49 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from administracion.models import Departamento
+
+URL = '/api/administracion/departamentos/'
+
+
+class CacheVersionadaTests(TestCase):
+    """Caché versionada y validadores HTTP (ver administracion/core/cache.py) sobre departamentos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Departamento.objects.create(nombre='La Paz')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_segunda_lectura_sale_de_la_cache(self):
+        self.assertEqual(self.client.get(URL)['X-Cache'], 'MISS')
+        respuesta = self.client.get(URL)
+        self.assertEqual(respuesta['X-Cache'], 'HIT')
+        self.assertEqual([d['nombre'] for d in respuesta.data['results']], ['La Paz'])
+
+    def test_if_none_match_responde_304(self):
+        etag = self.client.get(URL)['ETag']
+        respuesta = self.client.get(URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta['ETag'], etag)
+        self.assertFalse(respuesta.content)
+
+    def test_if_modified_since_responde_304(self):
+        # Sin escrituras previas no hay fecha de versión: se crea una para tener Last-Modified
+        self.client.post(URL, {'nombre': 'Oruro'}, format='json')
+        ultima_modificacion = self.client.get(URL)['Last-Modified']
+        respuesta = self.client.get(URL, HTTP_IF_MODIFIED_SINCE=ultima_modificacion)
+        self.assertEqual(respuesta.status_code, 304)
+
+    def test_escritura_invalida_etag_y_cache(self):
+        etag = self.client.get(URL)['ETag']
+        self.client.post(URL, {'nombre': 'Oruro'}, format='json')
+
+        respuesta = self.client.get(URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['X-Cache'], 'MISS')
+        self.assertNotEqual(respuesta['ETag'], etag)
+        self.assertEqual({d['nombre'] for d in respuesta.data['results']}, {'La Paz', 'Oruro'})
@@ -9,12 +9,13 @@ from .serializers.serializers_cliente import ClienteSerializer, CiudadSerializer
 from administracion.models import Departamento, Ciudad, Cliente, RegistroBitacora
 from .serializers.serializers_bitacora import RegistroBitacoraSerializer
 from .core.utils import registrar_bitacora
+from .core.cache import CacheVersionadaMixin, incrementar_version, obtener_metricas
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt 
 from rest_framework.views import APIView
 from django.contrib.auth.hashers import check_password
 
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -419,6 +420,7 @@ class UserViewSet(viewsets.ModelViewSet):
 class RoleViewSet(viewsets.ModelViewSet):
     queryset = Group.objects.all()
     serializer_class = RoleSerializer
+    cursor_ordering = ('name',)
     
     def perform_create(self, serializer):
         """Crear rol y registrar en bitácora"""
@@ -493,14 +495,44 @@ class RoleViewSet(viewsets.ModelViewSet):
 class PermissionViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Permission.objects.all()
     serializer_class = PermissionSerializer
+    cursor_ordering = ('id',)
 
-class DepartamentoViewSet(viewsets.ModelViewSet):
+class DepartamentoViewSet(CacheVersionadaMixin, viewsets.ModelViewSet):
     queryset = Departamento.objects.all()
     serializer_class = DepartamentoSerializer
+    cursor_ordering = ('nombre',)
+    recursos_cache = ('departamento',)
 
-class CiudadViewSet(viewsets.ModelViewSet):
+    # Las ciudades muestran su departamento anidado (y se borran en cascada)
+    def perform_create(self, serializer):
+        serializer.save()
+        incrementar_version('departamento', 'ciudad')
+
+    def perform_update(self, serializer):
+        serializer.save()
+        incrementar_version('departamento', 'ciudad')
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        incrementar_version('departamento', 'ciudad')
+
+class CiudadViewSet(CacheVersionadaMixin, viewsets.ModelViewSet):
     queryset = Ciudad.objects.all()
     serializer_class = CiudadSerializer
+    cursor_ordering = ('nombre', 'id')
+    recursos_cache = ('ciudad',)
+
+    def perform_create(self, serializer):
+        serializer.save()
+        incrementar_version('ciudad')
+
+    def perform_update(self, serializer):
+        serializer.save()
+        incrementar_version('ciudad')
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        incrementar_version('ciudad')
     
     def get_queryset(self):
         """Filtrar ciudades por departamento si se especifica en la query"""
@@ -726,3 +758,15 @@ class ClienteViewSet(viewsets.ModelViewSet):
 class RegistroBitacoraViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = RegistroBitacora.objects.all()
     serializer_class = RegistroBitacoraSerializer
+    cursor_ordering = ('-fecha_hora', '-id')
+
+
+class CacheMetricasView(APIView):
+    """
+    Métricas de la caché de respuestas (aciertos/fallos por recurso).
+    Ruta: GET /api/administracion/cache/metricas/
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(obtener_metricas())
@@ -0,0 +1,65 @@
+"""
+Backends de almacenamiento para las imágenes del Catálogo.
+
+El backend activo se elige con settings.CATALOGO_IMAGEN_BACKEND (ruta a la clase).
+Cada backend recibe el contenido del archivo y devuelve la URL pública.
+"""
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.module_loading import import_string
+
+
+class ErrorAlmacenamiento(Exception):
+    """Fallo (posiblemente transitorio) al guardar una imagen en el backend."""
+
+
+class AlmacenamientoImagenes:
+    """Interfaz común de los backends."""
+
+    def guardar(self, nombre, contenido):
+        """Guarda `contenido` (bytes) y devuelve la URL pública."""
+        raise NotImplementedError
+
+
+class ImgBBAlmacenamiento(AlmacenamientoImagenes):
+    """Sube la imagen a ImgBB (https://api.imgbb.com)."""
+    url = "https://api.imgbb.com/1/upload"
+
+    def guardar(self, nombre, contenido):
+        try:
+            response = requests.post(
+                self.url,
+                {"key": settings.API_KEY_IMGBB, "name": nombre},
+                files={"image": contenido},
+                timeout=settings.IMGBB_TIMEOUT,
+            )
+        except requests.RequestException as e:
+            raise ErrorAlmacenamiento(f"Error de conexión con ImgBB: {e}") from e
+
+        if response.status_code != 200:
+            raise ErrorAlmacenamiento(f"ImgBB respondió {response.status_code}: {response.text[:500]}")
+        return response.json()["data"]["url"]
+
+
+class LocalAlmacenamiento(AlmacenamientoImagenes):
+    """Guarda la imagen en MEDIA_ROOT (desarrollo o servidor propio de archivos)."""
+
+    def __init__(self):
+        self.storage = FileSystemStorage(location=settings.MEDIA_ROOT, base_url=settings.MEDIA_URL)
+
+    def guardar(self, nombre, contenido):
+        ruta = f'catalogo/{nombre}'
+        # Los nombres derivan del hash del contenido: si ya existe es el mismo archivo
+        if self.storage.exists(ruta):
+            return settings.MEDIA_URL_BASE + self.storage.url(ruta)
+        try:
+            ruta = self.storage.save(ruta, ContentFile(contenido))
+        except OSError as e:
+            raise ErrorAlmacenamiento(f"No se pudo escribir la imagen: {e}") from e
+        return settings.MEDIA_URL_BASE + self.storage.url(ruta)
+
+
+def obtener_almacenamiento():
+    return import_string(settings.CATALOGO_IMAGEN_BACKEND)()
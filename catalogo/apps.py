@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class CatalogoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'catalogo'
+
+    def ready(self):
+        from django.db.models.signals import pre_delete
+        from administracion.core.cache import version_incrementada
+        from catalogo.models import Categoria, Marca
+        from catalogo.snapshot import marcar_catalogos_relacionados, programar_snapshot
+
+        # Regenera el snapshot estático de la tienda tras cada cambio del catálogo
+        version_incrementada.connect(programar_snapshot, dispatch_uid='catalogo_snapshot')
+        # Los catálogos que quedan sin categoría / marca al borrarlas deben entrar en la corrida incremental
+        for modelo in (Categoria, Marca):
+            pre_delete.connect(
+                marcar_catalogos_relacionados, sender=modelo, dispatch_uid=f'catalogo_snapshot_{modelo.__name__.lower()}'
+            )
@@ -0,0 +1,91 @@
+"""
+Motor de búsqueda del Catálogo.
+
+En PostgreSQL usa la columna `search_vector` (mantenida por trigger, con índice GIN
+y la configuración 'es_unaccent': stemming en español + sin acentos) y ordena por
+relevancia. En otros motores (SQLite en desarrollo/tests) usa LIKE sobre los mismos campos.
+
+El autocompletado usa índices trigram (pg_trgm) sobre nombre y sku, lo que permite
+tolerar errores de tipeo sin recorrer la tabla.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from rest_framework import filters
+
+from catalogo.models import Catalogo
+
+CONFIG_BUSQUEDA = 'es_unaccent'
+CAMPOS_BUSQUEDA = ['nombre', 'marca__nombre', 'categoria__nombre', 'sku', 'descripcion']
+CAMPOS_AUTOCOMPLETAR = ['id', 'nombre', 'sku', 'imagen_url']
+
+
+def buscar_catalogo(queryset, termino):
+    """
+    Filtra `queryset` (de Catalogo) por el término de búsqueda.
+    En PostgreSQL anota `relevancia` y ordena por ella.
+    """
+    termino = (termino or '').strip()
+    if not termino:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        consulta = SearchQuery(termino, config=CONFIG_BUSQUEDA, search_type='websearch')
+        return (
+            queryset.filter(search_vector=consulta)
+            .annotate(relevancia=SearchRank(F('search_vector'), consulta))
+            .order_by('-relevancia', '-id')
+        )
+
+    # Fallback: cada palabra debe aparecer en alguno de los campos
+    filtro = Q()
+    for palabra in termino.split():
+        coincidencia = Q()
+        for campo in CAMPOS_BUSQUEDA:
+            coincidencia |= Q(**{f'{campo}__icontains': palabra})
+        filtro &= coincidencia
+    return queryset.filter(filtro)
+
+
+class BusquedaCatalogoFilter(filters.SearchFilter):
+    """
+    Reemplazo de SearchFilter para el Catálogo (mismo parámetro: ?search=).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        termino = request.query_params.get(self.search_param, '')
+        return buscar_catalogo(queryset, termino)
+
+
+def autocompletar_catalogo(termino, limite=10):
+    """
+    Devuelve hasta `limite` catálogos activos como dicts (id, nombre, sku, imagen_url).
+    Primero los que empiezan con el término y luego por similitud trigram.
+    """
+    termino = (termino or '').strip()
+    if len(termino) < 2:
+        return []
+
+    queryset = Catalogo.objects.filter(estado='activo')
+    prefijo = Q(nombre__istartswith=termino) | Q(sku__istartswith=termino)
+
+    if connection.vendor == 'postgresql':
+        # `<%` (trigram_word_similar) e ILIKE usan los índices GIN gin_trgm_ops
+        queryset = (
+            queryset.filter(prefijo | Q(nombre__trigram_word_similar=termino))
+            .annotate(
+                es_prefijo=Case(When(prefijo, then=Value(1)), default=Value(0), output_field=IntegerField()),
+                similitud=Greatest(
+                    TrigramWordSimilarity(termino, 'nombre'),
+                    TrigramSimilarity('sku', termino),
+                ),
+            )
+            .order_by('-es_prefijo', '-similitud', 'nombre')
+        )
+    else:
+        queryset = queryset.filter(prefijo | Q(nombre__icontains=termino)).annotate(
+            es_prefijo=Case(When(prefijo, then=Value(1)), default=Value(0), output_field=IntegerField()),
+        ).order_by('-es_prefijo', 'nombre')
+
+    return list(queryset.values(*CAMPOS_AUTOCOMPLETAR)[:limite])
@@ -0,0 +1,129 @@
+"""
+Sincronización incremental del catálogo e inventario (GET /api/catalogo/changes/).
+
+Los triggers de la migración 0020 anotan en CambioCatalogo cada alta, modificación y baja
+de Catalogo y Producto. El cliente guarda un cursor y pide solo lo posterior; por cada
+objeto se devuelve su estado actual (o su id si ya no existe), una sola vez aunque haya
+cambiado varias veces.
+
+El cursor es (transacción, id). En PostgreSQL los ids se asignan al insertar pero las
+transacciones confirman en otro orden, así que solo se entregan los cambios de transacciones
+anteriores a la más antigua todavía abierta (txid_snapshot_xmin): un cambio que aún no es
+visible nunca queda detrás de un cursor ya entregado.
+
+El log se poda con `python manage.py podar_cambios` (cron): se borran los registros de más de
+CATALOGO_CAMBIOS_RETENCION_DIAS días, conservando el más nuevo de ellos como límite. Un cursor
+anterior a ese límite vence (CursorVencido, HTTP 410): el cliente debe hacer una descarga
+completa y sincronizar desde el cursor actual.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from catalogo.models import CambioCatalogo
+
+CURSOR_INICIAL = (0, 0)
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+class CursorVencido(CursorInvalido):
+    """Los cambios posteriores al cursor ya se podaron: hace falta una descarga completa."""
+
+
+def parsear_cursor(valor):
+    try:
+        transaccion, id_ = valor.split('.')
+        return int(transaccion), int(id_)
+    except ValueError:
+        raise CursorInvalido(f"Cursor inválido: '{valor}'")
+
+
+def formatear_cursor(transaccion, id_):
+    return f'{transaccion}.{id_}'
+
+
+def cambios_visibles():
+    queryset = CambioCatalogo.objects.all()
+    if connection.vendor == 'postgresql':
+        queryset = queryset.filter(transaccion__lt=RawSQL('txid_snapshot_xmin(txid_current_snapshot())', []))
+    return queryset
+
+
+def cursor_actual():
+    """Cursor del último cambio entregable: punto de partida tras una descarga completa."""
+    ultimo = cambios_visibles().order_by('-transaccion', '-id').values_list('transaccion', 'id').first()
+    return formatear_cursor(*(ultimo or CURSOR_INICIAL))
+
+
+def _anteriores(transaccion, id_):
+    return Q(transaccion__lt=transaccion) | Q(transaccion=transaccion, id__lt=id_)
+
+
+def verificar_vigencia(transaccion, id_):
+    """
+    Lanza CursorVencido si el cursor quedó antes del límite de la poda. El límite es el registro
+    más antiguo que queda; solo cuenta como límite si es anterior a la retención (la poda
+    siempre deja uno así), de lo contrario el log nunca se podó y todo cursor sigue vigente.
+    """
+    primero = CambioCatalogo.objects.order_by('transaccion', 'id').values_list('transaccion', 'id', 'fecha').first()
+    if primero is None or (transaccion, id_) >= primero[:2]:
+        return
+    if primero[2] < timezone.now() - timedelta(days=settings.CATALOGO_CAMBIOS_RETENCION_DIAS):
+        raise CursorVencido(
+            f"El cursor '{formatear_cursor(transaccion, id_)}' es anterior a los cambios conservados; "
+            "haga una descarga completa y sincronice desde el cursor actual"
+        )
+
+
+def podar_cambios():
+    """
+    Borra por bloques los registros del log de más de CATALOGO_CAMBIOS_RETENCION_DIAS días.
+    El más nuevo de ellos se conserva como límite para detectar cursores vencidos.
+    Devuelve la cantidad de registros borrados.
+    """
+    vencimiento = timezone.now() - timedelta(days=settings.CATALOGO_CAMBIOS_RETENCION_DIAS)
+    limite = (
+        cambios_visibles().filter(fecha__lt=vencimiento)
+        .order_by('-transaccion', '-id').values_list('transaccion', 'id').first()
+    )
+    if limite is None:
+        return 0
+
+    borrados = 0
+    anteriores = CambioCatalogo.objects.filter(_anteriores(*limite)).order_by()
+    while True:
+        ids = list(anteriores.values_list('id', flat=True)[:settings.CATALOGO_CAMBIOS_PODA_BLOQUE])
+        if not ids:
+            return borrados
+        borrados += CambioCatalogo.objects.filter(pk__in=ids).delete()[0]
+
+
+def leer_cambios(cursor, limite):
+    """
+    Cambios posteriores al cursor (a lo sumo `limite` registros del log).
+    Lanza CursorInvalido si el cursor está mal formado y CursorVencido si ya se podó.
+    Devuelve ({entidad: {objeto_id: operacion final}}, cursor siguiente, hay_mas).
+    """
+    transaccion, id_ = parsear_cursor(cursor)
+    verificar_vigencia(transaccion, id_)
+    registros = list(
+        cambios_visibles()
+        .filter(Q(transaccion__gt=transaccion) | Q(transaccion=transaccion, id__gt=id_))
+        .order_by('transaccion', 'id')
+        .values_list('transaccion', 'id', 'entidad', 'objeto_id', 'operacion')[:limite + 1]
+    )
+    hay_mas = len(registros) > limite
+    registros = registros[:limite]
+
+    por_entidad = {entidad: {} for entidad, _ in CambioCatalogo.CHOICE_ENTIDAD}
+    for _, _, entidad, objeto_id, operacion in registros:
+        por_entidad[entidad][objeto_id] = operacion
+    siguiente = formatear_cursor(*registros[-1][:2]) if registros else cursor
+    return por_entidad, siguiente, hay_mas
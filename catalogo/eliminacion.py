@@ -0,0 +1,174 @@
+"""
+Eliminación en segundo plano de catálogos con mucho inventario.
+
+Borrar un Catalogo con Catalogo.delete() arrastra en cascada todos sus Producto: Django
+los junta en memoria y los borra en una sola transacción dentro de la petición. En su lugar:
+
+1. La vista (solicitar_eliminacion) marca el catálogo como inactivo y crea una
+   EliminacionCatalogo; responde de inmediato con 202.
+2. Un worker borra los ítems por lotes de CATALOGO_ELIMINACION_LOTE (una transacción corta
+   por lote, ajustando StockCatalogo) y anota el avance; al final borra el catálogo.
+   Igual que con las imágenes, el worker es un hilo del proceso (CATALOGO_ELIMINACION_MODO_WORKER='hilo')
+   o el comando `python manage.py procesar_eliminaciones`, que retoma las que un hilo no terminó.
+
+Los catálogos con ventas (DetalleVenta es PROTECT) no se pueden eliminar: se rechaza antes de empezar.
+"""
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, ProtectedError, Q, Sum
+from django.utils import timezone
+
+from administracion.core.cache import incrementar_version
+from administracion.core.utils import registrar_bitacora
+from catalogo.models import Catalogo, EliminacionCatalogo, Producto, StockCatalogo
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogoConVentas(Exception):
+    """El catálogo tiene ventas registradas (DetalleVenta lo protege)."""
+
+
+def solicitar_eliminacion(catalogo, usuario=None):
+    """
+    Marca el catálogo como inactivo y encola su eliminación.
+    Devuelve (EliminacionCatalogo, creada); si ya había una en curso se devuelve esa.
+    """
+    if catalogo.detalles_venta.exists():
+        raise CatalogoConVentas(
+            f"El producto '{catalogo.nombre}' tiene ventas registradas y no se puede eliminar; márquelo como inactivo"
+        )
+
+    with transaction.atomic():
+        en_curso = EliminacionCatalogo.objects.filter(
+            catalogo_id=catalogo.pk, estado__in=['pendiente', 'procesando']
+        ).first()
+        if en_curso:
+            return en_curso, False
+
+        Catalogo.objects.filter(pk=catalogo.pk).update(estado='inactivo', fecha_actualizacion=timezone.now())
+        catalogo.estado = 'inactivo'
+        total = StockCatalogo.objects.filter(catalogo=catalogo).aggregate(total=Sum('cantidad'))['total'] or 0
+        eliminacion = EliminacionCatalogo.objects.create(
+            catalogo_id=catalogo.pk, sku=catalogo.sku, nombre=catalogo.nombre, total_productos=max(total, 0),
+            usuario=usuario if usuario is not None and usuario.is_authenticated else None,
+        )
+        incrementar_version('catalogo')
+
+    if settings.CATALOGO_ELIMINACION_MODO_WORKER == 'hilo':
+        transaction.on_commit(
+            lambda: threading.Thread(target=_procesar_en_hilo, args=(eliminacion.pk,), daemon=True).start()
+        )
+    return eliminacion, True
+
+
+def reclamar_pendientes(limite=5):
+    """
+    Marca como 'procesando' hasta `limite` eliminaciones pendientes (o abandonadas por un
+    worker que murió) y devuelve sus ids.
+    """
+    ahora = timezone.now()
+    abandonadas = ahora - timedelta(seconds=settings.CATALOGO_ELIMINACION_TIMEOUT_PROCESO)
+    with transaction.atomic():
+        ids = list(
+            EliminacionCatalogo.objects.select_for_update(skip_locked=True)
+            .filter(Q(estado='pendiente') | Q(estado='procesando', fecha_actualizacion__lt=abandonadas))
+            .order_by('fecha_creacion')
+            .values_list('id', flat=True)[:limite]
+        )
+        EliminacionCatalogo.objects.filter(id__in=ids).update(estado='procesando', fecha_actualizacion=ahora)
+    return ids
+
+
+def eliminar_lote(catalogo_id, tamano):
+    """Borra hasta `tamano` ítems del catálogo en una transacción y devuelve cuántos borró."""
+    with transaction.atomic():
+        ids = list(
+            Producto.objects.select_for_update()
+            .filter(catalogo_id=catalogo_id)
+            .order_by()
+            .values_list('id', flat=True)[:tamano]
+        )
+        if not ids:
+            return 0
+        deltas = Counter({
+            (catalogo_id, estado): -cantidad
+            for estado, cantidad in Producto.objects.filter(id__in=ids).values_list('estado').annotate(Count('id')).order_by()
+        })
+        # Producto no tiene dependientes: el queryset se borra con un solo DELETE ... WHERE id IN
+        eliminados, _ = Producto.objects.filter(id__in=ids).delete()
+        StockCatalogo.ajustar(deltas)
+    return eliminados
+
+
+def procesar_eliminacion(eliminacion_id):
+    """Ejecuta una eliminación ya reclamada hasta terminarla. Devuelve True si se completó."""
+    eliminacion = EliminacionCatalogo.objects.get(pk=eliminacion_id)
+    try:
+        while True:
+            eliminados = eliminar_lote(eliminacion.catalogo_id, settings.CATALOGO_ELIMINACION_LOTE)
+            if not eliminados:
+                break
+            # Avance y latido: una eliminación que deja de actualizarse se considera abandonada
+            EliminacionCatalogo.objects.filter(pk=eliminacion.pk).update(
+                productos_eliminados=F('productos_eliminados') + eliminados, fecha_actualizacion=timezone.now()
+            )
+
+        with transaction.atomic():
+            catalogo = Catalogo.objects.filter(pk=eliminacion.catalogo_id).first()
+            if catalogo:
+                catalogo.delete()
+            EliminacionCatalogo.objects.filter(pk=eliminacion.pk).update(
+                estado='completada', ultimo_error='', fecha_fin=timezone.now(), fecha_actualizacion=timezone.now()
+            )
+            incrementar_version('catalogo')
+    except ProtectedError:
+        # Se registró una venta mientras se borraba el inventario: el catálogo queda inactivo
+        return _registrar_fallo(eliminacion, 'El producto tiene ventas registradas; quedó inactivo')
+    except Exception as e:
+        # Cualquier otro error cierra la eliminación como fallida (con el error) en lugar de
+        # dejarla 'procesando'; el worker sigue con las demás
+        logger.exception(f"❌ Error inesperado eliminando el catálogo {eliminacion.sku}")
+        return _registrar_fallo(eliminacion, f'{type(e).__name__}: {e}')
+
+    eliminacion.refresh_from_db()
+    registrar_bitacora(
+        request=None,
+        usuario=eliminacion.usuario,
+        accion="ELIMINAR PRODUCTO",
+        descripcion=(
+            f"Eliminación completada del producto: '{eliminacion.nombre}' (SKU: {eliminacion.sku}), "
+            f"{eliminacion.productos_eliminados} items de inventario"
+        ),
+        modulo="Catalogo"
+    )
+    logger.info(f"✅ Catálogo {eliminacion.sku} eliminado ({eliminacion.productos_eliminados} items)")
+    return True
+
+
+def _registrar_fallo(eliminacion, error):
+    EliminacionCatalogo.objects.filter(pk=eliminacion.pk).update(
+        estado='fallida', ultimo_error=str(error)[:2000], fecha_fin=timezone.now(), fecha_actualizacion=timezone.now()
+    )
+    logger.error(f"❌ Eliminación del catálogo {eliminacion.sku} fallida: {error}")
+    return False
+
+
+def _procesar_en_hilo(eliminacion_id):
+    try:
+        reclamada = EliminacionCatalogo.objects.filter(pk=eliminacion_id, estado='pendiente').update(
+            estado='procesando', fecha_actualizacion=timezone.now()
+        )
+        if reclamada:
+            procesar_eliminacion(eliminacion_id)
+    except Exception:
+        # Error fuera de procesar_eliminacion (ej: al reclamarla): si quedó 'procesando' sin
+        # latido, el comando la retoma tras el timeout
+        logger.exception(f"❌ Error inesperado eliminando el catálogo (eliminación #{eliminacion_id})")
+    finally:
+        connection.close()
@@ -0,0 +1,82 @@
+"""
+Facetas del Catálogo para la barra de filtros del frontend.
+
+Todas las facetas salen de una sola consulta agrupada por
+(marca, categoría, rango de precio, estado, en stock); los totales de cada faceta se
+suman en Python sobre esos grupos, que son muchos menos que las filas del catálogo.
+El stock se lee del contador desnormalizado StockCatalogo.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Case, Count, Exists, IntegerField, OuterRef, Value, When
+
+from catalogo.models import StockCatalogo
+
+
+def en_stock():
+    """Expresión booleana: el catálogo tiene al menos un ítem disponible."""
+    return Exists(
+        StockCatalogo.objects.filter(catalogo=OuterRef('pk'), estado='disponible', cantidad__gt=0)
+    )
+
+
+def rangos_precio():
+    """[(desde, hasta), ...] a partir de los límites en settings; el último rango no tiene tope."""
+    limites = [0, *settings.CATALOGO_FACETAS_LIMITES_PRECIO]
+    return [(desde, hasta) for desde, hasta in zip(limites, limites[1:] + [None])]
+
+
+def calcular_facetas(queryset):
+    """
+    Cuenta los catálogos de `queryset` por marca, categoría, rango de precio, estado y stock.
+    `queryset` ya tiene aplicados la búsqueda y los filtros de la petición.
+    """
+    rangos = rangos_precio()
+    rango = Case(
+        *[When(precio__lt=hasta, then=Value(i)) for i, (_, hasta) in enumerate(rangos) if hasta is not None],
+        default=Value(len(rangos) - 1),
+        output_field=IntegerField(),
+    )
+    grupos = (
+        queryset.order_by()
+        .annotate(rango_precio=rango, en_stock=en_stock())
+        .values(
+            'marca_id', 'marca__nombre', 'categoria_id', 'categoria__nombre',
+            'rango_precio', 'estado', 'en_stock',
+        )
+        .annotate(cantidad=Count('id'))
+    )
+
+    total = 0
+    marcas = defaultdict(int)
+    categorias = defaultdict(int)
+    por_rango = defaultdict(int)
+    estados = defaultdict(int)
+    stock = {'si': 0, 'no': 0}
+    for grupo in grupos:
+        cantidad = grupo['cantidad']
+        total += cantidad
+        marcas[(grupo['marca_id'], grupo['marca__nombre'])] += cantidad
+        categorias[(grupo['categoria_id'], grupo['categoria__nombre'])] += cantidad
+        por_rango[grupo['rango_precio']] += cantidad
+        estados[grupo['estado']] += cantidad
+        stock['si' if grupo['en_stock'] else 'no'] += cantidad
+
+    def ordenar(conteos):
+        return sorted(
+            ({'id': id_, 'nombre': nombre, 'cantidad': cantidad} for (id_, nombre), cantidad in conteos.items()),
+            key=lambda f: (-f['cantidad'], f['nombre'] or ''),
+        )
+
+    return {
+        'total': total,
+        'marcas': ordenar(marcas),
+        'categorias': ordenar(categorias),
+        'rangos_precio': [
+            {'desde': desde, 'hasta': hasta, 'cantidad': por_rango.get(i, 0)}
+            for i, (desde, hasta) in enumerate(rangos)
+        ],
+        'estados': [{'estado': estado, 'cantidad': cantidad} for estado, cantidad in sorted(estados.items())],
+        'en_stock': stock,
+    }
@@ -0,0 +1,226 @@
+"""
+Subida asíncrona de imágenes del Catálogo.
+
+1. La vista registra la subida (encolar_imagen) y responde de inmediato; el archivo se copia
+   al spool local cuando la transacción confirma. El catálogo queda con imagen_estado='pendiente'.
+2. Un worker envía el archivo al backend de almacenamiento (catalogo/almacenamiento.py)
+   y escribe imagen_url, reintentando con backoff exponencial si el backend falla.
+   Si la misma imagen ya fue subida antes (mismo SHA-256) se reutiliza sin pasar por el
+   worker; si no, el worker la registra en el almacén de catalogo/media.py (original +
+   derivadas). El worker es un hilo por proceso (CATALOGO_IMAGEN_MODO_WORKER='hilo'), que hace
+   un intento por subida, o el comando `python manage.py procesar_imagenes` (modo 'comando').
+   Las subidas viven en la tabla SubidaImagen: los reintentos y las que un hilo no terminó
+   los retoma el comando (cron), también necesario en modo 'hilo'.
+"""
+import hashlib
+import logging
+import random
+import threading
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from administracion.core.cache import incrementar_version
+from catalogo.almacenamiento import ErrorAlmacenamiento
+from catalogo.media import ImagenInvalida, registrar_imagen
+from catalogo.models import Catalogo, ImagenMedia, SubidaImagen
+
+logger = logging.getLogger(__name__)
+
+
+def directorio_spool():
+    ruta = Path(settings.CATALOGO_IMAGEN_SPOOL_DIR)
+    ruta.mkdir(parents=True, exist_ok=True)
+    return ruta
+
+
+def asignar_imagen(catalogo_id, media):
+    Catalogo.objects.filter(pk=catalogo_id).update(
+        imagen=media, imagen_url=media.url_original, imagen_estado='lista', fecha_actualizacion=timezone.now()
+    )
+    incrementar_version('catalogo')
+
+
+def encolar_imagen(catalogo, archivo):
+    """
+    Calcula el hash del archivo subido (por chunks, sin cargarlo entero en memoria).
+    Si la imagen ya existe en el almacén se asigna directamente; si no, crea la SubidaImagen
+    y copia el archivo al spool recién cuando la transacción confirma: si se revierte, no
+    queda ningún archivo huérfano en el spool.
+    """
+    sha256 = hashlib.sha256()
+    for chunk in archivo.chunks():
+        sha256.update(chunk)
+    hash_contenido = sha256.hexdigest()
+
+    media = ImagenMedia.objects.filter(hash=hash_contenido).first()
+    if media:
+        asignar_imagen(catalogo.pk, media)
+        catalogo.imagen, catalogo.imagen_url, catalogo.imagen_estado = media, media.url_original, 'lista'
+        return None
+
+    extension = Path(archivo.name or '').suffix.lower()[:10]
+    # 'procesando' hasta que el archivo esté en el spool, así ningún worker la toma antes.
+    # Si el proceso muere entre el commit y la copia, reclamar_pendientes la recupera por
+    # timeout y procesar_subida la marca fallida al no encontrar el archivo.
+    subida = SubidaImagen.objects.create(
+        catalogo=catalogo, archivo=f'{uuid.uuid4().hex}{extension}', hash=hash_contenido,
+        nombre_original=(archivo.name or '')[:255], estado='procesando',
+    )
+    Catalogo.objects.filter(pk=catalogo.pk).update(imagen_estado='pendiente', fecha_actualizacion=timezone.now())
+    catalogo.imagen_estado = 'pendiente'
+
+    transaction.on_commit(lambda: copiar_al_spool(subida, archivo))
+    return subida
+
+
+def copiar_al_spool(subida, archivo):
+    """Copia el archivo de una subida ya confirmada al spool y la deja lista para el worker."""
+    try:
+        with open(directorio_spool() / subida.archivo, 'wb') as destino:
+            for chunk in archivo.chunks():
+                destino.write(chunk)
+    except OSError as e:
+        _registrar_fallo(subida, f"No se pudo escribir en el spool: {e}", definitivo=True)
+        return
+
+    SubidaImagen.objects.filter(pk=subida.pk).update(estado='pendiente', fecha_actualizacion=timezone.now())
+    if settings.CATALOGO_IMAGEN_MODO_WORKER == 'hilo':
+        lanzar_hilo()
+
+
+def calcular_espera(intentos):
+    """Segundos hasta el próximo intento: backoff exponencial con un poco de jitter."""
+    espera = min(
+        settings.CATALOGO_IMAGEN_REINTENTO_BASE * 2 ** (intentos - 1),
+        settings.CATALOGO_IMAGEN_REINTENTO_MAX,
+    )
+    return espera * random.uniform(1.0, 1.2)
+
+
+def reclamar_pendientes(limite=10):
+    """
+    Marca como 'procesando' hasta `limite` subidas listas para (re)intentar y devuelve sus ids.
+    También recupera subidas 'procesando' abandonadas por un worker que murió.
+    """
+    ahora = timezone.now()
+    abandonadas = ahora - timedelta(seconds=settings.CATALOGO_IMAGEN_TIMEOUT_PROCESO)
+    with transaction.atomic():
+        ids = list(
+            SubidaImagen.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(estado='pendiente', proximo_intento__lte=ahora)
+                | Q(estado='procesando', fecha_actualizacion__lt=abandonadas)
+            )
+            .order_by('proximo_intento')
+            .values_list('id', flat=True)[:limite]
+        )
+        SubidaImagen.objects.filter(id__in=ids).update(estado='procesando', fecha_actualizacion=ahora)
+    return ids
+
+
+def _es_la_mas_reciente(subida):
+    return not SubidaImagen.objects.filter(catalogo_id=subida.catalogo_id, id__gt=subida.id).exists()
+
+
+def procesar_subida(subida_id):
+    """
+    Envía una subida ya reclamada al backend.
+    Devuelve True si terminó (completada o fallida definitivamente) y False si se reprogramó.
+    """
+    subida = SubidaImagen.objects.get(pk=subida_id)
+    ruta = directorio_spool() / subida.archivo
+
+    try:
+        contenido = ruta.read_bytes()
+    except FileNotFoundError as e:
+        return _registrar_fallo(subida, e, definitivo=True)
+
+    try:
+        media = registrar_imagen(contenido, subida.hash or None)
+    except ImagenInvalida as e:
+        return _registrar_fallo(subida, e, definitivo=True)
+    except ErrorAlmacenamiento as e:
+        return _registrar_fallo(subida, e)
+
+    with transaction.atomic():
+        subida.estado = 'completada'
+        subida.intentos += 1
+        subida.ultimo_error = ''
+        subida.save()
+        # Si mientras tanto se subió otra imagen, esa es la que debe quedar
+        if _es_la_mas_reciente(subida):
+            asignar_imagen(subida.catalogo_id, media)
+
+    ruta.unlink(missing_ok=True)
+    logger.info(f"✅ Imagen de catálogo {subida.catalogo_id} subida: {media.url_original}")
+    return True
+
+
+def _registrar_fallo(subida, error, definitivo=False):
+    subida.intentos += 1
+    subida.ultimo_error = str(error)[:2000]
+
+    if definitivo or subida.intentos >= settings.CATALOGO_IMAGEN_MAX_INTENTOS:
+        subida.estado = 'fallida'
+        subida.save()
+        if _es_la_mas_reciente(subida):
+            Catalogo.objects.filter(pk=subida.catalogo_id).update(
+                imagen_estado='error', fecha_actualizacion=timezone.now()
+            )
+            incrementar_version('catalogo')
+        logger.error(f"❌ Subida de imagen #{subida.id} fallida tras {subida.intentos} intentos: {error}")
+        return True
+
+    subida.estado = 'pendiente'
+    subida.proximo_intento = timezone.now() + timedelta(seconds=calcular_espera(subida.intentos))
+    subida.save()
+    logger.warning(f"⚠️ Subida de imagen #{subida.id} reprogramada (intento {subida.intentos}): {error}")
+    return False
+
+
+# --- Worker en hilo ---
+
+_estado_hilo = {'en_curso': False, 'aviso': False}
+_mutex_hilo = threading.Lock()
+
+
+def lanzar_hilo():
+    # Un solo hilo por proceso: las subidas que llegan mientras trabaja las toma en la misma corrida
+    with _mutex_hilo:
+        _estado_hilo['aviso'] = True
+        if _estado_hilo['en_curso']:
+            return
+        _estado_hilo['en_curso'] = True
+    threading.Thread(target=_procesar_en_hilo).start()
+
+
+def _procesar_en_hilo():
+    """
+    Procesa las subidas listas (un intento por subida) y termina cuando no queda ninguna.
+    No espera el backoff: las reprogramadas las retoma el próximo hilo o `procesar_imagenes`.
+    Si el proceso muere a mitad de una subida, queda 'procesando' y reclamar_pendientes la
+    recupera por timeout.
+    """
+    try:
+        while True:
+            with _mutex_hilo:
+                _estado_hilo['aviso'] = False
+            try:
+                ids = reclamar_pendientes()
+                for subida_id in ids:
+                    procesar_subida(subida_id)
+            except Exception:
+                logger.exception("❌ Error inesperado procesando subidas de imágenes")
+                ids = []
+            with _mutex_hilo:
+                if not ids and not _estado_hilo['aviso']:
+                    _estado_hilo['en_curso'] = False
+                    return
+    finally:
+        connection.close()
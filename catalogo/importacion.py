@@ -0,0 +1,292 @@
+"""
+Importación masiva del Catálogo desde CSV o NDJSON (una fila JSON por línea).
+
+El archivo se lee en streaming y se procesa por lotes: cada lote hace una consulta para
+traer los SKU existentes y un único INSERT ... ON CONFLICT (sku) DO UPDATE. Marcas y
+categorías se resuelven por nombre con un mapa en memoria (las que faltan se crean por
+lote). Los errores se reportan por número de fila sin detener la importación.
+Los SKU nuevos y los que cambian de precio quedan en HistorialPrecio (un INSERT por lote).
+
+Columnas: sku, nombre, precio, descripcion, meses_garantia, modelo, marca, categoria,
+estado, imagen_url. Para SKU nuevos son obligatorias sku, nombre y precio; para SKU
+existentes basta con sku y las columnas a modificar (ej: una lista de precios sku,precio).
+"""
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from administracion.core.cache import incrementar_version
+from catalogo.models import Catalogo, Categoria, Marca, HistorialPrecio, Producto
+
+COLUMNAS = [
+    'sku', 'nombre', 'precio', 'descripcion', 'meses_garantia', 'modelo',
+    'marca', 'categoria', 'estado', 'imagen_url',
+]
+CAMPOS_ACTUALIZABLES = [
+    'nombre', 'descripcion', 'precio', 'meses_garantia', 'modelo', 'marca',
+    'categoria', 'estado', 'imagen_url', 'imagen', 'imagen_estado', 'fecha_actualizacion',
+]
+ESTADOS = {valor for valor, _ in Catalogo.CHOICE_ESTADO}
+validar_url = URLValidator()
+
+
+class FilaInvalida(Exception):
+    pass
+
+
+def detectar_formato(nombre_archivo):
+    return 'ndjson' if nombre_archivo.lower().endswith(('.ndjson', '.jsonl', '.json')) else 'csv'
+
+
+def leer_filas(flujo, formato):
+    """
+    Genera (numero_fila, dict) desde un flujo de texto. Las líneas NDJSON mal formadas
+    se generan como (numero_fila, FilaInvalida) para reportarlas sin cortar la lectura.
+    """
+    if formato == 'ndjson':
+        for numero, linea in enumerate(flujo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                fila = json.loads(linea)
+            except ValueError as e:
+                yield numero, FilaInvalida(f'JSON inválido: {e}')
+                continue
+            yield numero, fila if isinstance(fila, dict) else FilaInvalida('Se esperaba un objeto JSON')
+    else:
+        lector = csv.DictReader(flujo)
+        for fila in lector:
+            yield lector.line_num, fila
+
+
+def _texto(valor, campo, largo_maximo):
+    texto = '' if valor is None else str(valor).strip()
+    if len(texto) > largo_maximo:
+        raise FilaInvalida(f'{campo}: máximo {largo_maximo} caracteres')
+    return texto
+
+
+def normalizar_fila(fila):
+    """Valida y convierte una fila; devuelve solo las columnas presentes (sku siempre)."""
+    sku = _texto(fila.get('sku'), 'sku', 50)
+    if not sku:
+        raise FilaInvalida('sku es obligatorio')
+
+    datos = {'sku': sku}
+    presentes = {
+        columna for columna in COLUMNAS
+        if columna in fila and fila[columna] is not None and str(fila[columna]).strip() != ''
+    }
+    if 'nombre' in presentes:
+        datos['nombre'] = _texto(fila['nombre'], 'nombre', 100)
+    if 'precio' in presentes:
+        try:
+            precio = Decimal(str(fila['precio']).strip()).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            raise FilaInvalida(f"precio inválido: '{fila['precio']}'")
+        if precio < 0 or precio >= Decimal('100000000'):
+            raise FilaInvalida(f"precio fuera de rango: '{fila['precio']}'")
+        datos['precio'] = precio
+    if 'meses_garantia' in presentes:
+        try:
+            datos['meses_garantia'] = int(str(fila['meses_garantia']).strip())
+        except ValueError:
+            raise FilaInvalida(f"meses_garantia inválido: '{fila['meses_garantia']}'")
+        if datos['meses_garantia'] < 0:
+            raise FilaInvalida('meses_garantia no puede ser negativo')
+    if 'descripcion' in presentes:
+        datos['descripcion'] = str(fila['descripcion']).strip()
+    if 'modelo' in presentes:
+        datos['modelo'] = _texto(fila['modelo'], 'modelo', 100)
+    for relacion in ('marca', 'categoria'):
+        if relacion in presentes:
+            datos[relacion] = _texto(fila[relacion], relacion, 100)
+    if 'estado' in presentes:
+        datos['estado'] = str(fila['estado']).strip().lower()
+        if datos['estado'] not in ESTADOS:
+            raise FilaInvalida(f"estado inválido: '{fila['estado']}'")
+    if 'imagen_url' in presentes:
+        datos['imagen_url'] = str(fila['imagen_url']).strip()
+        try:
+            validar_url(datos['imagen_url'])
+        except ValidationError:
+            raise FilaInvalida(f"imagen_url inválida: '{datos['imagen_url']}'")
+    return datos
+
+
+class ImportadorCatalogo:
+    """
+    Uso:
+        importador = ImportadorCatalogo()
+        resumen = importador.importar(leer_filas(flujo, 'csv'))
+    """
+
+    def __init__(self, tamano_lote=None, crear_relaciones=True, usuario=None):
+        self.tamano_lote = tamano_lote or settings.CATALOGO_IMPORTACION_LOTE
+        self.crear_relaciones = crear_relaciones
+        self.usuario = usuario
+        self.marcas = {nombre.lower(): id_ for id_, nombre in Marca.objects.values_list('id', 'nombre')}
+        self.categorias = {nombre.lower(): id_ for id_, nombre in Categoria.objects.values_list('id', 'nombre')}
+        self.relaciones_creadas = set()
+        self.resumen = {
+            'procesadas': 0, 'creadas': 0, 'actualizadas': 0, 'total_errores': 0, 'errores': [],
+        }
+
+    def error(self, numero, sku, mensaje):
+        self.resumen['total_errores'] += 1
+        if len(self.resumen['errores']) < settings.CATALOGO_IMPORTACION_MAX_ERRORES:
+            self.resumen['errores'].append({'fila': numero, 'sku': sku, 'error': mensaje})
+
+    def importar(self, filas):
+        lote = {}
+        for numero, fila in filas:
+            self.resumen['procesadas'] += 1
+            if isinstance(fila, Exception):
+                self.error(numero, None, str(fila))
+                continue
+            try:
+                datos = normalizar_fila(fila)
+            except FilaInvalida as e:
+                self.error(numero, fila.get('sku'), str(e))
+                continue
+            if datos['sku'] in lote:
+                # Un SKU repetido en el mismo lote: gana la última fila
+                self.error(lote[datos['sku']][0], datos['sku'], f'SKU repetido; se usa la fila {numero}')
+            lote[datos['sku']] = (numero, datos)
+            if len(lote) >= self.tamano_lote:
+                self.procesar_lote(lote)
+                lote = {}
+        if lote:
+            self.procesar_lote(lote)
+
+        if self.resumen['creadas'] or self.resumen['actualizadas']:
+            incrementar_version('catalogo', *self.relaciones_creadas)
+        return self.resumen
+
+    def resolver_relaciones(self, filas):
+        for campo, modelo, mapa in (('marca', Marca, self.marcas), ('categoria', Categoria, self.categorias)):
+            faltantes = {
+                datos[campo].lower(): datos[campo] for _, datos in filas
+                if datos.get(campo) and datos[campo].lower() not in mapa
+            }
+            if not faltantes or not self.crear_relaciones:
+                continue
+            modelo.objects.bulk_create([modelo(nombre=nombre) for nombre in faltantes.values()], ignore_conflicts=True)
+            for id_, nombre in modelo.objects.filter(nombre__in=faltantes.values()).values_list('id', 'nombre'):
+                mapa[nombre.lower()] = id_
+            self.relaciones_creadas.add(campo)
+
+    def procesar_lote(self, lote):
+        self.resolver_relaciones(lote.values())
+
+        nombres = {datos['nombre'] for _, datos in lote.values() if 'nombre' in datos}
+        existentes = {}
+        sku_por_nombre = {}
+        for registro in Catalogo.objects.filter(Q(sku__in=list(lote)) | Q(nombre__in=nombres)).values(
+            'id', 'sku', 'nombre', 'descripcion', 'precio', 'meses_garantia', 'modelo',
+            'marca_id', 'categoria_id', 'estado', 'imagen_url', 'imagen_id', 'imagen_estado',
+        ):
+            sku_por_nombre[registro['nombre']] = registro['sku']
+            if registro['sku'] in lote:
+                existentes[registro['sku']] = registro
+
+        objetos = []
+        nombres_lote = {}
+        for sku, (numero, datos) in lote.items():
+            objeto = self.construir(numero, sku, datos, existentes.get(sku))
+            if objeto is None:
+                continue
+            duenio = sku_por_nombre.get(objeto.nombre, sku)
+            if duenio == sku:
+                duenio = nombres_lote.setdefault(objeto.nombre, sku)
+            if duenio != sku:
+                self.error(numero, sku, f"El nombre '{objeto.nombre}' ya pertenece al SKU {duenio}")
+                continue
+            objetos.append((numero, objeto))
+
+        try:
+            with transaction.atomic():
+                self.guardar([objeto for _, objeto in objetos], existentes)
+        except IntegrityError:
+            # Conflicto no detectado de antemano (ej: otra importación concurrente): fila por fila
+            for numero, objeto in objetos:
+                try:
+                    with transaction.atomic():
+                        self.guardar([objeto], existentes)
+                except IntegrityError as e:
+                    self.error(numero, objeto.sku, f'Conflicto al guardar: {e}')
+                    continue
+                self.contar(objeto, existentes)
+            return
+        for _, objeto in objetos:
+            self.contar(objeto, existentes)
+
+    def construir(self, numero, sku, datos, existente):
+        if existente is None and ('nombre' not in datos or 'precio' not in datos):
+            self.error(numero, sku, 'nombre y precio son obligatorios para un SKU nuevo')
+            return None
+
+        valores = dict(existente or {'descripcion': None, 'meses_garantia': 12, 'modelo': None,
+                                     'marca_id': None, 'categoria_id': None, 'estado': 'activo',
+                                     'imagen_url': None, 'imagen_id': None, 'imagen_estado': 'sin_imagen'})
+        for campo in ('nombre', 'descripcion', 'precio', 'meses_garantia', 'modelo', 'estado'):
+            if campo in datos:
+                valores[campo] = datos[campo]
+        for campo, mapa in (('marca', self.marcas), ('categoria', self.categorias)):
+            if campo in datos:
+                id_ = mapa.get(datos[campo].lower())
+                if id_ is None:
+                    self.error(numero, sku, f"{campo} '{datos[campo]}' no existe")
+                    return None
+                valores[f'{campo}_id'] = id_
+        if 'imagen_url' in datos and datos['imagen_url'] != valores['imagen_url']:
+            # URL externa: deja de apuntar a la ImagenMedia anterior (ver generar_derivadas)
+            valores.update(imagen_url=datos['imagen_url'], imagen_id=None, imagen_estado='lista')
+        valores.pop('id', None)
+        valores.pop('sku', None)
+        return Catalogo(sku=sku, **valores)
+
+    def guardar(self, objetos, existentes):
+        Catalogo.objects.bulk_create(
+            objetos, update_conflicts=True, unique_fields=['sku'], update_fields=CAMPOS_ACTUALIZABLES,
+        )
+        # bulk_create no pasa por Catalogo.save(): la garantía de lo vendido se recalcula aquí
+        cambiaron_meses = [
+            existentes[objeto.sku]['id'] for objeto in objetos
+            if objeto.sku in existentes and existentes[objeto.sku]['meses_garantia'] != objeto.meses_garantia
+        ]
+        if cambiaron_meses:
+            Producto.actualizar_fin_garantia(cambiaron_meses)
+
+        cambiaron_precio = [
+            objeto for objeto in objetos
+            if objeto.sku not in existentes or existentes[objeto.sku]['precio'] != objeto.precio
+        ]
+        if cambiaron_precio:
+            # Con update_conflicts no todos los motores devuelven el id: se completa por SKU
+            ids = {sku: existente['id'] for sku, existente in existentes.items()}
+            sin_id = [objeto.sku for objeto in cambiaron_precio if objeto.pk is None and objeto.sku not in ids]
+            if sin_id:
+                ids.update(Catalogo.objects.filter(sku__in=sin_id).values_list('sku', 'id'))
+            HistorialPrecio.registrar(
+                [(objeto.pk or ids[objeto.sku], objeto.precio) for objeto in cambiaron_precio],
+                'importacion', usuario=self.usuario,
+            )
+
+    def contar(self, objeto, existentes):
+        self.resumen['actualizadas' if objeto.sku in existentes else 'creadas'] += 1
+
+
+def describir_resumen(resumen, origen):
+    """Texto para la entrada de bitácora de una importación."""
+    return (
+        f"Importación de catálogo desde '{origen}': {resumen['procesadas']} filas, "
+        f"{resumen['creadas']} creadas, {resumen['actualizadas']} actualizadas, "
+        f"{resumen['total_errores']} con error"
+    )
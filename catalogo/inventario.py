@@ -0,0 +1,239 @@
+"""
+Operaciones masivas sobre el inventario serializado (Producto).
+
+Trabajan por conjuntos (bulk_create / UPDATE ... WHERE) en lugar de guardar ítem por ítem,
+así que no pasan por Producto.save(): cada operación ajusta StockCatalogo por su cuenta
+dentro de la misma transacción.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from catalogo.models import Producto, StockCatalogo
+
+
+def _en_bloques(valores, tamano):
+    for i in range(0, len(valores), tamano):
+        yield valores[i:i + tamano]
+
+
+def normalizar_series(numeros_serie):
+    """Quita espacios y vacíos. Devuelve (series únicas en orden, repetidas dentro del lote)."""
+    unicas = {}
+    repetidas = []
+    for numero in numeros_serie:
+        numero = (numero or '').strip()
+        if not numero:
+            continue
+        if numero in unicas:
+            repetidas.append(numero)
+        else:
+            unicas[numero] = True
+    return list(unicas), repetidas
+
+
+def series_existentes(numeros_serie):
+    """Números de serie que ya están en la BD (consultas IN por bloques, índice único)."""
+    existentes = set()
+    for bloque in _en_bloques(numeros_serie, settings.CATALOGO_INVENTARIO_BLOQUE):
+        existentes.update(
+            Producto.objects.filter(numero_serie__in=bloque).values_list('numero_serie', flat=True)
+        )
+    return existentes
+
+
+def ingresar_productos(catalogo, costo, numeros_serie, estado='disponible'):
+    """
+    Da de alta un lote de ítems de un mismo catálogo y costo.
+    Los números de serie ya registrados o repetidos en el lote se reportan, no se insertan.
+    Devuelve {'creados': int, 'duplicados': [...], 'repetidos': [...]}.
+    """
+    series, repetidas = normalizar_series(numeros_serie)
+
+    for intento in range(2):
+        try:
+            with transaction.atomic():
+                existentes = series_existentes(series)
+                nuevos = [
+                    Producto(catalogo=catalogo, costo=costo, estado=estado, numero_serie=numero)
+                    for numero in series if numero not in existentes
+                ]
+                Producto.objects.bulk_create(nuevos, batch_size=settings.CATALOGO_INVENTARIO_BLOQUE)
+                if nuevos:
+                    StockCatalogo.ajustar({(catalogo.pk, estado): len(nuevos)})
+            break
+        except IntegrityError:
+            # Otro ingreso concurrente insertó alguna de las series: se recalculan los duplicados
+            if intento:
+                raise
+
+    return {
+        'creados': len(nuevos),
+        'duplicados': [numero for numero in series if numero in existentes],
+        'repetidos': repetidas,
+    }
+
+
+# Estado destino -> estados desde los que se permite llegar con un cambio masivo.
+# 'vendido' no está: solo se llega vendiendo (finanzas/ventas).
+TRANSICIONES_PERMITIDAS = {
+    'en_reparacion': {'disponible', 'reservado'},
+    'dado_de_baja': {'disponible', 'reservado', 'en_reparacion'},
+    'disponible': {'en_reparacion', 'reservado'},
+    'reservado': {'disponible'},
+}
+
+
+class ConflictoConcurrente(Exception):
+    """Otra transacción cambió los ítems entre el conteo y el UPDATE."""
+
+
+def _contar_por_estado(queryset):
+    """{(catalogo_id, estado): cantidad} del conjunto, en una sola consulta agrupada."""
+    return {
+        (fila['catalogo_id'], fila['estado']): fila['cantidad']
+        for fila in queryset.values('catalogo_id', 'estado').annotate(cantidad=Count('id')).order_by()
+    }
+
+
+def _actualizar_con_returning(queryset, origenes, destino):
+    """
+    PostgreSQL: cambia a `destino` los ítems del conjunto que están en un estado de origen y
+    devuelve {(catalogo_id, estado anterior): cantidad}, todo en una sentencia.
+    El FOR UPDATE del CTE relee cada fila en su versión vigente: el estado anterior es el que
+    el ítem realmente tenía al cambiar, aunque otra transacción lo haya modificado entretanto.
+    """
+    filas = queryset.filter(estado__in=origenes).select_for_update().values('id', 'catalogo_id', 'estado')
+    sql, params = filas.order_by().query.sql_with_params()
+    tabla = Producto._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH anteriores AS ({sql}),
+            actualizados AS (
+                UPDATE {tabla} SET estado = %s FROM anteriores
+                WHERE {tabla}.id = anteriores.id
+                RETURNING anteriores.catalogo_id, anteriores.estado
+            )
+            SELECT catalogo_id, estado, COUNT(*) FROM actualizados GROUP BY catalogo_id, estado
+        """, (*params, destino))
+        return {(catalogo_id, estado): cantidad for catalogo_id, estado, cantidad in cursor.fetchall()}
+
+
+def _aplicar_transicion(queryset, destino, resultado):
+    origenes = TRANSICIONES_PERMITIDAS[destino]
+
+    # La transición se valida en el propio UPDATE: solo cambian los que están en un estado de origen
+    if connection.vendor == 'postgresql':
+        restantes = _contar_por_estado(queryset.exclude(estado__in=origenes))
+        cambiados = _actualizar_con_returning(queryset, origenes, destino)
+    else:
+        conteos = _contar_por_estado(queryset)
+        cambiados = {clave: cantidad for clave, cantidad in conteos.items() if clave[1] in origenes}
+        restantes = {clave: cantidad for clave, cantidad in conteos.items() if clave[1] not in origenes}
+        # Si el UPDATE no cambia tantos como contó la consulta agrupada, otra transacción
+        # modificó ítems entretanto: se revierte y se reintenta
+        if queryset.filter(estado__in=origenes).update(estado=destino) != sum(cambiados.values()):
+            raise ConflictoConcurrente()
+
+    deltas = Counter()
+    for (catalogo_id, estado), cantidad in cambiados.items():
+        deltas[(catalogo_id, estado)] -= cantidad
+        deltas[(catalogo_id, destino)] += cantidad
+        resultado['por_estado_anterior'][estado] = resultado['por_estado_anterior'].get(estado, 0) + cantidad
+        resultado['actualizados'] += cantidad
+    for (_, estado), cantidad in restantes.items():
+        if estado == destino:
+            resultado['sin_cambio'] += cantidad
+        else:
+            resultado['no_permitidos'][estado] = resultado['no_permitidos'].get(estado, 0) + cantidad
+    StockCatalogo.ajustar(deltas)
+
+
+def cambiar_estado_masivo(destino, numeros_serie=None, catalogo_id=None, fecha_desde=None,
+                          fecha_hasta=None, estado_actual=None):
+    """
+    Cambia el estado de un conjunto de ítems con un solo UPDATE ... WHERE estado IN (origenes).
+    Se eligen por lista de números de serie o por filtro (catálogo, rango de fecha_ingreso,
+    estado actual). Devuelve los conteos por estado anterior, los que no podían pasar a
+    `destino` y, con lista de series, las que no existen.
+    """
+    if destino not in TRANSICIONES_PERMITIDAS:
+        raise ValueError(f"No se permite el cambio masivo a '{destino}'")
+
+    filtros = {}
+    if catalogo_id:
+        filtros['catalogo_id'] = catalogo_id
+    if fecha_desde:
+        filtros['fecha_ingreso__gte'] = fecha_desde
+    if fecha_hasta:
+        filtros['fecha_ingreso__lte'] = fecha_hasta
+    if estado_actual:
+        filtros['estado'] = estado_actual
+
+    if numeros_serie is not None:
+        series, _ = normalizar_series(numeros_serie)
+        conjuntos = [
+            Producto.objects.filter(numero_serie__in=bloque, **filtros)
+            for bloque in _en_bloques(series, settings.CATALOGO_INVENTARIO_BLOQUE)
+        ]
+    else:
+        conjuntos = [Producto.objects.filter(**filtros)]
+
+    for intento in range(3):
+        resultado = {
+            'destino': destino, 'actualizados': 0, 'por_estado_anterior': {},
+            'sin_cambio': 0, 'no_permitidos': {},
+        }
+        try:
+            with transaction.atomic():
+                for queryset in conjuntos:
+                    _aplicar_transicion(queryset, destino, resultado)
+            break
+        except ConflictoConcurrente:
+            if intento == 2:
+                raise
+
+    if numeros_serie is not None:
+        existentes = series_existentes(series)
+        resultado['no_encontrados'] = [numero for numero in series if numero not in existentes]
+    return resultado
+
+
+def consultar_series(numeros_serie):
+    """
+    Estado resumido (venta y garantía) de cada número de serie, en el orden recibido.
+    Una sola consulta numero_serie IN (...) con JOIN al catálogo, sin instanciar modelos.
+    """
+    series, _ = normalizar_series(numeros_serie)
+    encontrados = {
+        fila['numero_serie']: fila
+        for fila in Producto.objects.filter(numero_serie__in=series).values(
+            'numero_serie', 'estado', 'fecha_venta', 'fecha_fin_garantia',
+            'catalogo_id', 'catalogo__sku', 'catalogo__nombre',
+        )
+    }
+
+    ahora = timezone.now()
+    resultado = []
+    for numero in series:
+        fila = encontrados.get(numero)
+        if fila is None:
+            resultado.append({'numero_serie': numero, 'encontrado': False})
+            continue
+        resultado.append({
+            'numero_serie': numero,
+            'encontrado': True,
+            'estado': fila['estado'],
+            'catalogo_id': fila['catalogo_id'],
+            'sku': fila['catalogo__sku'],
+            'nombre': fila['catalogo__nombre'],
+            'fecha_venta': fila['fecha_venta'],
+            'fecha_fin_garantia': fila['fecha_fin_garantia'],
+            'garantia_vigente': bool(
+                fila['estado'] == 'vendido' and fila['fecha_fin_garantia'] and ahora <= fila['fecha_fin_garantia']
+            ),
+        })
+    return resultado
@@ -0,0 +1,21 @@
+"""
+Recalcula Catalogo.popularidad a partir de las ventas (ver catalogo/popularidad.py).
+Pensado para ejecutarse periódicamente (ej: cron cada hora o una vez al día).
+
+Uso:
+    python manage.py actualizar_popularidad
+"""
+from django.core.management.base import BaseCommand
+
+from catalogo.popularidad import actualizar_popularidad
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el puntaje de popularidad (ventas con decaimiento exponencial) de cada catálogo'
+
+    def handle(self, *args, **options):
+        resumen = actualizar_popularidad()
+        self.stdout.write(self.style.SUCCESS(
+            f"Catálogos con ventas en la ventana: {resumen['con_ventas']}, "
+            f"puntajes actualizados: {resumen['actualizados']}"
+        ))
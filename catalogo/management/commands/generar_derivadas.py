@@ -0,0 +1,47 @@
+"""
+Registra en el almacén de imágenes (catalogo/media.py) los catálogos que tienen
+imagen_url pero todavía no tienen ImagenMedia (imágenes subidas antes de las derivadas).
+
+Uso:
+    python manage.py generar_derivadas [--limite 500]
+"""
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from catalogo.almacenamiento import ErrorAlmacenamiento
+from catalogo.imagenes import asignar_imagen
+from catalogo.media import ImagenInvalida, registrar_imagen
+from catalogo.models import Catalogo
+
+
+class Command(BaseCommand):
+    help = 'Genera miniatura/mediana para las imágenes de catálogo existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=None, help='Máximo de catálogos a procesar')
+
+    def handle(self, *args, **options):
+        pendientes = (
+            Catalogo.objects.filter(imagen__isnull=True, imagen_url__isnull=False)
+            .exclude(imagen_url='')
+            .values_list('id', 'imagen_url')
+            .order_by('id')
+        )
+        if options['limite']:
+            pendientes = pendientes[:options['limite']]
+
+        procesados = errores = 0
+        for catalogo_id, url in pendientes.iterator():
+            try:
+                response = requests.get(url, timeout=settings.IMGBB_TIMEOUT)
+                response.raise_for_status()
+                media = registrar_imagen(response.content)
+            except (requests.RequestException, ImagenInvalida, ErrorAlmacenamiento) as e:
+                errores += 1
+                self.stderr.write(f'Catálogo {catalogo_id}: {e}')
+                continue
+            asignar_imagen(catalogo_id, media)
+            procesados += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Imágenes registradas: {procesados}, con error: {errores}'))
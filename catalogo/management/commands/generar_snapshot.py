@@ -0,0 +1,25 @@
+"""
+Genera el snapshot estático del catálogo para la tienda (ver catalogo/snapshot.py).
+
+Uso:
+    python manage.py generar_snapshot              # incremental: solo lo que cambió desde la última corrida
+    python manage.py generar_snapshot --completo   # reescribe todos los archivos
+"""
+from django.core.management.base import BaseCommand
+
+from catalogo.snapshot import generar_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Escribe el catálogo activo en archivos JSON comprimidos (gzip) para servirlos sin Django'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true', help='Regenerar todo en lugar de solo los cambios')
+
+    def handle(self, *args, **options):
+        resumen = generar_snapshot(completo=options['completo'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot {resumen['modo']}: {resumen['cambiados']} catálogos revisados, "
+            f"{resumen['eliminados']} eliminados, {len(resumen['archivos'])} archivos escritos "
+            f"({resumen['total']} catálogos publicados)"
+        ))
@@ -0,0 +1,55 @@
+"""
+Importa (o actualiza por SKU) el Catálogo desde un archivo CSV o NDJSON.
+Ver catalogo/importacion.py para las columnas aceptadas.
+
+Uso:
+    python manage.py importar_catalogo lista_precios.csv
+    python manage.py importar_catalogo productos.ndjson --lote 2000 --no-crear-relaciones
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from administracion.core.utils import registrar_bitacora
+from catalogo.importacion import ImportadorCatalogo, describir_resumen, detectar_formato, leer_filas
+
+
+class Command(BaseCommand):
+    help = 'Importa el Catálogo desde CSV/NDJSON haciendo upsert por SKU'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo CSV o NDJSON')
+        parser.add_argument('--formato', choices=['csv', 'ndjson'], default=None,
+                            help='Por defecto se deduce de la extensión')
+        parser.add_argument('--lote', type=int, default=None, help='Filas por INSERT ... ON CONFLICT')
+        parser.add_argument('--no-crear-relaciones', action='store_true',
+                            help='No crear marcas/categorías inexistentes (la fila se reporta como error)')
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or detectar_formato(options['archivo'])
+        importador = ImportadorCatalogo(
+            tamano_lote=options['lote'], crear_relaciones=not options['no_crear_relaciones']
+        )
+
+        inicio = time.monotonic()
+        try:
+            with open(options['archivo'], encoding='utf-8-sig', newline='') as flujo:
+                resumen = importador.importar(leer_filas(flujo, formato))
+        except OSError as e:
+            raise CommandError(f'No se pudo leer el archivo: {e}')
+        duracion = time.monotonic() - inicio
+
+        for error in resumen['errores']:
+            self.stderr.write(f"Fila {error['fila']} (SKU {error['sku']}): {error['error']}")
+        if resumen['total_errores'] > len(resumen['errores']):
+            self.stderr.write(f"... y {resumen['total_errores'] - len(resumen['errores'])} errores más")
+
+        descripcion = describir_resumen(resumen, options['archivo'])
+        registrar_bitacora(
+            request=None,
+            usuario=None,
+            accion="IMPORTAR CATALOGO",
+            descripcion=descripcion,
+            modulo="Catalogo"
+        )
+        self.stdout.write(self.style.SUCCESS(f'{descripcion} ({duracion:.1f} s)'))
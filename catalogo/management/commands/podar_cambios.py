@@ -0,0 +1,23 @@
+"""
+Borra del log de sincronización incremental (CambioCatalogo) los registros más viejos que
+CATALOGO_CAMBIOS_RETENCION_DIAS (ver catalogo/cambios.py). Pensado para ejecutarse
+periódicamente (ej: cron diario).
+
+Uso:
+    python manage.py podar_cambios
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from catalogo.cambios import podar_cambios
+
+
+class Command(BaseCommand):
+    help = 'Borra los registros de CambioCatalogo más viejos que CATALOGO_CAMBIOS_RETENCION_DIAS'
+
+    def handle(self, *args, **options):
+        borrados = podar_cambios()
+        self.stdout.write(self.style.SUCCESS(
+            f"Registros de cambios borrados: {borrados} "
+            f"(retención: {settings.CATALOGO_CAMBIOS_RETENCION_DIAS} días)"
+        ))
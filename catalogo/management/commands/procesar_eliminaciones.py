@@ -0,0 +1,37 @@
+"""
+Worker de eliminaciones de catálogos en segundo plano (ver catalogo/eliminacion.py).
+
+Uso:
+    python manage.py procesar_eliminaciones               # procesa lo pendiente y termina
+    python manage.py procesar_eliminaciones --continuo    # queda escuchando la cola
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from catalogo.eliminacion import procesar_eliminacion, reclamar_pendientes
+
+
+class Command(BaseCommand):
+    help = 'Borra por lotes el inventario de los catálogos con eliminación pendiente'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true', help='No terminar; revisar la cola cada --intervalo segundos')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos entre revisiones en modo continuo')
+
+    def handle(self, *args, **options):
+        completadas = fallidas = 0
+        while True:
+            ids = reclamar_pendientes()
+            for eliminacion_id in ids:
+                if procesar_eliminacion(eliminacion_id):
+                    completadas += 1
+                else:
+                    fallidas += 1
+
+            if not ids:
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+
+        self.stdout.write(self.style.SUCCESS(f'Eliminaciones completadas: {completadas}, fallidas: {fallidas}'))
@@ -0,0 +1,40 @@
+"""
+Worker de subidas de imágenes del Catálogo.
+
+Uso:
+    python manage.py procesar_imagenes               # procesa lo pendiente y termina
+    python manage.py procesar_imagenes --continuo    # queda escuchando la cola
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from catalogo.imagenes import procesar_subida, reclamar_pendientes
+
+
+class Command(BaseCommand):
+    help = 'Envía las imágenes en cola (SubidaImagen) al backend de almacenamiento'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true', help='No terminar; revisar la cola cada --intervalo segundos')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos entre revisiones en modo continuo')
+        parser.add_argument('--lote', type=int, default=10, help='Subidas reclamadas por iteración')
+
+    def handle(self, *args, **options):
+        completadas = reprogramadas = 0
+        while True:
+            ids = reclamar_pendientes(options['lote'])
+            for subida_id in ids:
+                if procesar_subida(subida_id):
+                    completadas += 1
+                else:
+                    reprogramadas += 1
+
+            if not ids:
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Subidas terminadas: {completadas}, reprogramadas: {reprogramadas}'
+        ))
@@ -0,0 +1,69 @@
+"""
+Reconstruye los contadores de StockCatalogo a partir de los Productos
+y reporta las diferencias (drift) encontradas.
+
+Uso:
+    python manage.py sincronizar_stock              # corrige los contadores
+    python manage.py sincronizar_stock --verificar  # solo reporta (exit 1 si hay drift)
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from administracion.core.cache import incrementar_version
+from catalogo.models import Producto, StockCatalogo
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye StockCatalogo desde Producto y verifica diferencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Solo reporta las diferencias sin modificar los contadores',
+        )
+
+    def handle(self, *args, **options):
+        verificar = options['verificar']
+
+        with transaction.atomic():
+            # Bloqueamos los contadores para que los cambios de estado concurrentes
+            # esperen a que terminemos (su ajuste va después del UPDATE de Producto).
+            contadores = {
+                (c.catalogo_id, c.estado): c
+                for c in StockCatalogo.objects.select_for_update()
+            }
+            reales = {
+                (r['catalogo_id'], r['estado']): r['cantidad']
+                for r in Producto.objects.values('catalogo_id', 'estado')
+                .annotate(cantidad=Count('id'))
+                .order_by()
+            }
+
+            diferencias = []
+            for clave in set(contadores) | set(reales):
+                guardado = contadores[clave].cantidad if clave in contadores else 0
+                real = reales.get(clave, 0)
+                if guardado != real:
+                    diferencias.append((clave, guardado, real))
+
+            for (catalogo_id, estado), guardado, real in sorted(diferencias):
+                self.stdout.write(
+                    f'Catálogo {catalogo_id} [{estado}]: contador={guardado} real={real}'
+                )
+
+            if not diferencias:
+                self.stdout.write(self.style.SUCCESS('Contadores de stock sin diferencias'))
+                return
+
+            if verificar:
+                raise CommandError(f'{len(diferencias)} contadores de stock con diferencias')
+
+            for (catalogo_id, estado), guardado, real in diferencias:
+                StockCatalogo.objects.update_or_create(
+                    catalogo_id=catalogo_id, estado=estado, defaults={'cantidad': real}
+                )
+            incrementar_version('catalogo')
+
+        self.stdout.write(self.style.SUCCESS(f'{len(diferencias)} contadores de stock corregidos'))
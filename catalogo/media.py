@@ -0,0 +1,80 @@
+"""
+Almacén de imágenes direccionado por contenido.
+
+Cada original se identifica por el SHA-256 de sus bytes (ImagenMedia.hash): subir dos veces
+la misma imagen reutiliza el registro existente. Al registrar un original se generan una
+sola vez las derivadas de tamaño fijo (miniatura y mediana) y todo se guarda en el backend
+de catalogo/almacenamiento.py con nombres basados en el hash.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from catalogo.almacenamiento import obtener_almacenamiento
+from catalogo.models import ImagenMedia
+
+EXTENSIONES = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+
+class ImagenInvalida(Exception):
+    """El archivo no es una imagen que Pillow pueda leer (no tiene sentido reintentar)."""
+
+
+def calcular_hash(contenido):
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def generar_derivada(imagen, tamano, formato):
+    """Redimensiona (sin deformar) para caber en `tamano` y devuelve los bytes codificados."""
+    derivada = imagen.copy()
+    derivada.thumbnail(tamano, Image.Resampling.LANCZOS)
+    if formato == 'JPEG' and derivada.mode not in ('RGB', 'L'):
+        derivada = derivada.convert('RGB')
+    buffer = BytesIO()
+    derivada.save(buffer, format=formato, quality=settings.CATALOGO_IMAGEN_CALIDAD)
+    return buffer.getvalue()
+
+
+def registrar_imagen(contenido, hash_contenido=None):
+    """
+    Devuelve la ImagenMedia del contenido, creándola (original + derivadas) si no existe.
+    Puede lanzar ImagenInvalida o catalogo.almacenamiento.ErrorAlmacenamiento.
+    """
+    hash_contenido = hash_contenido or calcular_hash(contenido)
+    existente = ImagenMedia.objects.filter(hash=hash_contenido).first()
+    if existente:
+        return existente
+
+    try:
+        imagen = Image.open(BytesIO(contenido))
+        imagen.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ImagenInvalida(f"Archivo de imagen inválido: {e}") from e
+
+    formato_original = imagen.format or 'JPEG'
+    imagen = ImageOps.exif_transpose(imagen)
+    formato = settings.CATALOGO_IMAGEN_FORMATO_DERIVADAS
+    extension = EXTENSIONES.get(formato, formato.lower())
+
+    almacenamiento = obtener_almacenamiento()
+    urls = {
+        'url_original': almacenamiento.guardar(
+            f'{hash_contenido}.{EXTENSIONES.get(formato_original, "img")}', contenido
+        ),
+    }
+    for nombre, tamano in settings.CATALOGO_IMAGEN_DERIVADAS.items():
+        urls[f'url_{nombre}'] = almacenamiento.guardar(
+            f'{hash_contenido}_{nombre}.{extension}', generar_derivada(imagen, tamano, formato)
+        )
+
+    try:
+        with transaction.atomic():
+            return ImagenMedia.objects.create(
+                hash=hash_contenido, ancho=imagen.width, alto=imagen.height, **urls
+            )
+    except IntegrityError:
+        # Otro worker registró el mismo contenido al mismo tiempo
+        return ImagenMedia.objects.get(hash=hash_contenido)
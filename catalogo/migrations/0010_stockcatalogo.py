@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def poblar_contadores(apps, schema_editor):
+    """Carga inicial de StockCatalogo a partir de los Productos existentes."""
+    Producto = apps.get_model('catalogo', 'Producto')
+    StockCatalogo = apps.get_model('catalogo', 'StockCatalogo')
+    conteos = (
+        Producto.objects.values('catalogo_id', 'estado')
+        .annotate(cantidad=Count('id'))
+        .order_by()
+    )
+    StockCatalogo.objects.bulk_create(
+        [StockCatalogo(catalogo_id=c['catalogo_id'], estado=c['estado'], cantidad=c['cantidad']) for c in conteos],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0009_merge_20261018_0043'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('disponible', 'Disponible'), ('reservado', 'Reservado'), ('vendido', 'Vendido'), ('en_reparacion', 'En Reparación'), ('dado_de_baja', 'Dado de Baja')], max_length=15)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('catalogo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contadores_stock', to='catalogo.catalogo')),
+            ],
+            options={
+                'verbose_name': 'Contador de Stock',
+                'verbose_name_plural': 'Contadores de Stock',
+                'unique_together': {('catalogo', 'estado')},
+            },
+        ),
+        migrations.RunPython(poblar_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:10
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Configuración de búsqueda: stemming en español + eliminación de acentos.
+SQL_CONFIGURACION = """
+CREATE EXTENSION IF NOT EXISTS unaccent;
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'es_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION es_unaccent (COPY = pg_catalog.spanish);
+        ALTER TEXT SEARCH CONFIGURATION es_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+    END IF;
+END $$;
+"""
+
+# El vector se recalcula en la BD, así también lo mantienen los bulk_create/update.
+SQL_TRIGGERS = """
+CREATE OR REPLACE FUNCTION catalogo_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('es_unaccent', coalesce(NEW.nombre, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.sku, '')), 'A') ||
+        setweight(to_tsvector('es_unaccent', coalesce(
+            (SELECT nombre FROM catalogo_marca WHERE id = NEW.marca_id), '')), 'B') ||
+        setweight(to_tsvector('es_unaccent', coalesce(
+            (SELECT nombre FROM catalogo_categoria WHERE id = NEW.categoria_id), '')), 'B') ||
+        setweight(to_tsvector('es_unaccent', coalesce(NEW.descripcion, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS catalogo_search_vector_update ON catalogo_catalogo;
+CREATE TRIGGER catalogo_search_vector_update
+    BEFORE INSERT OR UPDATE OF nombre, sku, descripcion, marca_id, categoria_id
+    ON catalogo_catalogo
+    FOR EACH ROW EXECUTE FUNCTION catalogo_search_vector_trigger();
+
+-- Renombrar una marca o categoría recalcula el vector de sus catálogos
+CREATE OR REPLACE FUNCTION catalogo_marca_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    UPDATE catalogo_catalogo SET nombre = nombre WHERE marca_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS catalogo_marca_search_vector_update ON catalogo_marca;
+CREATE TRIGGER catalogo_marca_search_vector_update
+    AFTER UPDATE OF nombre ON catalogo_marca
+    FOR EACH ROW WHEN (OLD.nombre IS DISTINCT FROM NEW.nombre)
+    EXECUTE FUNCTION catalogo_marca_search_vector_trigger();
+
+CREATE OR REPLACE FUNCTION catalogo_categoria_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    UPDATE catalogo_catalogo SET nombre = nombre WHERE categoria_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS catalogo_categoria_search_vector_update ON catalogo_categoria;
+CREATE TRIGGER catalogo_categoria_search_vector_update
+    AFTER UPDATE OF nombre ON catalogo_categoria
+    FOR EACH ROW WHEN (OLD.nombre IS DISTINCT FROM NEW.nombre)
+    EXECUTE FUNCTION catalogo_categoria_search_vector_trigger();
+
+CREATE INDEX IF NOT EXISTS catalogo_search_vector_gin
+    ON catalogo_catalogo USING gin (search_vector);
+
+-- Carga inicial del vector para los catálogos existentes
+UPDATE catalogo_catalogo SET nombre = nombre;
+"""
+
+SQL_REVERTIR = """
+DROP INDEX IF EXISTS catalogo_search_vector_gin;
+DROP TRIGGER IF EXISTS catalogo_categoria_search_vector_update ON catalogo_categoria;
+DROP TRIGGER IF EXISTS catalogo_marca_search_vector_update ON catalogo_marca;
+DROP TRIGGER IF EXISTS catalogo_search_vector_update ON catalogo_catalogo;
+DROP FUNCTION IF EXISTS catalogo_categoria_search_vector_trigger();
+DROP FUNCTION IF EXISTS catalogo_marca_search_vector_trigger();
+DROP FUNCTION IF EXISTS catalogo_search_vector_trigger();
+"""
+
+
+def crear_busqueda(apps, schema_editor):
+    # Solo PostgreSQL; en SQLite la búsqueda usa el fallback LIKE (catalogo/busqueda.py)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(SQL_CONFIGURACION)
+    schema_editor.execute(SQL_TRIGGERS)
+
+
+def eliminar_busqueda(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(SQL_REVERTIR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0010_stockcatalogo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogo',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(crear_busqueda, eliminar_busqueda),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:40
+
+from django.db import migrations
+
+# Índices para el autocompletado: `<%` usa el índice sobre nombre y
+# ILIKE (istartswith/icontains compilan a UPPER(...) LIKE UPPER(...)) los de UPPER().
+SQL_INDICES = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS catalogo_nombre_trgm
+    ON catalogo_catalogo USING gin (nombre gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS catalogo_nombre_upper_trgm
+    ON catalogo_catalogo USING gin (UPPER(nombre) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS catalogo_sku_upper_trgm
+    ON catalogo_catalogo USING gin (UPPER(sku) gin_trgm_ops);
+"""
+
+SQL_REVERTIR = """
+DROP INDEX IF EXISTS catalogo_sku_upper_trgm;
+DROP INDEX IF EXISTS catalogo_nombre_upper_trgm;
+DROP INDEX IF EXISTS catalogo_nombre_trgm;
+"""
+
+
+def crear_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(SQL_INDICES)
+
+
+def eliminar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(SQL_REVERTIR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0011_catalogo_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def marcar_imagenes_existentes(apps, schema_editor):
+    Catalogo = apps.get_model('catalogo', 'Catalogo')
+    Catalogo.objects.exclude(imagen_url__isnull=True).exclude(imagen_url='').update(imagen_estado='lista')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0012_catalogo_indices_trigram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogo',
+            name='imagen_estado',
+            field=models.CharField(choices=[('sin_imagen', 'Sin imagen'), ('pendiente', 'Pendiente de subir'), ('lista', 'Lista'), ('error', 'Error al subir')], default='sin_imagen', max_length=15),
+        ),
+        migrations.RunPython(marcar_imagenes_existentes, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='SubidaImagen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo', models.CharField(max_length=255)),
+                ('nombre_original', models.CharField(blank=True, max_length=255)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completada', 'Completada'), ('fallida', 'Fallida')], default='pendiente', max_length=15)),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ultimo_error', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('catalogo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subidas_imagen', to='catalogo.catalogo')),
+            ],
+            options={
+                'verbose_name': 'Subida de Imagen',
+                'verbose_name_plural': 'Subidas de Imágenes',
+                'ordering': ['proximo_intento'],
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='catalogo_su_estado_11df46_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0013_catalogo_imagen_estado_subidaimagen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImagenMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(max_length=64, unique=True)),
+                ('url_original', models.URLField(max_length=500)),
+                ('url_miniatura', models.URLField(max_length=500)),
+                ('url_mediana', models.URLField(max_length=500)),
+                ('ancho', models.PositiveIntegerField()),
+                ('alto', models.PositiveIntegerField()),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Imagen',
+                'verbose_name_plural': 'Imágenes',
+            },
+        ),
+        migrations.AddField(
+            model_name='catalogo',
+            name='imagen',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='catalogos', to='catalogo.imagenmedia'),
+        ),
+        migrations.AddField(
+            model_name='subidaimagen',
+            name='hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
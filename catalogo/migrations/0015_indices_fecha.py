@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0014_imagenmedia_catalogo_imagen'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='catalogo',
+            index=models.Index(fields=['-fecha_creacion'], name='catalogo_ca_fecha_c_a5ba77_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['-fecha_ingreso'], name='catalogo_pr_fecha_i_4cfc14_idx'),
+        ),
+    ]
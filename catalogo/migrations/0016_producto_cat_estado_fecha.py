@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0015_indices_fecha'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['catalogo', 'estado', 'fecha_ingreso'], name='producto_cat_estado_fecha'),
+        ),
+    ]
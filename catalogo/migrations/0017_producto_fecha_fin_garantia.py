@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:30
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def calcular_fin_garantia(apps, schema_editor):
+    """Backfill: un UPDATE por cada valor distinto de meses_garantia."""
+    Catalogo = apps.get_model('catalogo', 'Catalogo')
+    Producto = apps.get_model('catalogo', 'Producto')
+    meses_usados = (
+        Catalogo.objects.filter(productos__fecha_venta__isnull=False)
+        .values_list('meses_garantia', flat=True)
+        .distinct()
+    )
+    for meses in meses_usados:
+        Producto.objects.filter(fecha_venta__isnull=False, catalogo__meses_garantia=meses).update(
+            fecha_fin_garantia=F('fecha_venta') + timedelta(days=meses * 30)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0016_producto_cat_estado_fecha'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='fecha_fin_garantia',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['fecha_fin_garantia'], name='catalogo_pr_fecha_f_f1da99_idx'),
+        ),
+        migrations.RunPython(calcular_fin_garantia, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def registrar_precios_iniciales(apps, schema_editor):
+    """
+    Backfill: una fila 'inicial' por catálogo con su precio actual, vigente desde su creación
+    (los cambios anteriores solo quedaron como texto en la bitácora).
+    """
+    Catalogo = apps.get_model('catalogo', 'Catalogo')
+    HistorialPrecio = apps.get_model('catalogo', 'HistorialPrecio')
+    HistorialPrecio.objects.bulk_create([
+        HistorialPrecio(catalogo_id=id_, precio=precio, vigente_desde=fecha_creacion, origen='inicial')
+        for id_, precio, fecha_creacion in Catalogo.objects.values_list('id', 'precio', 'fecha_creacion').iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0017_producto_fecha_fin_garantia'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistorialPrecio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('precio', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('vigente_desde', models.DateTimeField(default=django.utils.timezone.now)),
+                ('origen', models.CharField(choices=[('inicial', 'Precio inicial (migración)'), ('creacion', 'Creación'), ('edicion', 'Edición'), ('importacion', 'Importación'), ('ajuste_masivo', 'Ajuste masivo')], max_length=15)),
+                ('catalogo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historial_precios', to='catalogo.catalogo')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cambios_precio', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Historial de Precio',
+                'verbose_name_plural': 'Historial de Precios',
+                'ordering': ['catalogo', '-vigente_desde'],
+                'default_permissions': ('add', 'view'),
+                'indexes': [models.Index(fields=['catalogo', 'vigente_desde'], name='historial_precio_cat_fecha')],
+            },
+        ),
+        migrations.RunPython(registrar_precios_iniciales, migrations.RunPython.noop),
+    ]
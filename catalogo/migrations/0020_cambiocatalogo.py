@@ -0,0 +1,154 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# PostgreSQL: triggers por sentencia con tablas de transición, un solo INSERT ... SELECT
+# por cada UPDATE/INSERT/DELETE aunque toque miles de filas (bulk_create, ajustes masivos).
+SQL_TRIGGERS_POSTGRESQL = """
+CREATE OR REPLACE FUNCTION catalogo_cambio_alta() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO catalogo_cambiocatalogo (entidad, objeto_id, operacion, transaccion, fecha)
+    SELECT TG_ARGV[0], id, 'alta', txid_current(), now() FROM nuevas;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION catalogo_cambio_modificacion() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO catalogo_cambiocatalogo (entidad, objeto_id, operacion, transaccion, fecha)
+    SELECT TG_ARGV[0], id, 'modificacion', txid_current(), now() FROM nuevas;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION catalogo_cambio_baja() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO catalogo_cambiocatalogo (entidad, objeto_id, operacion, transaccion, fecha)
+    SELECT TG_ARGV[0], id, 'baja', txid_current(), now() FROM antiguas;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+-- Un cambio de stock es una modificación del catálogo (stock_disponible)
+CREATE OR REPLACE FUNCTION catalogo_cambio_stock() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO catalogo_cambiocatalogo (entidad, objeto_id, operacion, transaccion, fecha)
+    SELECT DISTINCT 'catalogo', catalogo_id, 'modificacion', txid_current(), now() FROM nuevas;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+TABLAS = [('catalogo', 'catalogo_catalogo'), ('producto', 'catalogo_producto')]
+
+
+def sql_triggers_postgresql():
+    sentencias = [SQL_TRIGGERS_POSTGRESQL]
+    for entidad, tabla in TABLAS:
+        sentencias.append(f"""
+DROP TRIGGER IF EXISTS {entidad}_cambio_alta ON {tabla};
+CREATE TRIGGER {entidad}_cambio_alta AFTER INSERT ON {tabla}
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION catalogo_cambio_alta('{entidad}');
+DROP TRIGGER IF EXISTS {entidad}_cambio_modificacion ON {tabla};
+CREATE TRIGGER {entidad}_cambio_modificacion AFTER UPDATE ON {tabla}
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION catalogo_cambio_modificacion('{entidad}');
+DROP TRIGGER IF EXISTS {entidad}_cambio_baja ON {tabla};
+CREATE TRIGGER {entidad}_cambio_baja AFTER DELETE ON {tabla}
+    REFERENCING OLD TABLE AS antiguas
+    FOR EACH STATEMENT EXECUTE FUNCTION catalogo_cambio_baja('{entidad}');
+""")
+    for evento in ('INSERT', 'UPDATE'):
+        sentencias.append(f"""
+DROP TRIGGER IF EXISTS stock_cambio_{evento.lower()} ON catalogo_stockcatalogo;
+CREATE TRIGGER stock_cambio_{evento.lower()} AFTER {evento} ON catalogo_stockcatalogo
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION catalogo_cambio_stock();
+""")
+    return sentencias
+
+
+def sql_triggers_sqlite():
+    # SQLite no tiene triggers por sentencia: uno por fila (solo desarrollo).
+    # Ojo: SQLite reconstruye la tabla en algunos ALTER; una migración futura que altere
+    # estas tablas debe volver a crear los triggers.
+    fecha = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+    sentencias = []
+    for entidad, tabla in TABLAS:
+        for nombre, evento, fila in (('alta', 'INSERT', 'NEW'), ('modificacion', 'UPDATE', 'NEW'), ('baja', 'DELETE', 'OLD')):
+            sentencias.append(f"DROP TRIGGER IF EXISTS {entidad}_cambio_{nombre}")
+            sentencias.append(f"""
+CREATE TRIGGER {entidad}_cambio_{nombre} AFTER {evento} ON {tabla}
+BEGIN
+    INSERT INTO catalogo_cambiocatalogo (entidad, objeto_id, operacion, transaccion, fecha)
+    VALUES ('{entidad}', {fila}.id, '{nombre}', 0, {fecha});
+END""")
+    for evento in ('INSERT', 'UPDATE'):
+        sentencias.append(f"DROP TRIGGER IF EXISTS stock_cambio_{evento.lower()}")
+        sentencias.append(f"""
+CREATE TRIGGER stock_cambio_{evento.lower()} AFTER {evento} ON catalogo_stockcatalogo
+BEGIN
+    INSERT INTO catalogo_cambiocatalogo (entidad, objeto_id, operacion, transaccion, fecha)
+    VALUES ('catalogo', NEW.catalogo_id, 'modificacion', 0, {fecha});
+END""")
+    return sentencias
+
+
+def crear_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        sentencias = sql_triggers_postgresql()
+    elif vendor == 'sqlite':
+        sentencias = sql_triggers_sqlite()
+    else:
+        return
+    for sentencia in sentencias:
+        schema_editor.execute(sentencia)
+
+
+def eliminar_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in ('postgresql', 'sqlite'):
+        return
+    triggers = [
+        (f'{entidad}_cambio_{nombre}', tabla)
+        for entidad, tabla in TABLAS for nombre in ('alta', 'modificacion', 'baja')
+    ] + [('stock_cambio_insert', 'catalogo_stockcatalogo'), ('stock_cambio_update', 'catalogo_stockcatalogo')]
+    for trigger, tabla in triggers:
+        if vendor == 'postgresql':
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {trigger} ON {tabla}')
+        else:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    if vendor == 'postgresql':
+        for funcion in ('catalogo_cambio_alta', 'catalogo_cambio_modificacion', 'catalogo_cambio_baja', 'catalogo_cambio_stock'):
+            schema_editor.execute(f'DROP FUNCTION IF EXISTS {funcion}()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0019_catalogo_fecha_actualizacion_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entidad', models.CharField(choices=[('catalogo', 'Catálogo'), ('producto', 'Producto')], max_length=10)),
+                ('objeto_id', models.BigIntegerField()),
+                ('operacion', models.CharField(choices=[('alta', 'Alta'), ('modificacion', 'Modificación'), ('baja', 'Baja')], max_length=15)),
+                ('transaccion', models.BigIntegerField(default=0)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Cambio de Catálogo',
+                'verbose_name_plural': 'Cambios de Catálogo',
+                'ordering': ['transaccion', 'id'],
+                'indexes': [models.Index(fields=['transaccion', 'id'], name='cambio_catalogo_cursor')],
+            },
+        ),
+        migrations.RunPython(crear_triggers, eliminar_triggers),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0020_cambiocatalogo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EliminacionCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('catalogo_id', models.BigIntegerField(db_index=True)),
+                ('sku', models.CharField(max_length=50)),
+                ('nombre', models.CharField(max_length=100)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completada', 'Completada'), ('fallida', 'Fallida')], default='pendiente', max_length=15)),
+                ('total_productos', models.PositiveIntegerField(default=0)),
+                ('productos_eliminados', models.PositiveIntegerField(default=0)),
+                ('ultimo_error', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eliminaciones_catalogo', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Eliminación de Catálogo',
+                'verbose_name_plural': 'Eliminaciones de Catálogo',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_actualizacion'], name='catalogo_el_estado_940bf5_idx')],
+            },
+        ),
+    ]
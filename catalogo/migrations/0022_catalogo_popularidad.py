@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:40
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+cambios = import_module('catalogo.migrations.0020_cambiocatalogo')
+
+
+def recrear_triggers_sqlite(apps, schema_editor):
+    # SQLite reconstruye catalogo_catalogo al agregar la columna y pierde sus triggers (ver 0020)
+    if schema_editor.connection.vendor == 'sqlite':
+        cambios.crear_triggers(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0021_eliminacioncatalogo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogo',
+            name='popularidad',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='catalogo',
+            index=models.Index(fields=['popularidad', 'id'], name='catalogo_popularidad_id'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogo',
+            index=models.Index(fields=['precio', 'id'], name='catalogo_precio_id'),
+        ),
+        migrations.RunPython(recrear_triggers_sqlite, migrations.RunPython.noop),
+    ]
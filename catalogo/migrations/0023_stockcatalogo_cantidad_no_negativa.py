@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:35
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+cambios = import_module('catalogo.migrations.0020_cambiocatalogo')
+
+
+def recrear_triggers_sqlite(apps, schema_editor):
+    # SQLite reconstruye catalogo_stockcatalogo al agregar la restricción y pierde sus triggers (ver 0020)
+    if schema_editor.connection.vendor == 'sqlite':
+        cambios.crear_triggers(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0022_catalogo_popularidad'),
+    ]
+
+    operations = [
+        # Contadores que ya quedaron en negativo: sincronizar_stock los recalcula luego
+        migrations.RunSQL(
+            'UPDATE catalogo_stockcatalogo SET cantidad = 0 WHERE cantidad < 0',
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='stockcatalogo',
+            constraint=models.CheckConstraint(condition=models.Q(cantidad__gte=0), name='stockcatalogo_cantidad_no_negativa'),
+        ),
+        migrations.RunPython(recrear_triggers_sqlite, migrations.RunPython.noop),
+    ]
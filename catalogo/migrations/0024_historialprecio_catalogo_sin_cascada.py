@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0023_stockcatalogo_cantidad_no_negativa'),
+    ]
+
+    operations = [
+        # El historial es de solo inserción: borrar un catálogo ya no borra sus precios
+        migrations.AlterField(
+            model_name='historialprecio',
+            name='catalogo',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='historial_precios', to='catalogo.catalogo'),
+        ),
+    ]
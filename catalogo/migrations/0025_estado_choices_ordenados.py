@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0024_historialprecio_catalogo_sin_cascada'),
+    ]
+
+    operations = [
+        # Los choices eran sets: su orden cambiaba entre procesos y makemigrations nunca quedaba limpio
+        migrations.AlterField(
+            model_name='catalogo',
+            name='estado',
+            field=models.CharField(choices=[('activo', 'Activo'), ('inactivo', 'Inactivo')], default='activo', max_length=15),
+        ),
+        migrations.AlterField(
+            model_name='producto',
+            name='estado',
+            field=models.CharField(choices=[('disponible', 'Disponible'), ('reservado', 'Reservado'), ('vendido', 'Vendido'), ('en_reparacion', 'En Reparación'), ('dado_de_baja', 'Dado de Baja')], default='disponible', max_length=15),
+        ),
+        migrations.AlterField(
+            model_name='stockcatalogo',
+            name='estado',
+            field=models.CharField(choices=[('disponible', 'Disponible'), ('reservado', 'Reservado'), ('vendido', 'Vendido'), ('en_reparacion', 'En Reparación'), ('dado_de_baja', 'Dado de Baja')], max_length=15),
+        ),
+    ]
@@ -1,6 +1,21 @@
-from django.db import models
+import logging
+
+from django.conf import settings
+from django.db import models, transaction
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models import F
 from django.utils import timezone
 from datetime import timedelta
+from collections import Counter
+
+from administracion.core.cache import incrementar_version
+
+logger = logging.getLogger(__name__)
+
+
+def duracion_garantia(meses):
+    """Duración de la garantía (aproximada: 30 días por mes)."""
+    return timedelta(days=meses * 30)
 
 # Create your models here.
 class Marca(models.Model):
@@ -25,15 +40,43 @@ class Categoria(models.Model):
         verbose_name_plural = 'Categorías'
         ordering = ['nombre']
 
+class ImagenMedia(models.Model):
+    """
+    Imagen original direccionada por contenido (SHA-256) con sus derivadas de tamaño fijo.
+    Ver catalogo/media.py.
+    """
+    hash = models.CharField(max_length=64, unique=True)
+    url_original = models.URLField(max_length=500)
+    url_miniatura = models.URLField(max_length=500)
+    url_mediana = models.URLField(max_length=500)
+    ancho = models.PositiveIntegerField()
+    alto = models.PositiveIntegerField()
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.hash[:12]} ({self.ancho}x{self.alto})'
+
+    class Meta:
+        verbose_name = 'Imagen'
+        verbose_name_plural = 'Imágenes'
+
 class Catalogo(models.Model):
-    CHOICE_ESTADO = {
+    CHOICE_ESTADO = [
         ('activo', 'Activo'),
         ('inactivo', 'Inactivo'),
-    }
+    ]
+    CHOICE_IMAGEN_ESTADO = [
+        ('sin_imagen', 'Sin imagen'),
+        ('pendiente', 'Pendiente de subir'),
+        ('lista', 'Lista'),
+        ('error', 'Error al subir'),
+    ]
     sku = models.CharField(max_length=50, unique=True, db_index=True)
     nombre = models.CharField(max_length=100, unique=True)
     descripcion = models.TextField(null=True, blank=True)
     imagen_url = models.URLField(null=True, blank=True)
+    imagen_estado = models.CharField(max_length=15, choices=CHOICE_IMAGEN_ESTADO, default='sin_imagen')
+    imagen = models.ForeignKey(ImagenMedia, on_delete=models.SET_NULL, null=True, blank=True, related_name='catalogos')
     precio = models.DecimalField(max_digits=10, decimal_places=2)
     meses_garantia = models.PositiveIntegerField(default=12)
     modelo = models.CharField(max_length=100, null=True, blank=True)
@@ -41,61 +84,381 @@ class Catalogo(models.Model):
     categoria = models.ForeignKey(Categoria, on_delete=models.SET_NULL, null=True, blank=True, related_name='catalogos')
     estado = models.CharField(max_length=15, choices=CHOICE_ESTADO, default='activo')
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Los UPDATE masivos (precios, imágenes) la asignan a mano; la usa catalogo/snapshot.py
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_index=True)
+    # Unidades vendidas con decaimiento exponencial; la recalcula `manage.py actualizar_popularidad`
+    popularidad = models.FloatField(default=0, editable=False)
+    # Mantenido por trigger en PostgreSQL (ver migración 0011); NULL en otros motores
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return f'{self.nombre} ({self.sku})'
     
     @property
     def stock_disponible(self):
-        return self.productos.filter(estado='disponible').count()
+        """
+        Lee el contador desnormalizado (StockCatalogo) en lugar de contar Productos.
+        Si la consulta hizo prefetch_related('contadores_stock') no genera queries extra.
+        """
+        return sum(c.cantidad for c in self.contadores_stock.all() if c.estado == 'disponible')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'meses_garantia' in instance.__dict__:
+            instance._meses_garantia_original = instance.meses_garantia
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Si cambian los meses de garantía, recalcula Producto.fecha_fin_garantia
+        de los ítems vendidos en la misma transacción.
+        """
+        original = getattr(self, '_meses_garantia_original', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if original is not None and original != self.meses_garantia:
+                Producto.actualizar_fin_garantia([self.pk])
+        self._meses_garantia_original = self.meses_garantia
 
     class Meta:
         verbose_name = 'Catálogo de Producto'
         verbose_name_plural = 'Catálogos de Productos'
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['-fecha_creacion']),
+            # ?ordering=(-)popularidad / (-)precio con desempate por id (ver CursorPaginacion)
+            models.Index(fields=['popularidad', 'id'], name='catalogo_popularidad_id'),
+            models.Index(fields=['precio', 'id'], name='catalogo_precio_id'),
+        ]
 
 class Producto(models.Model):
-    CHOICE_ESTADO = {
+    CHOICE_ESTADO = [
         ('disponible', 'Disponible'),
         ('reservado', 'Reservado'),  
         ('vendido', 'Vendido'),       
         ('en_reparacion', 'En Reparación'), 
         ('dado_de_baja', 'Dado de Baja'), 
-    }
+    ]
     numero_serie = models.CharField(max_length=100, unique=True, db_index=True)
     costo = models.DecimalField(max_digits=10, decimal_places=2)
     estado = models.CharField(max_length=15, choices=CHOICE_ESTADO, default='disponible')
     fecha_ingreso = models.DateTimeField(auto_now_add=True) 
     catalogo = models.ForeignKey(Catalogo, on_delete=models.CASCADE, related_name='productos', db_column='Catalogo_id')
     fecha_venta = models.DateTimeField(null=True, blank=True)
+    # fecha_venta + meses de garantía del catálogo; se guarda para poder filtrar/ordenar en SQL
+    fecha_fin_garantia = models.DateTimeField(null=True, blank=True, editable=False)
 
     def __str__(self):
         return f'N/S: {self.numero_serie} - {self.catalogo.nombre}'
+
+    @classmethod
+    def actualizar_fin_garantia(cls, catalogo_ids):
+        """
+        Recalcula fecha_fin_garantia de los ítems vendidos de esos catálogos
+        (un UPDATE por cada valor distinto de meses_garantia).
+        """
+        por_meses = {}
+        for catalogo_id, meses in Catalogo.objects.filter(pk__in=catalogo_ids).values_list('id', 'meses_garantia'):
+            por_meses.setdefault(meses, []).append(catalogo_id)
+        for meses, ids in por_meses.items():
+            cls.objects.filter(catalogo_id__in=ids, fecha_venta__isnull=False).update(
+                fecha_fin_garantia=F('fecha_venta') + duracion_garantia(meses)
+            )
+
+    def calcular_fin_garantia(self):
+        if self.fecha_venta is None:
+            return None
+        return self.fecha_venta + duracion_garantia(self.catalogo.meses_garantia)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guardamos (catalogo, estado) tal como están en la BD para poder
+        # mover el contador de stock correcto al guardar o eliminar.
+        if 'catalogo_id' in instance.__dict__ and 'estado' in instance.__dict__:
+            instance._stock_original = (instance.catalogo_id, instance.estado)
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Guarda el ítem y ajusta StockCatalogo en la misma transacción.
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'fecha_venta' in update_fields:
+            self.fecha_fin_garantia = self.calcular_fin_garantia()
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = [*update_fields, 'fecha_fin_garantia']
+        if update_fields is not None and not {'estado', 'catalogo', 'catalogo_id'} & set(update_fields):
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            original = getattr(self, '_stock_original', None)
+            if original is None and not self._state.adding:
+                # Instancia cargada con campos diferidos: leemos el valor actual de la BD
+                original = Producto.objects.filter(pk=self.pk).values_list('catalogo_id', 'estado').first()
+            super().save(*args, **kwargs)
+
+            actual = (self.catalogo_id, self.estado)
+            if original != actual:
+                deltas = Counter({actual: 1})
+                if original:
+                    deltas[original] -= 1
+                StockCatalogo.ajustar(deltas)
+            self._stock_original = actual
+
+    def delete(self, *args, **kwargs):
+        """
+        Elimina el ítem y descuenta su unidad de StockCatalogo en la misma transacción.
+        """
+        with transaction.atomic():
+            original = getattr(self, '_stock_original', None) or (self.catalogo_id, self.estado)
+            resultado = super().delete(*args, **kwargs)
+            StockCatalogo.ajustar({original: -1})
+        return resultado
     
     @property
     def garantia_vigente(self):
         """
         Devuelve True si el producto está vendido y aún dentro del periodo de garantía.
         """
-        if self.estado == 'vendido' and self.fecha_venta:
-            # Obtenemos los meses de garantía desde el catálogo relacionado
-            meses = self.catalogo.meses_garantia
-            # Calculamos la fecha de expiración (aproximada, sumando días)
-            fecha_expiracion = self.fecha_venta + timedelta(days=meses*30)
-            
-            return timezone.now() <= fecha_expiracion
+        if self.estado == 'vendido' and self.fecha_fin_garantia:
+            return timezone.now() <= self.fecha_fin_garantia
         return False
-    
-    @property
-    def fecha_fin_garantia(self):
-        """
-        Devuelve la fecha exacta en que termina la garantía.
-        """
-        if self.fecha_venta:
-            return self.fecha_venta + timedelta(days=self.catalogo.meses_garantia*30)
-        return None
 
     class Meta:
         verbose_name = 'Ítem de Producto (Serializado)'
         verbose_name_plural = 'Ítems de Productos (Serializados)'
         ordering = ['-fecha_ingreso']
+        indexes = [
+            models.Index(fields=['-fecha_ingreso']),
+            # Filtros del inventario y selección FIFO (catalogo, estado='disponible', fecha_ingreso)
+            models.Index(fields=['catalogo', 'estado', 'fecha_ingreso'], name='producto_cat_estado_fecha'),
+            models.Index(fields=['fecha_fin_garantia']),
+        ]
+
+
+class StockCatalogo(models.Model):
+    """
+    Contador desnormalizado de ítems (Producto) por catálogo y estado.
+    Se mantiene en la misma transacción que cada cambio de estado de Producto
+    y es la fuente de Catalogo.stock_disponible.
+    Reconstrucción / verificación: python manage.py sincronizar_stock [--verificar]
+    """
+    catalogo = models.ForeignKey(Catalogo, on_delete=models.CASCADE, related_name='contadores_stock')
+    estado = models.CharField(max_length=15, choices=Producto.CHOICE_ESTADO)
+    cantidad = models.IntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f'{self.catalogo_id} - {self.estado}: {self.cantidad}'
+
+    @classmethod
+    def ajustar(cls, deltas):
+        """
+        Aplica incrementos/decrementos a los contadores.
+        deltas: {(catalogo_id, estado): delta}
+        Debe llamarse dentro de la transacción que modificó los Productos.
+        Un decremento que dejaría el contador en negativo (contador desfasado o sin fila)
+        lo deja en 0 y se registra en el log; sincronizar_stock lo corrige.
+        """
+        ahora = timezone.now()
+        for (catalogo_id, estado), delta in deltas.items():
+            if not delta:
+                continue
+            contadores = cls.objects.filter(catalogo_id=catalogo_id, estado=estado)
+            if delta < 0:
+                contadores = contadores.filter(cantidad__gte=-delta)
+            if contadores.update(cantidad=F('cantidad') + delta, actualizado=ahora):
+                continue
+            contador, creado = cls.objects.get_or_create(
+                catalogo_id=catalogo_id, estado=estado, defaults={'cantidad': max(delta, 0)}
+            )
+            if creado and delta > 0:
+                continue
+            if delta > 0:
+                cls.objects.filter(pk=contador.pk).update(cantidad=F('cantidad') + delta, actualizado=ahora)
+            else:
+                cls.objects.filter(pk=contador.pk).update(cantidad=0, actualizado=ahora)
+                logger.warning(
+                    f"⚠️ Contador de stock desfasado ({catalogo_id}, {estado}): delta {delta} sobre "
+                    f"{0 if creado else contador.cantidad}; se deja en 0 (ejecutar sincronizar_stock)"
+                )
+        # Solo stock_disponible forma parte de las respuestas cacheadas del catálogo: los demás
+        # estados (reservado -> vendido, en_reparacion, ...) no invalidan la caché
+        if any(delta for (_, estado), delta in deltas.items() if estado == 'disponible'):
+            incrementar_version('catalogo')
+
+    class Meta:
+        verbose_name = 'Contador de Stock'
+        verbose_name_plural = 'Contadores de Stock'
+        unique_together = ('catalogo', 'estado')
+        constraints = [
+            models.CheckConstraint(condition=models.Q(cantidad__gte=0), name='stockcatalogo_cantidad_no_negativa'),
+        ]
+
+
+class HistorialPrecio(models.Model):
+    """
+    Historial de precios del catálogo (solo se insertan filas, nunca se editan ni borran).
+    Cada fila es el precio vigente desde `vigente_desde` hasta la siguiente fila del mismo
+    catálogo; el índice (catalogo, vigente_desde) resuelve "precio a tal fecha" con un
+    recorrido de rango. Ver catalogo/precios.py.
+    """
+    CHOICE_ORIGEN = [
+        ('inicial', 'Precio inicial (migración)'),
+        ('creacion', 'Creación'),
+        ('edicion', 'Edición'),
+        ('importacion', 'Importación'),
+        ('ajuste_masivo', 'Ajuste masivo'),
+    ]
+    # Sin CASCADE ni FK en la base: el historial sobrevive a la eliminación del catálogo
+    catalogo = models.ForeignKey(
+        Catalogo, on_delete=models.DO_NOTHING, db_constraint=False, related_name='historial_precios'
+    )
+    precio = models.DecimalField(max_digits=10, decimal_places=2)
+    vigente_desde = models.DateTimeField(default=timezone.now)
+    origen = models.CharField(max_length=15, choices=CHOICE_ORIGEN)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='cambios_precio')
+
+    def __str__(self):
+        return f'{self.catalogo_id}: {self.precio} desde {self.vigente_desde:%Y-%m-%d %H:%M}'
+
+    @classmethod
+    def registrar(cls, precios, origen, usuario=None, fecha=None):
+        """
+        Inserta en un solo bulk_create el precio vigente de varios catálogos.
+        precios: [(catalogo_id, precio), ...]
+        """
+        fecha = fecha or timezone.now()
+        usuario_id = usuario.pk if usuario is not None and usuario.is_authenticated else None
+        return cls.objects.bulk_create([
+            cls(catalogo_id=catalogo_id, precio=precio, vigente_desde=fecha, origen=origen, usuario_id=usuario_id)
+            for catalogo_id, precio in precios
+        ], batch_size=1000)
+
+    class Meta:
+        verbose_name = 'Historial de Precio'
+        verbose_name_plural = 'Historial de Precios'
+        ordering = ['catalogo', '-vigente_desde']
+        # Solo alta y consulta: el historial no se modifica
+        default_permissions = ('add', 'view')
+        indexes = [
+            models.Index(fields=['catalogo', 'vigente_desde'], name='historial_precio_cat_fecha'),
+        ]
+
+
+class CambioCatalogo(models.Model):
+    """
+    Registro de altas, modificaciones y bajas de Catalogo y Producto para la sincronización
+    incremental de clientes (GET /api/catalogo/changes/, ver catalogo/cambios.py).
+    Lo llenan triggers de la base de datos (migración 0020), así que también registra los
+    bulk_create / UPDATE masivos. Los cambios de StockCatalogo se registran como
+    modificación del catálogo porque cambian su stock_disponible.
+    """
+    CHOICE_ENTIDAD = [
+        ('catalogo', 'Catálogo'),
+        ('producto', 'Producto'),
+    ]
+    CHOICE_OPERACION = [
+        ('alta', 'Alta'),
+        ('modificacion', 'Modificación'),
+        ('baja', 'Baja'),
+    ]
+    entidad = models.CharField(max_length=10, choices=CHOICE_ENTIDAD)
+    objeto_id = models.BigIntegerField()
+    operacion = models.CharField(max_length=15, choices=CHOICE_OPERACION)
+    # Id de la transacción que hizo el cambio (txid_current() en PostgreSQL, 0 en SQLite)
+    transaccion = models.BigIntegerField(default=0)
+    fecha = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.entidad} {self.objeto_id}: {self.operacion}'
+
+    class Meta:
+        verbose_name = 'Cambio de Catálogo'
+        verbose_name_plural = 'Cambios de Catálogo'
+        ordering = ['transaccion', 'id']
+        indexes = [
+            # Orden del cursor de sincronización
+            models.Index(fields=['transaccion', 'id'], name='cambio_catalogo_cursor'),
+        ]
+
+
+class EliminacionCatalogo(models.Model):
+    """
+    Eliminación en segundo plano de un catálogo: sus ítems (Producto) se borran por lotes
+    y al final el propio catálogo. Ver catalogo/eliminacion.py.
+    """
+    CHOICE_ESTADO = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completada', 'Completada'),
+        ('fallida', 'Fallida'),
+    ]
+    # Sin FK: el catálogo deja de existir al terminar y el registro queda como historial
+    catalogo_id = models.BigIntegerField(db_index=True)
+    sku = models.CharField(max_length=50)
+    nombre = models.CharField(max_length=100)
+    estado = models.CharField(max_length=15, choices=CHOICE_ESTADO, default='pendiente')
+    total_productos = models.PositiveIntegerField(default=0)
+    productos_eliminados = models.PositiveIntegerField(default=0)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='eliminaciones_catalogo')
+    ultimo_error = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'Eliminación de {self.sku} ({self.estado}, {self.productos_eliminados}/{self.total_productos})'
+
+    @property
+    def progreso(self):
+        """Porcentaje de ítems eliminados (100 al completar)."""
+        if self.estado == 'completada':
+            return 100
+        if not self.total_productos:
+            return 0
+        return min(99, round(self.productos_eliminados * 100 / self.total_productos))
+
+    class Meta:
+        verbose_name = 'Eliminación de Catálogo'
+        verbose_name_plural = 'Eliminaciones de Catálogo'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_actualizacion']),
+        ]
+
+
+class SubidaImagen(models.Model):
+    """
+    Subida de imagen en cola: el archivo queda en el spool local y un worker
+    (catalogo/imagenes.py) lo envía al backend de almacenamiento con reintentos.
+    """
+    CHOICE_ESTADO = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completada', 'Completada'),
+        ('fallida', 'Fallida'),
+    ]
+    catalogo = models.ForeignKey(Catalogo, on_delete=models.CASCADE, related_name='subidas_imagen')
+    archivo = models.CharField(max_length=255)  # Ruta dentro del spool
+    hash = models.CharField(max_length=64, blank=True)  # SHA-256 calculado al copiar al spool
+    nombre_original = models.CharField(max_length=255, blank=True)
+    estado = models.CharField(max_length=15, choices=CHOICE_ESTADO, default='pendiente')
+    intentos = models.PositiveIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Imagen de {self.catalogo_id} ({self.estado}, intentos: {self.intentos})'
+
+    class Meta:
+        verbose_name = 'Subida de Imagen'
+        verbose_name_plural = 'Subidas de Imágenes'
+        ordering = ['proximo_intento']
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento']),
+        ]
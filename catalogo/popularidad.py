@@ -0,0 +1,67 @@
+"""
+Puntaje de popularidad del Catálogo (más vendidos).
+
+popularidad = Σ unidades vendidas en el día d × 0.5 ^ (días desde d / vida media)
+
+Solo cuentan las ventas completadas de los últimos CATALOGO_POPULARIDAD_VENTANA_DIAS días.
+Se calcula con una consulta agrupada por (catálogo, día) y se guarda en Catalogo.popularidad
+(indexada), así ?ordering=-popularidad no agrega DetalleVenta en cada petición.
+Se recalcula periódicamente con `python manage.py actualizar_popularidad` (cron).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from administracion.core.cache import incrementar_version
+from catalogo.models import Catalogo
+from ventas.models import DetalleVenta
+
+
+def calcular_popularidad(ahora=None):
+    """Devuelve {catalogo_id: puntaje} de los catálogos con ventas dentro de la ventana."""
+    ahora = ahora or timezone.now()
+    hoy = timezone.localdate(ahora)
+    vida_media = settings.CATALOGO_POPULARIDAD_VIDA_MEDIA_DIAS
+    ventas_por_dia = (
+        DetalleVenta.objects.filter(
+            venta__estado='completada',
+            venta__fecha__gte=ahora - timedelta(days=settings.CATALOGO_POPULARIDAD_VENTANA_DIAS),
+        )
+        .annotate(dia=TruncDate('venta__fecha'))
+        .values('catalogo_id', 'dia')
+        .annotate(unidades=Sum('cantidad'))
+        .order_by()
+    )
+    puntajes = {}
+    for fila in ventas_por_dia:
+        edad = max((hoy - fila['dia']).days, 0)
+        puntajes[fila['catalogo_id']] = puntajes.get(fila['catalogo_id'], 0) + fila['unidades'] * 0.5 ** (edad / vida_media)
+    return {catalogo_id: round(puntaje, 4) for catalogo_id, puntaje in puntajes.items()}
+
+
+def actualizar_popularidad(ahora=None):
+    """
+    Guarda los puntajes; solo escribe las filas cuyo valor cambió (bulk_update por lotes).
+    Devuelve {'con_ventas': int, 'actualizados': int}.
+    """
+    puntajes = calcular_popularidad(ahora)
+    # Valores actuales de los que tienen puntaje guardado o nuevo
+    actuales = dict(Catalogo.objects.filter(popularidad__gt=0).values_list('id', 'popularidad'))
+    nuevos = [id_ for id_ in puntajes if id_ not in actuales]
+    actuales.update(Catalogo.objects.filter(pk__in=nuevos).values_list('id', 'popularidad'))
+
+    # bulk_update no aplica auto_now: fecha_actualizacion se pone a mano (la usa el snapshot incremental)
+    modificado = timezone.now()
+    cambios = [
+        Catalogo(pk=id_, popularidad=puntajes.get(id_, 0), fecha_actualizacion=modificado)
+        for id_, actual in actuales.items() if puntajes.get(id_, 0) != actual
+    ]
+    with transaction.atomic():
+        Catalogo.objects.bulk_update(cambios, ['popularidad', 'fecha_actualizacion'], batch_size=1000)
+        if cambios:
+            incrementar_version('catalogo')
+    return {'con_ventas': len(puntajes), 'actualizados': len(cambios)}
@@ -0,0 +1,72 @@
+"""
+Ajuste masivo de precios e historial (HistorialPrecio).
+
+El ajuste por porcentaje se aplica con un único UPDATE ... SET precio = ROUND(precio * factor, 2)
+sobre los catálogos filtrados, con el tope del campo en el WHERE; los precios resultantes se
+leen en la misma transacción y se insertan en el historial con un solo bulk_create. El precio
+vigente a una fecha se resuelve con el índice (catalogo, vigente_desde): la última fila con
+vigente_desde <= fecha.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from administracion.core.cache import incrementar_version
+from catalogo.models import Catalogo, HistorialPrecio
+
+PRECIO_MAXIMO = Decimal('100000000')  # max_digits=10, decimal_places=2
+
+
+class AjusteFueraDeRango(Exception):
+    """El ajuste dejaría algún precio fuera del rango del campo."""
+
+
+def ajustar_precios(porcentaje, categoria_id=None, marca_id=None, usuario=None):
+    """
+    Sube o baja en `porcentaje` (ej: 8 o -5.5) el precio de los catálogos de una categoría
+    y/o marca. Devuelve {'actualizados': int, 'porcentaje': Decimal, 'vigente_desde': datetime}.
+    """
+    filtros = {}
+    if categoria_id:
+        filtros['categoria_id'] = categoria_id
+    if marca_id:
+        filtros['marca_id'] = marca_id
+    if not filtros:
+        raise ValueError('Se requiere categoría o marca')
+
+    factor = 1 + Decimal(porcentaje) / 100
+    ahora = timezone.now()
+    queryset = Catalogo.objects.filter(**filtros)
+
+    with transaction.atomic():
+        total = queryset.count()
+        # El tope va en el WHERE del propio UPDATE: se evalúa sobre el precio vigente de cada
+        # fila al actualizarla, así que un cambio concurrente no puede desbordar el campo
+        nuevo_precio = Round(F('precio') * factor, 2)
+        actualizados = (
+            queryset.alias(nuevo_precio=nuevo_precio).filter(nuevo_precio__lt=PRECIO_MAXIMO)
+            .update(precio=nuevo_precio, fecha_actualizacion=ahora)
+        )
+        if actualizados != total:
+            # Se revierte todo el ajuste: o cambian todos los precios o ninguno
+            raise AjusteFueraDeRango(f'{total - actualizados} precio(s) quedarían fuera de rango')
+        if actualizados:
+            HistorialPrecio.registrar(
+                queryset.values_list('id', 'precio').iterator(), 'ajuste_masivo', usuario=usuario, fecha=ahora,
+            )
+            incrementar_version('catalogo')
+
+    return {'actualizados': actualizados, 'porcentaje': Decimal(porcentaje), 'vigente_desde': ahora}
+
+
+def precio_vigente(catalogo_id, fecha):
+    """Precio del catálogo a esa fecha (None si es anterior a su primer registro)."""
+    return (
+        HistorialPrecio.objects.filter(catalogo_id=catalogo_id, vigente_desde__lte=fecha)
+        .order_by('-vigente_desde', '-id')
+        .values_list('precio', flat=True)
+        .first()
+    )
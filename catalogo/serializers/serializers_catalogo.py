@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from catalogo.models import Categoria, Marca, Catalogo
+from catalogo.models import Categoria, Marca, Catalogo, HistorialPrecio, EliminacionCatalogo
 
 class CategoriaSerializer(serializers.ModelSerializer):
     class Meta:
@@ -18,14 +18,55 @@ class CatalogoSerializer(serializers.ModelSerializer):
     categoria_id = serializers.PrimaryKeyRelatedField(queryset=Categoria.objects.all(), source='categoria', write_only=True, allow_null=True, required=False)
     
     stock_disponible = serializers.SerializerMethodField()
+    # Derivadas de la imagen (ver catalogo/media.py); null mientras no exista ImagenMedia
+    imagen_miniatura_url = serializers.URLField(source='imagen.url_miniatura', read_only=True, default=None)
+    imagen_mediana_url = serializers.URLField(source='imagen.url_mediana', read_only=True, default=None)
 
     class Meta:
         model = Catalogo
 
-        fields = ['id', 'sku', 'nombre', 'descripcion', 'imagen_url', 'precio',
+        fields = ['id', 'sku', 'nombre', 'descripcion', 'imagen_url', 'imagen_miniatura_url',
+                'imagen_mediana_url', 'imagen_estado', 'precio',
                 'meses_garantia', 'modelo', 'marca', 'categoria', 'estado',
-                'stock_disponible', 'fecha_creacion', 'marca_id', 'categoria_id']
-        read_only_fields = ['fecha_creacion', 'marca', 'categoria', 'stock_disponible'] 
+                'stock_disponible', 'popularidad', 'fecha_creacion', 'marca_id', 'categoria_id']
+        read_only_fields = ['fecha_creacion', 'marca', 'categoria', 'stock_disponible', 'imagen_estado', 'popularidad'] 
 
     def get_stock_disponible(self, obj):
         return obj.stock_disponible
+
+
+class HistorialPrecioSerializer(serializers.ModelSerializer):
+    usuario = serializers.CharField(source='usuario.username', read_only=True, default=None)
+
+    class Meta:
+        model = HistorialPrecio
+        fields = ['id', 'catalogo', 'precio', 'vigente_desde', 'origen', 'usuario']
+
+
+class AjustePreciosSerializer(serializers.Serializer):
+    """Ajuste porcentual de precios por categoría y/o marca (ver catalogo/precios.py)."""
+    porcentaje = serializers.DecimalField(max_digits=7, decimal_places=2)
+    categoria_id = serializers.PrimaryKeyRelatedField(queryset=Categoria.objects.all(), required=False)
+    marca_id = serializers.PrimaryKeyRelatedField(queryset=Marca.objects.all(), required=False)
+
+    def validate_porcentaje(self, value):
+        if value == 0:
+            raise serializers.ValidationError("El porcentaje no puede ser 0")
+        if value <= -100:
+            raise serializers.ValidationError("El porcentaje debe ser mayor a -100")
+        return value
+
+    def validate(self, data):
+        if not data.get('categoria_id') and not data.get('marca_id'):
+            raise serializers.ValidationError("Debe indicar categoria_id y/o marca_id")
+        return data
+
+
+class EliminacionCatalogoSerializer(serializers.ModelSerializer):
+    usuario = serializers.CharField(source='usuario.username', read_only=True, default=None)
+    progreso = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = EliminacionCatalogo
+        fields = ['id', 'catalogo_id', 'sku', 'nombre', 'estado', 'total_productos', 'productos_eliminados',
+                  'progreso', 'ultimo_error', 'usuario', 'fecha_creacion', 'fecha_actualizacion', 'fecha_fin']
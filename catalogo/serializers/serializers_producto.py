@@ -1,10 +1,18 @@
+import csv
+import io
+
+from django.conf import settings
 from rest_framework import serializers
 from catalogo.models import Catalogo, Producto
+from catalogo.inventario import TRANSICIONES_PERMITIDAS
 
 class CatalogoAuxSerializer(serializers.ModelSerializer): 
+    imagen_miniatura_url = serializers.URLField(source='imagen.url_miniatura', read_only=True, default=None)
+    imagen_mediana_url = serializers.URLField(source='imagen.url_mediana', read_only=True, default=None)
+
     class Meta:
         model = Catalogo
-        fields = ['id', 'sku', 'nombre', 'imagen_url', 'precio',
+        fields = ['id', 'sku', 'nombre', 'imagen_url', 'imagen_miniatura_url', 'imagen_mediana_url', 'precio',
                 'meses_garantia', 'modelo', 'marca', 'categoria', 'estado',
                 'fecha_creacion']
 
@@ -19,3 +27,73 @@ class ProductoSerializer(serializers.ModelSerializer):
         fields = ['id', 'numero_serie', 'costo', 'fecha_venta','garantia_vigente',
                 'fecha_fin_garantia','estado', 'fecha_ingreso',
                 'catalogo', 'catalogo_id']
+
+
+class IngresoProductosSerializer(serializers.Serializer):
+    """
+    Entrada del ingreso masivo de inventario: los números de serie llegan como lista
+    o como archivo de texto/CSV (un número por línea, primera columna).
+    """
+    catalogo_id = serializers.PrimaryKeyRelatedField(queryset=Catalogo.objects.all(), source='catalogo')
+    costo = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    numeros_serie = serializers.ListField(
+        child=serializers.CharField(max_length=100, allow_blank=True), required=False,
+        max_length=settings.CATALOGO_INGRESO_MAX_ITEMS,
+    )
+    archivo = serializers.FileField(required=False)
+
+    def validate(self, data):
+        if not data.get('numeros_serie') and not data.get('archivo'):
+            raise serializers.ValidationError("Debe enviar 'numeros_serie' o un 'archivo'")
+        if data.get('archivo'):
+            data['numeros_serie'] = data.get('numeros_serie', []) + self.leer_archivo(data.pop('archivo'))
+            if len(data['numeros_serie']) > settings.CATALOGO_INGRESO_MAX_ITEMS:
+                raise serializers.ValidationError(
+                    f"Máximo {settings.CATALOGO_INGRESO_MAX_ITEMS} números de serie por ingreso"
+                )
+        largos = [numero for numero in data['numeros_serie'] if len(numero.strip()) > 100]
+        if largos:
+            raise serializers.ValidationError({'numeros_serie': f"Máximo 100 caracteres: {largos[:5]}"})
+        return data
+
+    def leer_archivo(self, archivo):
+        try:
+            lector = csv.reader(io.TextIOWrapper(archivo.file, encoding='utf-8-sig', newline=''))
+            series = [fila[0] for fila in lector if fila]
+        except UnicodeDecodeError:
+            raise serializers.ValidationError({'archivo': "El archivo debe estar en UTF-8"})
+        # Encabezado opcional
+        if series and series[0].strip().lower() in ('numero_serie', 'numeros_serie', 'serie'):
+            series = series[1:]
+        return series
+
+
+class CambioEstadoMasivoSerializer(serializers.Serializer):
+    """
+    Entrada del cambio de estado masivo: lista de números de serie y/o filtros.
+    Se exige al menos un criterio para no actualizar todo el inventario por error.
+    """
+    estado = serializers.ChoiceField(choices=sorted(TRANSICIONES_PERMITIDAS))
+    numeros_serie = serializers.ListField(
+        child=serializers.CharField(max_length=100), required=False,
+        max_length=settings.CATALOGO_INGRESO_MAX_ITEMS,
+    )
+    catalogo_id = serializers.IntegerField(required=False)
+    fecha_desde = serializers.DateTimeField(required=False)
+    fecha_hasta = serializers.DateTimeField(required=False)
+    estado_actual = serializers.ChoiceField(choices=sorted(dict(Producto.CHOICE_ESTADO)), required=False)
+
+    def validate(self, data):
+        criterios = ('numeros_serie', 'catalogo_id', 'fecha_desde', 'fecha_hasta', 'estado_actual')
+        if not any(data.get(campo) for campo in criterios):
+            raise serializers.ValidationError(
+                "Debe indicar 'numeros_serie' o al menos un filtro (catalogo_id, fecha_desde, fecha_hasta, estado_actual)"
+            )
+        return data
+
+
+class ConsultaSeriesSerializer(serializers.Serializer):
+    numeros_serie = serializers.ListField(
+        child=serializers.CharField(max_length=100), allow_empty=False,
+        max_length=settings.CATALOGO_CONSULTA_MAX_SERIES,
+    )
@@ -0,0 +1,297 @@
+"""
+Snapshot estático del catálogo para la tienda pública.
+
+Escribe en CATALOGO_SNAPSHOT_DIR archivos JSON comprimidos con gzip que el frontend lee
+directamente del disco o de un CDN, sin pasar por Django:
+
+    indice.json.gz            categorías (archivo y total de cada una), marcas y fecha de generación
+    categoria-<id>.json.gz    catálogos activos de esa categoría ('categoria-sin.json.gz' sin categoría)
+    catalogo.json.gz          todo en un solo archivo si CATALOGO_SNAPSHOT_POR_CATEGORIA=False
+
+Cada entrada lleva solo lo que muestra la tienda: id, sku, nombre, modelo, precio, marca_id,
+meses_garantia, imágenes, stock disponible y popularidad (para ordenar por más vendidos). El servidor web debe entregarlos con
+Content-Type: application/json y Content-Encoding: gzip (en desarrollo se sirven bajo MEDIA_URL).
+
+La regeneración es incremental: manifiesto.json guarda hasta cuándo se generó y en qué archivo
+quedó cada catálogo. La corrida siguiente solo consulta los catálogos con fecha_actualizacion o
+contador de stock posteriores (y los eliminados) y reescribe únicamente los archivos afectados.
+Las escrituras que no pasan por Catalogo.save() (UPDATE masivos, bulk_update, el SET_NULL al
+borrar una categoría o marca) deben actualizar fecha_actualizacion para que se detecten.
+Se dispara tras el commit de cada cambio del catálogo (señal version_incrementada) en un hilo
+(CATALOGO_SNAPSHOT_MODO='hilo') o con `python manage.py generar_snapshot` (cron / a demanda).
+"""
+import gzip
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from catalogo.models import Catalogo, Categoria, Marca, StockCatalogo
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se evita la concurrencia entre hilos del mismo proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFIESTO = 'manifiesto.json'
+INDICE = 'indice.json.gz'
+BLOQUE = 1000
+
+
+def directorio_snapshot():
+    ruta = Path(settings.CATALOGO_SNAPSHOT_DIR)
+    ruta.mkdir(parents=True, exist_ok=True)
+    return ruta
+
+
+def archivo_de(categoria_id):
+    if not settings.CATALOGO_SNAPSHOT_POR_CATEGORIA:
+        return 'catalogo.json.gz'
+    return f'categoria-{categoria_id or "sin"}.json.gz'
+
+
+def consultar_entradas(queryset):
+    """Genera (categoria_id, entrada) de los catálogos activos del queryset, sin instanciar modelos."""
+    stock = StockCatalogo.objects.filter(catalogo=OuterRef('pk'), estado='disponible').values('cantidad')[:1]
+    filas = (
+        queryset.filter(estado='activo')
+        .annotate(stock=Coalesce(Subquery(stock), Value(0)))
+        .values(
+            'id', 'sku', 'nombre', 'modelo', 'precio', 'marca_id', 'categoria_id', 'meses_garantia',
+            'imagen_url', 'imagen__url_miniatura', 'imagen__url_mediana', 'stock', 'popularidad',
+        )
+        .order_by()
+    )
+    for fila in filas.iterator(chunk_size=BLOQUE):
+        yield fila['categoria_id'], {
+            'id': fila['id'],
+            'sku': fila['sku'],
+            'nombre': fila['nombre'],
+            'modelo': fila['modelo'],
+            'precio': str(fila['precio']),
+            'marca_id': fila['marca_id'],
+            'meses_garantia': fila['meses_garantia'],
+            'imagen_url': fila['imagen_url'],
+            'imagen_miniatura_url': fila['imagen__url_miniatura'],
+            'imagen_mediana_url': fila['imagen__url_mediana'],
+            'stock_disponible': fila['stock'],
+            'popularidad': fila['popularidad'],
+        }
+
+
+def escribir_gzip(ruta, datos):
+    """Escribe a un temporal y lo renombra: quien lee nunca ve un archivo a medias."""
+    temporal = ruta.with_name(f'.{ruta.name}.tmp')
+    with open(temporal, 'wb') as archivo:
+        # mtime=0: mismo contenido, mismos bytes (ETag estable en el CDN)
+        with gzip.GzipFile(filename='', mode='wb', fileobj=archivo, mtime=0) as comprimido:
+            comprimido.write(json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    os.replace(temporal, ruta)
+
+
+def leer_gzip(ruta):
+    with gzip.open(ruta, 'rb') as archivo:
+        return json.loads(archivo.read())
+
+
+def leer_manifiesto(directorio):
+    try:
+        manifiesto = json.loads((directorio / MANIFIESTO).read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return None
+    manifiesto['ubicacion'] = {int(id_): archivo for id_, archivo in manifiesto['ubicacion'].items()}
+    return manifiesto
+
+
+_bloqueo_hilos = threading.Lock()
+
+
+@contextmanager
+def _bloqueo(directorio):
+    """Una sola regeneración a la vez sobre el directorio (hilos y, en POSIX, procesos)."""
+    with _bloqueo_hilos, open(directorio / '.lock', 'w') as archivo:
+        if fcntl:
+            fcntl.flock(archivo, fcntl.LOCK_EX)
+        yield
+
+
+def generar_snapshot(completo=False):
+    """
+    Regenera el snapshot; incremental salvo que `completo` sea True, no exista manifiesto
+    o haya cambiado la forma de particionar. Devuelve un resumen de lo escrito.
+    """
+    directorio = directorio_snapshot()
+    with _bloqueo(directorio):
+        inicio = timezone.now()
+        manifiesto = leer_manifiesto(directorio)
+        if (
+            manifiesto is None
+            or manifiesto.get('por_categoria') != settings.CATALOGO_SNAPSHOT_POR_CATEGORIA
+            or not all((directorio / archivo).exists() for archivo in set(manifiesto['ubicacion'].values()))
+        ):
+            completo = True
+
+        if completo:
+            archivos, ubicacion, cambiados, eliminados = _reconstruir(manifiesto)
+        else:
+            archivos, ubicacion, cambiados, eliminados = _actualizar(directorio, manifiesto)
+
+        generado = inicio.isoformat()
+        for archivo, entradas in archivos.items():
+            if entradas:
+                escribir_gzip(directorio / archivo, {
+                    'generado': generado,
+                    'productos': sorted(entradas.values(), key=lambda entrada: entrada['nombre']),
+                })
+            else:
+                (directorio / archivo).unlink(missing_ok=True)
+
+        # El índice se reescribe siempre: lleva los nombres de categorías y marcas
+        escribir_gzip(directorio / INDICE, _indice(ubicacion, generado))
+        temporal = directorio / f'.{MANIFIESTO}.tmp'
+        temporal.write_text(json.dumps({
+            'hasta': generado,
+            'por_categoria': settings.CATALOGO_SNAPSHOT_POR_CATEGORIA,
+            'ubicacion': ubicacion,
+        }), encoding='utf-8')
+        os.replace(temporal, directorio / MANIFIESTO)
+
+    return {
+        'modo': 'completo' if completo else 'incremental',
+        'cambiados': cambiados,
+        'eliminados': eliminados,
+        'archivos': sorted(archivos),
+        'total': len(ubicacion),
+    }
+
+
+def _reconstruir(manifiesto):
+    archivos = {}
+    ubicacion = {}
+    for categoria_id, entrada in consultar_entradas(Catalogo.objects.all()):
+        archivo = archivo_de(categoria_id)
+        archivos.setdefault(archivo, {})[entrada['id']] = entrada
+        ubicacion[entrada['id']] = archivo
+    # Archivos de la corrida anterior que ya no tienen catálogos: se borran
+    for archivo in set((manifiesto or {}).get('ubicacion', {}).values()) - set(archivos):
+        archivos[archivo] = {}
+    return archivos, ubicacion, len(ubicacion), 0
+
+
+def _actualizar(directorio, manifiesto):
+    # Margen: una transacción larga puede confirmar cambios con fecha anterior a la última corrida
+    desde = parse_datetime(manifiesto['hasta']) - timedelta(seconds=settings.CATALOGO_SNAPSHOT_MARGEN)
+    ubicacion = manifiesto['ubicacion']
+
+    ids = set(Catalogo.objects.filter(fecha_actualizacion__gte=desde).values_list('id', flat=True))
+    ids |= set(StockCatalogo.objects.filter(actualizado__gte=desde).values_list('catalogo_id', flat=True))
+    eliminados = set(ubicacion) - set(Catalogo.objects.values_list('id', flat=True))
+
+    nuevos = {}
+    ordenados = sorted(ids)
+    for i in range(0, len(ordenados), BLOQUE):
+        for categoria_id, entrada in consultar_entradas(Catalogo.objects.filter(pk__in=ordenados[i:i + BLOQUE])):
+            nuevos[entrada['id']] = (archivo_de(categoria_id), entrada)
+
+    afectados = {ubicacion[id_] for id_ in ids | eliminados if id_ in ubicacion}
+    afectados |= {archivo for archivo, _ in nuevos.values()}
+    archivos = {}
+    for archivo in afectados:
+        ruta = directorio / archivo
+        archivos[archivo] = {entrada['id']: entrada for entrada in leer_gzip(ruta)['productos']} if ruta.exists() else {}
+
+    for id_ in ids | eliminados:
+        anterior = ubicacion.pop(id_, None)
+        if anterior:
+            archivos[anterior].pop(id_, None)
+        if id_ in nuevos:
+            archivo, entrada = nuevos[id_]
+            archivos[archivo][id_] = entrada
+            ubicacion[id_] = archivo
+    return archivos, ubicacion, len(ids), len(eliminados)
+
+
+def _indice(ubicacion, generado):
+    totales = Counter(ubicacion.values())
+    if settings.CATALOGO_SNAPSHOT_POR_CATEGORIA:
+        categorias = [
+            {'id': id_, 'nombre': nombre, 'archivo': archivo_de(id_), 'total': totales[archivo_de(id_)]}
+            for id_, nombre in Categoria.objects.values_list('id', 'nombre').order_by('nombre')
+            if totales[archivo_de(id_)]
+        ]
+        if totales[archivo_de(None)]:
+            categorias.append({'id': None, 'nombre': None, 'archivo': archivo_de(None), 'total': totales[archivo_de(None)]})
+    else:
+        categorias = [
+            {'id': id_, 'nombre': nombre}
+            for id_, nombre in Categoria.objects.values_list('id', 'nombre').order_by('nombre')
+        ]
+    return {
+        'generado': generado,
+        'total': len(ubicacion),
+        'archivos': sorted(totales),
+        'categorias': categorias,
+        'marcas': [{'id': id_, 'nombre': nombre} for id_, nombre in Marca.objects.values_list('id', 'nombre')],
+    }
+
+
+# --- Regeneración en segundo plano tras cada cambio del catálogo ---
+
+_estado_hilo = {'en_curso': False, 'pendiente': False}
+_mutex_hilo = threading.Lock()
+
+
+def marcar_catalogos_relacionados(sender, instance, **kwargs):
+    """
+    Receptor de pre_delete de Categoria y Marca: el borrado deja sus catálogos en NULL con un
+    UPDATE que no toca fecha_actualizacion; se actualiza antes para que la corrida incremental
+    los mueva de archivo / les quite la marca.
+    """
+    campo = 'categoria' if sender is Categoria else 'marca'
+    Catalogo.objects.filter(**{campo: instance}).update(fecha_actualizacion=timezone.now())
+
+
+def programar_snapshot(sender=None, recursos=(), **kwargs):
+    """Receptor de version_incrementada: regenera tras el commit si cambió el catálogo."""
+    if 'catalogo' in recursos and settings.CATALOGO_SNAPSHOT_MODO == 'hilo':
+        transaction.on_commit(_lanzar_hilo)
+
+
+def _lanzar_hilo():
+    # Los cambios que llegan mientras corre una regeneración se juntan en una sola corrida más
+    with _mutex_hilo:
+        if _estado_hilo['en_curso']:
+            _estado_hilo['pendiente'] = True
+            return
+        _estado_hilo['en_curso'] = True
+    threading.Thread(target=_regenerar_en_hilo, daemon=True).start()
+
+
+def _regenerar_en_hilo():
+    try:
+        while True:
+            with _mutex_hilo:
+                _estado_hilo['pendiente'] = False
+            try:
+                generar_snapshot()
+            except Exception:
+                logger.exception("❌ Error regenerando el snapshot del catálogo")
+            with _mutex_hilo:
+                if not _estado_hilo['pendiente']:
+                    _estado_hilo['en_curso'] = False
+                    return
+    finally:
+        connection.close()
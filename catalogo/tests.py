@@ -1,3 +1,891 @@
-from django.test import TestCase
+import io
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from administracion.models import Cliente
+from catalogo import (
+    busqueda, cambios, eliminacion, imagenes, inventario, media, popularidad, precios, snapshot,
+)
+from catalogo.almacenamiento import ErrorAlmacenamiento
+from catalogo.facetas import calcular_facetas
+from catalogo.importacion import ImportadorCatalogo, leer_filas
+from catalogo.models import (
+    CambioCatalogo, Catalogo, Categoria, EliminacionCatalogo, HistorialPrecio, ImagenMedia, Marca, Producto,
+    StockCatalogo, SubidaImagen,
+)
+from catalogo.views import ProductoViewSet
+from ventas.models import DetalleVenta, Venta
+
+INDICE_INVENTARIO = 'producto_cat_estado_fecha'
+
+
+class PlanConsultasInventarioTests(TestCase):
+    """
+    Verifica con EXPLAIN que los filtros del inventario y la selección FIFO
+    usan el índice (catalogo, estado, fecha_ingreso).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalogo = Catalogo.objects.create(sku='LAP-01', nombre='Laptop 01', precio=100)
+        Producto.objects.bulk_create([
+            Producto(catalogo=cls.catalogo, numero_serie=f'SN-{i}', costo=50, estado=estado)
+            for i, estado in enumerate(['disponible', 'vendido', 'en_reparacion'] * 20)
+        ])
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Con tablas tan chicas PostgreSQL prefiere un seq scan; se desactiva para ver el índice elegible
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def queryset_listado(self, params):
+        vista = ProductoViewSet()
+        vista.request = Request(APIRequestFactory().get('/api/productos/', params))
+        vista.format_kwarg = None
+        vista.action = 'list'
+        # Mismo orden que aplica la paginación por cursor
+        return vista.filter_queryset(vista.get_queryset()).order_by(*vista.cursor_ordering)[:51]
+
+    def assertUsaIndice(self, queryset):
+        plan = queryset.explain()
+        self.assertIn(INDICE_INVENTARIO, plan)
+        return plan
+
+    def test_filtro_catalogo_y_estado(self):
+        self.assertUsaIndice(self.queryset_listado({'catalogo': self.catalogo.pk, 'estado': 'disponible'}))
+
+    def test_filtro_catalogo_estado_y_rango_de_fechas(self):
+        self.assertUsaIndice(self.queryset_listado({
+            'catalogo': self.catalogo.pk,
+            'estado': 'disponible',
+            'fecha_desde': '2025-01-01',
+            'fecha_hasta': '2025-12-31',
+        }))
+
+    def test_seleccion_fifo_de_venta(self):
+        # Misma consulta que finanzas.views.actualizar_stock_productos (sin el FOR UPDATE)
+        plan = self.assertUsaIndice(
+            Producto.objects.filter(catalogo=self.catalogo, estado='disponible').order_by('fecha_ingreso')[:3]
+        )
+        if connection.vendor == 'sqlite':
+            # El índice ya entrega las filas en orden: no hay ordenamiento aparte
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_filtros_devuelven_los_items_correctos(self):
+        queryset = self.queryset_listado({'catalogo': self.catalogo.pk, 'estado': 'vendido'})
+        self.assertEqual(len(queryset), 20)
+        self.assertTrue(all(producto.estado == 'vendido' for producto in queryset))
+
+
+class CambioEstadoMasivoTests(TestCase):
+    """Los contadores de StockCatalogo quedan iguales a los conteos reales tras un cambio masivo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalogo = Catalogo.objects.create(sku='MON-01', nombre='Monitor 01', precio=100)
+        for i, estado in enumerate(['disponible'] * 4 + ['reservado'] * 3 + ['en_reparacion'] * 2 + ['vendido'] * 2):
+            # save() ajusta los contadores
+            Producto.objects.create(catalogo=cls.catalogo, numero_serie=f'MON-{i}', costo=50, estado=estado)
+
+    def contadores(self):
+        return {
+            estado: cantidad
+            for estado, cantidad in StockCatalogo.objects.filter(catalogo=self.catalogo).values_list('estado', 'cantidad')
+            if cantidad
+        }
+
+    def reales(self):
+        return dict(
+            Producto.objects.filter(catalogo=self.catalogo).values_list('estado').annotate(Count('id')).order_by()
+        )
+
+    def test_lote_con_estados_mezclados(self):
+        resultado = inventario.cambiar_estado_masivo('dado_de_baja', catalogo_id=self.catalogo.pk)
+
+        self.assertEqual(resultado['actualizados'], 9)
+        self.assertEqual(resultado['por_estado_anterior'], {'disponible': 4, 'reservado': 3, 'en_reparacion': 2})
+        self.assertEqual(resultado['no_permitidos'], {'vendido': 2})
+        self.assertEqual(self.contadores(), {'dado_de_baja': 9, 'vendido': 2})
+        self.assertEqual(self.contadores(), self.reales())
+
+    @skipIf(connection.vendor == 'postgresql', 'En PostgreSQL el UPDATE ... RETURNING da los conteos sin reintentar')
+    def test_cambio_concurrente_de_estados_se_reintenta(self):
+        contar = inventario._contar_por_estado
+        llamadas = []
+
+        def contar_y_modificar(queryset):
+            conteos = contar(queryset)
+            if not llamadas:
+                # Entre el conteo y el UPDATE otra operación vende un ítem reservado
+                reservado = Producto.objects.filter(catalogo=self.catalogo, estado='reservado').first()
+                reservado.estado = 'vendido'
+                reservado.save()
+            llamadas.append(1)
+            return conteos
+
+        with mock.patch.object(inventario, '_contar_por_estado', side_effect=contar_y_modificar):
+            resultado = inventario.cambiar_estado_masivo('disponible', catalogo_id=self.catalogo.pk)
+
+        # El conflicto se detecta, la transacción se revierte y el reintento parte de cero
+        self.assertEqual(len(llamadas), 2)
+        self.assertEqual(resultado['por_estado_anterior'], {'reservado': 3, 'en_reparacion': 2})
+        self.assertEqual(self.contadores(), {'disponible': 9, 'vendido': 2})
+        self.assertEqual(self.contadores(), self.reales())
+
+    def test_filtro_por_fecha_en_una_sola_actualizacion(self):
+        hasta = timezone.now() + timedelta(days=1)
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = inventario.cambiar_estado_masivo('reservado', catalogo_id=self.catalogo.pk, fecha_hasta=hasta)
+
+        tabla = Producto._meta.db_table
+        actualizaciones = [c['sql'] for c in consultas if c['sql'].startswith(('UPDATE', 'WITH')) and tabla in c['sql']]
+        self.assertEqual(len(actualizaciones), 1)
+        self.assertEqual(resultado['por_estado_anterior'], {'disponible': 4})
+        self.assertEqual((resultado['sin_cambio'], resultado['no_permitidos']), (3, {'en_reparacion': 2, 'vendido': 2}))
+        self.assertEqual(self.contadores(), self.reales())
+
+
+class AjusteStockTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalogo = Catalogo.objects.create(sku='TEC-01', nombre='Teclado 01', precio=30)
+
+    def contador(self, estado):
+        return StockCatalogo.objects.get(catalogo=self.catalogo, estado=estado).cantidad
+
+    def test_decremento_sin_fila_no_crea_contador_negativo(self):
+        with self.assertLogs('catalogo.models', 'WARNING'):
+            StockCatalogo.ajustar({(self.catalogo.pk, 'reservado'): -2})
+        self.assertEqual(self.contador('reservado'), 0)
+
+    def test_decremento_mayor_al_contador_queda_en_cero(self):
+        StockCatalogo.ajustar({(self.catalogo.pk, 'disponible'): 1})
+        with self.assertLogs('catalogo.models', 'WARNING'):
+            StockCatalogo.ajustar({(self.catalogo.pk, 'disponible'): -3})
+        self.assertEqual(self.contador('disponible'), 0)
+
+    def test_version_solo_cambia_con_stock_disponible(self):
+        with mock.patch('catalogo.models.incrementar_version') as incrementar:
+            StockCatalogo.ajustar({(self.catalogo.pk, 'reservado'): 1})
+            incrementar.assert_not_called()
+            StockCatalogo.ajustar({(self.catalogo.pk, 'reservado'): -1, (self.catalogo.pk, 'disponible'): 1})
+            incrementar.assert_called_once_with('catalogo')
+
+
+class PaginacionCursorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalogos = [
+            Catalogo.objects.create(sku=f'CAB-{i}', nombre=f'Cable {i}', precio=precio)
+            for i, precio in enumerate([10, 20, 10, 30, 10, 20, 10])
+        ]
+
+    def recorrer(self, ordering):
+        client = APIClient()
+        url = f'/api/catalogo/?ordering={ordering}&page_size=2'
+        ids = []
+        while url:
+            respuesta = client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            ids += [catalogo['id'] for catalogo in respuesta.data['results']]
+            url = respuesta.data['next']
+        return ids
+
+    def test_cursor_estable_con_precios_empatados(self):
+        esperado = [c.pk for c in sorted(self.catalogos, key=lambda c: (c.precio, c.pk))]
+        self.assertEqual(self.recorrer('precio'), esperado)
+
+    def test_cursor_descendente_con_precios_empatados(self):
+        esperado = [c.pk for c in sorted(self.catalogos, key=lambda c: (-c.precio, -c.pk))]
+        self.assertEqual(self.recorrer('-precio'), esperado)
+
+
+class ImportacionCatalogoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalogo = Catalogo.objects.create(sku='LAP-01', nombre='Laptop 01', precio=100, modelo='X1')
+
+    def importar(self, contenido, formato):
+        return ImportadorCatalogo().importar(leer_filas(io.StringIO(contenido), formato))
+
+    def test_csv_actualiza_sku_existente_y_crea_nuevo(self):
+        resumen = self.importar('sku,nombre,precio\nLAP-01,Laptop 01,120\nLAP-02,Laptop 02,90\n', 'csv')
+
+        self.assertEqual((resumen['creadas'], resumen['actualizadas'], resumen['total_errores']), (1, 1, 0))
+        self.catalogo.refresh_from_db()
+        self.assertEqual(self.catalogo.precio, 120)
+        self.assertEqual(Catalogo.objects.get(sku='LAP-02').precio, 90)
+        self.assertEqual(HistorialPrecio.objects.filter(origen='importacion').count(), 2)
+
+    def test_ndjson_parcial_conserva_las_columnas_ausentes(self):
+        resumen = self.importar('{"sku": "LAP-01", "precio": "150"}\n', 'ndjson')
+
+        self.assertEqual((resumen['creadas'], resumen['actualizadas']), (0, 1))
+        self.catalogo.refresh_from_db()
+        self.assertEqual((self.catalogo.nombre, self.catalogo.modelo, self.catalogo.precio), ('Laptop 01', 'X1', 150))
+        self.assertEqual(Catalogo.objects.count(), 1)
+
+
+class IngresoProductosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalogo = Catalogo.objects.create(sku='IMP-01', nombre='Impresora 01', precio=80)
+        Producto.objects.create(catalogo=cls.catalogo, numero_serie='SN-1', costo=40)
+
+    def test_serie_insertada_en_paralelo_se_reintenta(self):
+        # La primera lectura no ve SN-1 (como si otro ingreso la insertara entre la lectura y el INSERT)
+        lecturas = iter([set(), {'SN-1'}])
+        with mock.patch.object(inventario, 'series_existentes', side_effect=lambda series: next(lecturas)) as leer:
+            resultado = inventario.ingresar_productos(self.catalogo, 40, ['SN-1', 'SN-2', 'SN-2'])
+
+        self.assertEqual(leer.call_count, 2)
+        self.assertEqual(resultado, {'creados': 1, 'duplicados': ['SN-1'], 'repetidos': ['SN-2']})
+        self.assertEqual(
+            StockCatalogo.objects.get(catalogo=self.catalogo, estado='disponible').cantidad,
+            Producto.objects.filter(catalogo=self.catalogo, estado='disponible').count(),
+        )
+
+
+class EscrituraCatalogoAtomicaTests(TestCase):
+
+    def test_fallo_en_historial_revierte_la_creacion(self):
+        with mock.patch.object(HistorialPrecio, 'registrar', side_effect=RuntimeError('sin historial')):
+            with self.assertRaises(RuntimeError):
+                APIClient().post('/api/catalogo/', {'sku': 'RAT-01', 'nombre': 'Ratón 01', 'precio': '15.00'}, format='json')
+        self.assertFalse(Catalogo.objects.filter(sku='RAT-01').exists())
+
+
+@override_settings(CATALOGO_SNAPSHOT_MARGEN=0, CATALOGO_SNAPSHOT_POR_CATEGORIA=True)
+class SnapshotIncrementalTests(TestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajuste = override_settings(CATALOGO_SNAPSHOT_DIR=directorio.name)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
+        self.categoria = Categoria.objects.create(nombre='Monitores')
+        self.marca = Marca.objects.create(nombre='Marca')
+        self.catalogo = Catalogo.objects.create(
+            sku='MON-01', nombre='Monitor 01', precio=100, categoria=self.categoria, marca=self.marca
+        )
+        # Lo anterior queda fuera de la ventana de la corrida incremental
+        Catalogo.objects.update(fecha_actualizacion=timezone.now() - timedelta(hours=1))
+        snapshot.generar_snapshot(completo=True)
+
+    def entrada(self):
+        manifiesto = snapshot.leer_manifiesto(snapshot.directorio_snapshot())
+        archivo = manifiesto['ubicacion'][self.catalogo.pk]
+        productos = snapshot.leer_gzip(snapshot.directorio_snapshot() / archivo)['productos']
+        return archivo, next(p for p in productos if p['id'] == self.catalogo.pk)
+
+    def test_borrar_categoria_mueve_el_catalogo(self):
+        self.categoria.delete()
+        resumen = snapshot.generar_snapshot()
+
+        self.assertEqual((resumen['modo'], resumen['cambiados']), ('incremental', 1))
+        self.assertEqual(self.entrada()[0], 'categoria-sin.json.gz')
+
+    def test_borrar_marca_actualiza_la_entrada(self):
+        self.marca.delete()
+        snapshot.generar_snapshot()
+        self.assertIsNone(self.entrada()[1]['marca_id'])
+
+    def test_popularidad_entra_en_la_corrida_incremental(self):
+        with mock.patch.object(popularidad, 'calcular_popularidad', return_value={self.catalogo.pk: 3.5}):
+            popularidad.actualizar_popularidad()
+        snapshot.generar_snapshot()
+        self.assertEqual(self.entrada()[1]['popularidad'], 3.5)
+
+
+@override_settings(CATALOGO_CAMBIOS_RETENCION_DIAS=30)
+class PodaCambiosTests(TestCase):
+
+    def setUp(self):
+        ahora = timezone.now()
+        self.registros = [
+            CambioCatalogo.objects.create(
+                entidad='catalogo', objeto_id=i, operacion='modificacion', fecha=ahora - timedelta(days=dias)
+            )
+            for i, dias in enumerate([40, 35, 31, 2], start=1)
+        ]
+
+    def cursor(self, registro):
+        return cambios.formatear_cursor(registro.transaccion, registro.id)
+
+    def test_poda_conserva_el_limite_y_lo_reciente(self):
+        self.assertEqual(cambios.podar_cambios(), 2)
+        self.assertEqual(list(CambioCatalogo.objects.values_list('objeto_id', flat=True)), [3, 4])
+
+    def test_cursor_anterior_a_la_poda_responde_410(self):
+        cambios.podar_cambios()
+        respuesta = APIClient().get('/api/catalogo/changes/', {'since': self.cursor(self.registros[0])})
+        self.assertEqual(respuesta.status_code, 410)
+        self.assertEqual(respuesta.data['cursor'], self.cursor(self.registros[-1]))
+
+    def test_cursor_en_el_limite_sigue_vigente(self):
+        cambios.podar_cambios()
+        cambios_por_entidad, siguiente, _ = cambios.leer_cambios(self.cursor(self.registros[2]), 10)
+        self.assertEqual(cambios_por_entidad['catalogo'], {4: 'modificacion'})
+        self.assertEqual(siguiente, self.cursor(self.registros[-1]))
+
+    def test_sin_poda_el_cursor_inicial_sigue_vigente(self):
+        CambioCatalogo.objects.filter(pk__in=[r.pk for r in self.registros[:3]]).delete()
+        cambios_por_entidad, _, _ = cambios.leer_cambios('0.0', 10)
+        self.assertEqual(cambios_por_entidad['catalogo'], {4: 'modificacion'})
+
+
+@override_settings(CATALOGO_ELIMINACION_MODO_WORKER='comando')
+class ProcesarEliminacionesTests(TestCase):
+
+    def setUp(self):
+        self.eliminaciones = []
+        for sku in ('BOR-01', 'BOR-02'):
+            catalogo = Catalogo.objects.create(sku=sku, nombre=f'Borrar {sku}', precio=10)
+            Producto.objects.create(catalogo=catalogo, numero_serie=f'{sku}-1', costo=5)
+            self.eliminaciones.append(eliminacion.solicitar_eliminacion(catalogo)[0])
+
+    def test_error_inesperado_marca_fallida_y_sigue_con_las_demas(self):
+        original = eliminacion.eliminar_lote
+        fallar = self.eliminaciones[0].catalogo_id
+
+        def eliminar_lote(catalogo_id, tamano):
+            if catalogo_id == fallar:
+                raise RuntimeError('disco lleno')
+            return original(catalogo_id, tamano)
+
+        salida = io.StringIO()
+        with mock.patch.object(eliminacion, 'eliminar_lote', side_effect=eliminar_lote), \
+                self.assertLogs('catalogo.eliminacion', 'ERROR'):
+            call_command('procesar_eliminaciones', stdout=salida)
+
+        fallida, completada = EliminacionCatalogo.objects.filter(
+            pk__in=[e.pk for e in self.eliminaciones]
+        ).order_by('sku')
+        self.assertEqual((fallida.estado, fallida.ultimo_error), ('fallida', 'RuntimeError: disco lleno'))
+        self.assertEqual(completada.estado, 'completada')
+        self.assertFalse(Catalogo.objects.filter(sku='BOR-02').exists())
+        self.assertIn('completadas: 1, fallidas: 1', salida.getvalue())
+
+
+@override_settings(
+    CATALOGO_IMAGEN_BACKEND='catalogo.almacenamiento.LocalAlmacenamiento',
+    CATALOGO_IMAGEN_DERIVADAS={'miniatura': (40, 40), 'mediana': (100, 100)},
+    CATALOGO_IMAGEN_FORMATO_DERIVADAS='PNG',
+)
+class AlmacenImagenesTests(TestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajuste = override_settings(MEDIA_ROOT=directorio.name)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        self.directorio = Path(directorio.name) / 'catalogo'
+
+    def png(self, ancho, alto, color='red'):
+        buffer = io.BytesIO()
+        Image.new('RGB', (ancho, alto), color).save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def test_mismo_contenido_se_registra_una_vez(self):
+        contenido = self.png(200, 100)
+        primera = media.registrar_imagen(contenido)
+        segunda = media.registrar_imagen(contenido)
+
+        self.assertEqual(primera.pk, segunda.pk)
+        self.assertEqual(primera.hash, media.calcular_hash(contenido))
+        self.assertEqual(ImagenMedia.objects.count(), 1)
+        # Original + 2 derivadas, sin copias
+        self.assertEqual(len(list(self.directorio.iterdir())), 3)
+
+    def test_contenido_distinto_es_otra_imagen(self):
+        media.registrar_imagen(self.png(200, 100))
+        media.registrar_imagen(self.png(200, 100, color='blue'))
+        self.assertEqual(ImagenMedia.objects.count(), 2)
+
+    def test_derivadas_con_los_tamanos_configurados(self):
+        imagen = media.registrar_imagen(self.png(200, 100))
+
+        self.assertEqual((imagen.ancho, imagen.alto), (200, 100))
+        # Caben en el tamaño configurado sin deformarse
+        with Image.open(self.directorio / f'{imagen.hash}_miniatura.png') as miniatura:
+            self.assertEqual(miniatura.size, (40, 20))
+        with Image.open(self.directorio / f'{imagen.hash}_mediana.png') as mediana:
+            self.assertEqual(mediana.size, (100, 50))
+        self.assertTrue(imagen.url_miniatura.endswith(f'{imagen.hash}_miniatura.png'))
+
+    def test_archivo_que_no_es_imagen(self):
+        with self.assertRaises(media.ImagenInvalida):
+            media.registrar_imagen(b'no es una imagen')
+        self.assertFalse(ImagenMedia.objects.exists())
+
+
+class BusquedaCatalogoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.marca = Marca.objects.create(nombre='Nikon')
+        cls.categoria = Categoria.objects.create(nombre='Fotografía')
+        cls.camara = Catalogo.objects.create(
+            sku='CAM-01', nombre='Cámara réflex D3500', precio=500, marca=cls.marca, categoria=cls.categoria
+        )
+        cls.lente = Catalogo.objects.create(
+            sku='LEN-01', nombre='Lente 50mm', precio=200, marca=cls.marca, categoria=cls.categoria,
+            descripcion='Compatible con cualquier cámara réflex',
+        )
+        cls.teclado = Catalogo.objects.create(sku='TEC-01', nombre='Teclado mecánico', precio=40)
+
+    def buscar(self, termino):
+        return list(busqueda.buscar_catalogo(Catalogo.objects.all(), termino))
+
+    @skipIf(connection.vendor == 'postgresql', 'Fallback con LIKE de los motores sin búsqueda de texto')
+    def test_fallback_cada_palabra_en_algun_campo(self):
+        self.assertEqual(set(self.buscar('reflex')), set())
+        self.assertEqual(set(self.buscar('réflex')), {self.camara, self.lente})
+        # 'nikon' está en la marca y 'lente' en el nombre
+        self.assertEqual(self.buscar('nikon lente'), [self.lente])
+        self.assertEqual(self.buscar('tec-01'), [self.teclado])
+        self.assertEqual(len(self.buscar('  ')), 3)
+
+    @skipIf(connection.vendor == 'postgresql', 'Fallback con LIKE de los motores sin búsqueda de texto')
+    def test_parametro_search_del_listado(self):
+        respuesta = APIClient().get('/api/catalogo/', {'search': 'teclado'})
+        self.assertEqual([catalogo['id'] for catalogo in respuesta.data['results']], [self.teclado.pk])
+
+    @skipIf(connection.vendor != 'postgresql', 'search_vector y su trigger solo existen en PostgreSQL')
+    def test_sin_acentos_y_ordenado_por_relevancia(self):
+        # El trigger mantiene search_vector: sin acentos, con stemming y el nombre pesando más que la descripción
+        self.assertEqual(self.buscar('camaras reflex'), [self.camara, self.lente])
+        self.assertEqual(self.buscar('mecanico'), [self.teclado])
+
+        self.camara.nombre = 'Cámara compacta'
+        self.camara.save()
+        self.assertEqual(self.buscar('reflex'), [self.lente])
+
+
+@override_settings(CATALOGO_AUTOCOMPLETAR_LIMITE=10, CATALOGO_AUTOCOMPLETAR_LIMITE_MAX=25)
+class AutocompletarCatalogoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laptops = [
+            Catalogo.objects.create(sku=f'LAP-{i:02}', nombre=f'Laptop {i:02}', precio=100) for i in range(12)
+        ]
+        cls.funda = Catalogo.objects.create(sku='FUN-01', nombre='Funda para laptop', precio=10)
+        cls.mouse = Catalogo.objects.create(sku='MOU-01', nombre='Mouse inalámbrico', precio=15)
+        Catalogo.objects.create(sku='LAP-99', nombre='Laptop descontinuada', precio=90, estado='inactivo')
+
+    def setUp(self):
+        cache.clear()
+
+    def autocompletar(self, **params):
+        respuesta = APIClient().get('/api/catalogo/autocomplete/', params)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.data
+
+    def test_prefijo_primero_y_solo_activos(self):
+        resultado = self.autocompletar(q='lapt', limit=25)
+        nombres = [fila['nombre'] for fila in resultado]
+
+        self.assertEqual(nombres[:12], [laptop.nombre for laptop in self.laptops])
+        self.assertIn('Funda para laptop', nombres[12:])
+        self.assertNotIn('Laptop descontinuada', nombres)
+        self.assertEqual(set(resultado[0]), {'id', 'nombre', 'sku', 'imagen_url'})
+
+    def test_coincidencia_por_sku(self):
+        self.assertEqual([fila['id'] for fila in self.autocompletar(q='mou-')], [self.mouse.pk])
+
+    def test_limite(self):
+        self.assertEqual(len(self.autocompletar(q='laptop')), 10)
+        self.assertEqual(len(self.autocompletar(q='laptop', limit=3)), 3)
+        # Se recorta al máximo configurado
+        self.assertEqual(len(self.autocompletar(q='laptop', limit=1000)), 13)
+        self.assertEqual(APIClient().get('/api/catalogo/autocomplete/', {'q': 'lap', 'limit': 'x'}).status_code, 400)
+
+    def test_termino_vacio_o_corto(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.autocompletar(q=''), [])
+            self.assertEqual(self.autocompletar(q=' l '), [])
+        self.assertEqual(self.autocompletar(), [])
+
+
+@override_settings(CATALOGO_IMAGEN_MODO_WORKER='comando')
+class SubidaImagenesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalogo = Catalogo.objects.create(sku='CAM-01', nombre='Cámara 01', precio=500)
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajuste = override_settings(CATALOGO_IMAGEN_SPOOL_DIR=directorio.name)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        self.spool = Path(directorio.name)
+
+    def archivo(self, contenido=b'imagen'):
+        return SimpleUploadedFile('foto.png', contenido, content_type='image/png')
+
+    def test_el_archivo_llega_al_spool_al_confirmar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            subida = imagenes.encolar_imagen(self.catalogo, self.archivo())
+            # Antes del commit no hay archivo y ningún worker puede tomarla
+            self.assertEqual(list(self.spool.iterdir()), [])
+            self.assertEqual(imagenes.reclamar_pendientes(), [])
+
+        self.assertEqual((self.spool / subida.archivo).read_bytes(), b'imagen')
+        subida.refresh_from_db()
+        self.assertEqual((subida.estado, subida.hash), ('pendiente', media.calcular_hash(b'imagen')))
+        self.assertEqual(Catalogo.objects.get(pk=self.catalogo.pk).imagen_estado, 'pendiente')
+
+    def test_rollback_no_deja_archivos_en_el_spool(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    imagenes.encolar_imagen(self.catalogo, self.archivo())
+                    raise RuntimeError('falla el resto de la vista')
+            except RuntimeError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(list(self.spool.iterdir()), [])
+        self.assertFalse(SubidaImagen.objects.exists())
+
+    def subida_en_spool(self, **campos):
+        (self.spool / 'foto.png').write_bytes(b'imagen')
+        return SubidaImagen.objects.create(catalogo=self.catalogo, archivo='foto.png', estado='procesando', **campos)
+
+    @override_settings(CATALOGO_IMAGEN_REINTENTO_BASE=10, CATALOGO_IMAGEN_REINTENTO_MAX=600)
+    def test_espera_exponencial_con_tope_y_jitter(self):
+        for intentos, base in [(1, 10), (2, 20), (4, 80), (7, 600), (20, 600)]:
+            with self.subTest(intentos=intentos):
+                self.assertTrue(base <= imagenes.calcular_espera(intentos) <= base * 1.2)
+
+    @override_settings(CATALOGO_IMAGEN_MAX_INTENTOS=3, CATALOGO_IMAGEN_REINTENTO_BASE=10)
+    def test_error_del_backend_reprograma_con_backoff(self):
+        subida = self.subida_en_spool(intentos=1)
+        antes = timezone.now()
+        with mock.patch.object(imagenes, 'registrar_imagen', side_effect=ErrorAlmacenamiento('503')), \
+                self.assertLogs('catalogo.imagenes', 'WARNING'):
+            self.assertFalse(imagenes.procesar_subida(subida.pk))
+
+        subida.refresh_from_db()
+        self.assertEqual((subida.estado, subida.intentos, subida.ultimo_error), ('pendiente', 2, '503'))
+        espera = (subida.proximo_intento - antes).total_seconds()
+        self.assertTrue(20 <= espera <= 25)
+        self.assertTrue((self.spool / 'foto.png').exists())
+        # Todavía no le toca
+        self.assertEqual(imagenes.reclamar_pendientes(), [])
+
+    @override_settings(CATALOGO_IMAGEN_MAX_INTENTOS=3)
+    def test_fallida_al_agotar_los_intentos(self):
+        subida = self.subida_en_spool(intentos=2)
+        with mock.patch.object(imagenes, 'registrar_imagen', side_effect=ErrorAlmacenamiento('503')), \
+                self.assertLogs('catalogo.imagenes', 'ERROR'):
+            self.assertTrue(imagenes.procesar_subida(subida.pk))
+
+        subida.refresh_from_db()
+        self.assertEqual((subida.estado, subida.intentos), ('fallida', 3))
+        self.assertEqual(Catalogo.objects.get(pk=self.catalogo.pk).imagen_estado, 'error')
+
+    def test_imagen_invalida_o_archivo_faltante_fallan_sin_reintentos(self):
+        subida = self.subida_en_spool()
+        with mock.patch.object(imagenes, 'registrar_imagen', side_effect=media.ImagenInvalida('no es imagen')), \
+                self.assertLogs('catalogo.imagenes', 'ERROR'):
+            self.assertTrue(imagenes.procesar_subida(subida.pk))
+        self.assertEqual(SubidaImagen.objects.get(pk=subida.pk).estado, 'fallida')
+
+        faltante = SubidaImagen.objects.create(catalogo=self.catalogo, archivo='no-existe.png', estado='procesando')
+        with self.assertLogs('catalogo.imagenes', 'ERROR'):
+            self.assertTrue(imagenes.procesar_subida(faltante.pk))
+        self.assertEqual(SubidaImagen.objects.get(pk=faltante.pk).estado, 'fallida')
+
+    def test_comando_reintenta_las_vencidas(self):
+        subida = self.subida_en_spool(intentos=1)
+        SubidaImagen.objects.filter(pk=subida.pk).update(estado='pendiente', proximo_intento=timezone.now())
+        imagen = ImagenMedia.objects.create(
+            hash='b' * 64, url_original='https://img/o.png', url_miniatura='https://img/m.png',
+            url_mediana='https://img/md.png', ancho=10, alto=10,
+        )
+        salida = io.StringIO()
+        with mock.patch.object(imagenes, 'registrar_imagen', return_value=imagen):
+            call_command('procesar_imagenes', stdout=salida)
+
+        self.assertIn('Subidas terminadas: 1, reprogramadas: 0', salida.getvalue())
+        self.assertEqual(SubidaImagen.objects.get(pk=subida.pk).estado, 'completada')
+        catalogo = Catalogo.objects.get(pk=self.catalogo.pk)
+        self.assertEqual((catalogo.imagen_id, catalogo.imagen_estado), (imagen.pk, 'lista'))
+        self.assertFalse((self.spool / 'foto.png').exists())
+
+
+@override_settings(CATALOGO_FACETAS_LIMITES_PRECIO=[100, 500, 1000])
+class FacetasCatalogoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dell = Marca.objects.create(nombre='Dell')
+        cls.hp = Marca.objects.create(nombre='HP')
+        cls.laptops = Categoria.objects.create(nombre='Portátiles')
+        monitores = Categoria.objects.create(nombre='Monitores')
+        # (nombre, precio, marca, categoría, disponibles)
+        for nombre, precio, marca, categoria, disponibles in [
+            ('Laptop Dell A', 800, cls.dell, cls.laptops, 2),
+            ('Laptop Dell B', 1200, cls.dell, cls.laptops, 0),
+            ('Laptop HP C', 450, cls.hp, cls.laptops, 1),
+            ('Laptop genérica', 50, None, cls.laptops, 0),
+            ('Monitor Dell', 300, cls.dell, monitores, 5),
+        ]:
+            catalogo = Catalogo.objects.create(
+                sku=nombre.upper().replace(' ', '-'), nombre=nombre, precio=precio, marca=marca, categoria=categoria
+            )
+            if disponibles:
+                StockCatalogo.objects.create(catalogo=catalogo, estado='disponible', cantidad=disponibles)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_conteos_con_filtro_activo(self):
+        queryset = busqueda.buscar_catalogo(Catalogo.objects.all(), 'laptop')
+        with self.assertNumQueries(1):
+            facetas = calcular_facetas(queryset)
+
+        self.assertEqual(facetas['total'], 4)
+        self.assertEqual(facetas['marcas'], [
+            {'id': self.dell.pk, 'nombre': 'Dell', 'cantidad': 2},
+            {'id': None, 'nombre': None, 'cantidad': 1},
+            {'id': self.hp.pk, 'nombre': 'HP', 'cantidad': 1},
+        ])
+        self.assertEqual(facetas['categorias'], [{'id': self.laptops.pk, 'nombre': 'Portátiles', 'cantidad': 4}])
+        self.assertEqual(facetas['rangos_precio'], [
+            {'desde': 0, 'hasta': 100, 'cantidad': 1},
+            {'desde': 100, 'hasta': 500, 'cantidad': 1},
+            {'desde': 500, 'hasta': 1000, 'cantidad': 1},
+            {'desde': 1000, 'hasta': None, 'cantidad': 1},
+        ])
+        self.assertEqual(facetas['en_stock'], {'si': 2, 'no': 2})
+        self.assertEqual(facetas['estados'], [{'estado': 'activo', 'cantidad': 4}])
+
+    def test_endpoint_aplica_la_busqueda(self):
+        respuesta = APIClient().get('/api/catalogo/facets/', {'search': 'dell'})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['total'], 3)
+        self.assertEqual(respuesta.data['marcas'], [{'id': self.dell.pk, 'nombre': 'Dell', 'cantidad': 3}])
+        self.assertEqual([rango['cantidad'] for rango in respuesta.data['rangos_precio']], [0, 1, 1, 1])
+        self.assertEqual(respuesta.data['en_stock'], {'si': 2, 'no': 1})
+
+
+class GarantiasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ahora = timezone.now()
+        cls.mensual = Catalogo.objects.create(sku='MOU-01', nombre='Mouse 01', precio=15, meses_garantia=1)
+        cls.anual = Catalogo.objects.create(sku='LAP-01', nombre='Laptop 01', precio=900, meses_garantia=12)
+        cls.vence_pronto = cls.vendido(cls.mensual, 'MOU-A', dias=25)
+        cls.vencida = cls.vendido(cls.mensual, 'MOU-B', dias=40)
+        cls.vence_lejos = cls.vendido(cls.anual, 'LAP-A', dias=100)
+        cls.sin_vender = Producto.objects.create(catalogo=cls.anual, numero_serie='LAP-B', costo=500)
+
+    @classmethod
+    def vendido(cls, catalogo, serie, dias):
+        return Producto.objects.create(
+            catalogo=catalogo, numero_serie=serie, costo=10, estado='vendido',
+            fecha_venta=cls.ahora - timedelta(days=dias),
+        )
+
+    def fin_garantia(self, producto):
+        return Producto.objects.values_list('fecha_fin_garantia', flat=True).get(pk=producto.pk)
+
+    def test_cambiar_meses_reescribe_las_fechas_guardadas(self):
+        self.assertEqual(self.fin_garantia(self.vence_lejos), self.vence_lejos.fecha_venta + timedelta(days=360))
+
+        catalogo = Catalogo.objects.get(pk=self.anual.pk)
+        catalogo.meses_garantia = 24
+        catalogo.save()
+
+        self.assertEqual(self.fin_garantia(self.vence_lejos), self.vence_lejos.fecha_venta + timedelta(days=720))
+        self.assertIsNone(self.fin_garantia(self.sin_vender))
+        # Los de otros catálogos no cambian
+        self.assertEqual(self.fin_garantia(self.vence_pronto), self.vence_pronto.fecha_venta + timedelta(days=30))
+
+    def test_guardar_sin_cambiar_meses_no_recalcula(self):
+        catalogo = Catalogo.objects.get(pk=self.anual.pk)
+        catalogo.nombre = 'Laptop 01 (2026)'
+        with mock.patch.object(Producto, 'actualizar_fin_garantia') as actualizar:
+            catalogo.save()
+        actualizar.assert_not_called()
+
+    def vencen_en(self, dias):
+        respuesta = APIClient().get('/api/productos/garantias/', {'vence_en_dias': dias})
+        self.assertEqual(respuesta.status_code, 200)
+        return [producto['numero_serie'] for producto in respuesta.data['results']]
+
+    def test_ventana_de_dias(self):
+        self.assertEqual(self.vencen_en(10), ['MOU-A'])
+        self.assertEqual(self.vencen_en(300), ['MOU-A', 'LAP-A'])
+        self.assertEqual(self.vencen_en(0), [])
+
+    def test_ventana_invalida(self):
+        cliente = APIClient()
+        self.assertEqual(cliente.get('/api/productos/garantias/', {'vence_en_dias': -1}).status_code, 400)
+        self.assertEqual(cliente.get('/api/productos/garantias/', {'vence_en_dias': 'x'}).status_code, 400)
+
+
+class ConsultaSeriesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalogo = Catalogo.objects.create(sku='IMP-01', nombre='Impresora 01', precio=80, meses_garantia=12)
+        Producto.objects.create(catalogo=cls.catalogo, numero_serie='SN-1', costo=40)
+        Producto.objects.create(
+            catalogo=cls.catalogo, numero_serie='SN-2', costo=40, estado='vendido',
+            fecha_venta=timezone.now() - timedelta(days=10),
+        )
+        Producto.objects.create(
+            catalogo=cls.catalogo, numero_serie='SN-3', costo=40, estado='vendido',
+            fecha_venta=timezone.now() - timedelta(days=400),
+        )
+
+    def test_lote_con_encontradas_faltantes_y_normalizadas(self):
+        with self.assertNumQueries(1):
+            resultado = inventario.consultar_series([' SN-2 ', 'SN-X', 'SN-1', '', 'SN-2', 'SN-3'])
+
+        self.assertEqual([fila['numero_serie'] for fila in resultado], ['SN-2', 'SN-X', 'SN-1', 'SN-3'])
+        vendida, faltante, disponible, vencida = resultado
+        self.assertEqual(faltante, {'numero_serie': 'SN-X', 'encontrado': False})
+        self.assertEqual(
+            (vendida['encontrado'], vendida['estado'], vendida['sku'], vendida['garantia_vigente']),
+            (True, 'vendido', 'IMP-01', True),
+        )
+        self.assertEqual((disponible['estado'], disponible['garantia_vigente']), ('disponible', False))
+        self.assertEqual((vencida['estado'], vencida['garantia_vigente']), ('vendido', False))
+
+    def test_endpoint(self):
+        respuesta = APIClient().post(
+            '/api/productos/consultar_series/', {'numeros_serie': ['SN-1', 'SN-X']}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([fila['encontrado'] for fila in respuesta.data], [True, False])
+
+
+class AjustePreciosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.marca = Marca.objects.create(nombre='Logitech')
+        cls.otra = Marca.objects.create(nombre='Genius')
+        cls.mouse = Catalogo.objects.create(sku='MOU-01', nombre='Mouse 01', precio=Decimal('19.99'), marca=cls.marca)
+        cls.teclado = Catalogo.objects.create(sku='TEC-01', nombre='Teclado 01', precio=50, marca=cls.marca)
+        cls.ajeno = Catalogo.objects.create(sku='GEN-01', nombre='Genius 01', precio=10, marca=cls.otra)
+
+    def precios(self):
+        return dict(Catalogo.objects.values_list('sku', 'precio'))
+
+    def test_sube_el_porcentaje_y_registra_el_historial(self):
+        resultado = precios.ajustar_precios(10, marca_id=self.marca.pk)
+
+        self.assertEqual(resultado['actualizados'], 2)
+        self.assertEqual(self.precios(), {'MOU-01': Decimal('21.99'), 'TEC-01': Decimal('55.00'), 'GEN-01': Decimal('10.00')})
+        historial = HistorialPrecio.objects.filter(origen='ajuste_masivo')
+        self.assertEqual(
+            set(historial.values_list('catalogo_id', 'precio', 'vigente_desde')),
+            {(self.mouse.pk, Decimal('21.99'), resultado['vigente_desde']),
+             (self.teclado.pk, Decimal('55.00'), resultado['vigente_desde'])},
+        )
+
+    def test_precio_vigente_a_una_fecha_pasada(self):
+        inicio = timezone.now() - timedelta(days=10)
+        HistorialPrecio.objects.create(catalogo=self.teclado, precio=50, origen='creacion', vigente_desde=inicio)
+        resultado = precios.ajustar_precios(-20, marca_id=self.marca.pk)
+
+        self.assertIsNone(precios.precio_vigente(self.teclado.pk, inicio - timedelta(seconds=1)))
+        self.assertEqual(precios.precio_vigente(self.teclado.pk, inicio + timedelta(days=1)), Decimal('50.00'))
+        self.assertEqual(precios.precio_vigente(self.teclado.pk, resultado['vigente_desde']), Decimal('40.00'))
+        self.assertEqual(precios.precio_vigente(self.teclado.pk, timezone.now()), Decimal('40.00'))
+
+    def test_fuera_de_rango_no_cambia_ningun_precio(self):
+        Catalogo.objects.filter(pk=self.teclado.pk).update(precio=Decimal('99999999.00'))
+        antes = self.precios()
+
+        with self.assertRaises(precios.AjusteFueraDeRango):
+            precios.ajustar_precios(5, marca_id=self.marca.pk)
+        self.assertEqual(self.precios(), antes)
+        self.assertFalse(HistorialPrecio.objects.filter(origen='ajuste_masivo').exists())
+
+    def test_el_historial_sobrevive_al_borrar_el_catalogo(self):
+        precios.ajustar_precios(10, marca_id=self.marca.pk)
+        catalogo_id = self.mouse.pk
+        Catalogo.objects.get(pk=catalogo_id).delete()
+
+        self.assertEqual(precios.precio_vigente(catalogo_id, timezone.now()), Decimal('21.99'))
+
+
+@override_settings(CATALOGO_POPULARIDAD_VIDA_MEDIA_DIAS=10, CATALOGO_POPULARIDAD_VENTANA_DIAS=30)
+class PopularidadVentasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ahora = timezone.now()
+        cls.cliente = Cliente.objects.create(nombre='Cliente Popularidad')
+        cls.mouse = Catalogo.objects.create(sku='MOU-01', nombre='Mouse 01', precio=10)
+        cls.teclado = Catalogo.objects.create(sku='TEC-01', nombre='Teclado 01', precio=20)
+        cls.monitor = Catalogo.objects.create(sku='MON-01', nombre='Monitor 01', precio=100)
+
+    def vender(self, catalogo, cantidad, dias=0, estado='completada'):
+        venta = Venta.objects.create(cliente=self.cliente, subtotal=0, total=0, estado=estado)
+        DetalleVenta.objects.create(venta=venta, catalogo=catalogo, cantidad=cantidad, precio_unitario=catalogo.precio)
+        # fecha es auto_now_add: se retrocede con update
+        Venta.objects.filter(pk=venta.pk).update(fecha=self.ahora - timedelta(days=dias))
+
+    def test_vida_media_y_solo_ventas_completadas(self):
+        self.vender(self.mouse, 3)
+        self.vender(self.mouse, 4, dias=10)
+        self.vender(self.mouse, 8, dias=20)
+        self.vender(self.mouse, 50, dias=40)
+        self.vender(self.teclado, 5, estado='cancelada')
+        self.vender(self.teclado, 5, estado='pendiente')
+        self.vender(self.teclado, 1, dias=5)
+
+        # 3 + 4 × 0.5 + 8 × 0.25; la venta de hace 40 días queda fuera de la ventana
+        self.assertEqual(
+            popularidad.calcular_popularidad(self.ahora),
+            {self.mouse.pk: 7.0, self.teclado.pk: round(0.5 ** 0.5, 4)},
+        )
+
+    def test_ordering_por_popularidad(self):
+        self.vender(self.monitor, 2)
+        self.vender(self.mouse, 20, dias=25)
+        self.vender(self.teclado, 1)
+        self.assertEqual(popularidad.actualizar_popularidad(self.ahora), {'con_ventas': 3, 'actualizados': 3})
+
+        respuesta = APIClient().get('/api/catalogo/', {'ordering': '-popularidad'})
+        self.assertEqual(
+            [catalogo['id'] for catalogo in respuesta.data['results']],
+            [self.mouse.pk, self.monitor.pk, self.teclado.pk],
+        )
+        # Sin ventas nuevas no se reescribe ninguna fila
+        self.assertEqual(popularidad.actualizar_popularidad(self.ahora)['actualizados'], 0)
@@ -1,26 +1,52 @@
 from django.shortcuts import render
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from catalogo.serializers.serializers_catalogo import CatalogoSerializer, MarcaSerializer, CategoriaSerializer
-from .models import Catalogo, Marca, Categoria, Producto
-from catalogo.serializers.serializers_producto import ProductoSerializer
+from catalogo.serializers.serializers_catalogo import (
+    CatalogoSerializer, MarcaSerializer, CategoriaSerializer, HistorialPrecioSerializer, AjustePreciosSerializer,
+    EliminacionCatalogoSerializer,
+)
+from .models import Catalogo, Marca, Categoria, Producto, HistorialPrecio, EliminacionCatalogo
+from catalogo.serializers.serializers_producto import (
+    ProductoSerializer, IngresoProductosSerializer, CambioEstadoMasivoSerializer, ConsultaSeriesSerializer
+)
 from administracion.core.utils import registrar_bitacora
-import requests
+from administracion.core.cache import CacheVersionadaMixin, incrementar_version
+from catalogo.busqueda import BusquedaCatalogoFilter, autocompletar_catalogo
+from catalogo.imagenes import encolar_imagen
+from catalogo.facetas import calcular_facetas, en_stock
+from catalogo.inventario import ingresar_productos, cambiar_estado_masivo, consultar_series
+from catalogo.importacion import ImportadorCatalogo, describir_resumen, detectar_formato, leer_filas
+from catalogo.precios import AjusteFueraDeRango, ajustar_precios, precio_vigente
+from catalogo.cambios import CursorInvalido, CursorVencido, cursor_actual, leer_cambios
+from catalogo.eliminacion import CatalogoConVentas, solicitar_eliminacion
 from django.conf import settings
+from django.db import connection, transaction
 from rest_framework import viewsets, filters
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser, JSONParser
+import io
+from decimal import Decimal, InvalidOperation
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 # Create your views here.
 
-class CategoriaViewSet(viewsets.ModelViewSet):
+class CategoriaViewSet(CacheVersionadaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gestionar Categorías.
     Permite filtrar por nombre: /api/categorias/?nombre=Computadoras
     """
     queryset = Categoria.objects.all().order_by('nombre')
+    cursor_ordering = ('nombre',)
     serializer_class = CategoriaSerializer
+    recursos_cache = ('categoria',)
 
     def perform_create(self, serializer):
-        instance = serializer.save()
+        with transaction.atomic():
+            instance = serializer.save()
+            incrementar_version('categoria', 'catalogo')
         registrar_bitacora(
             request=self.request,
             usuario=self.request.user,
@@ -30,7 +56,9 @@ class CategoriaViewSet(viewsets.ModelViewSet):
         )
 
     def perform_update(self, serializer):
-        instance = serializer.save()
+        with transaction.atomic():
+            instance = serializer.save()
+            incrementar_version('categoria', 'catalogo')
         registrar_bitacora(
             request=self.request,
             usuario=self.request.user,
@@ -41,7 +69,9 @@ class CategoriaViewSet(viewsets.ModelViewSet):
 
     def perform_destroy(self, instance):
         nombre_categoria = instance.nombre
-        instance.delete()
+        with transaction.atomic():
+            instance.delete()
+            incrementar_version('categoria', 'catalogo')
         registrar_bitacora(
             request=self.request,
             usuario=self.request.user,
@@ -51,16 +81,20 @@ class CategoriaViewSet(viewsets.ModelViewSet):
         )
 
 
-class MarcaViewSet(viewsets.ModelViewSet):
+class MarcaViewSet(CacheVersionadaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gestionar Marcas.
     Permite filtrar por nombre: /api/marcas/?nombre=HP
     """
     queryset = Marca.objects.all().order_by('nombre')
+    cursor_ordering = ('nombre',)
     serializer_class = MarcaSerializer
+    recursos_cache = ('marca',)
 
     def perform_create(self, serializer):
-        instance = serializer.save()
+        with transaction.atomic():
+            instance = serializer.save()
+            incrementar_version('marca', 'catalogo')
         registrar_bitacora(
             request=self.request,
             usuario=self.request.user,
@@ -70,7 +104,9 @@ class MarcaViewSet(viewsets.ModelViewSet):
         )
 
     def perform_update(self, serializer):
-        instance = serializer.save()
+        with transaction.atomic():
+            instance = serializer.save()
+            incrementar_version('marca', 'catalogo')
         registrar_bitacora(
             request=self.request,
             usuario=self.request.user,
@@ -81,7 +117,9 @@ class MarcaViewSet(viewsets.ModelViewSet):
 
     def perform_destroy(self, instance):
         nombre_marca = instance.nombre
-        instance.delete()
+        with transaction.atomic():
+            instance.delete()
+            incrementar_version('marca', 'catalogo')
         registrar_bitacora(
             request=self.request,
             usuario=self.request.user,
@@ -91,82 +129,310 @@ class MarcaViewSet(viewsets.ModelViewSet):
         )
 
 
-class CatalogoViewSet(viewsets.ModelViewSet):
+class CatalogoViewSet(CacheVersionadaMixin, viewsets.ModelViewSet):
     """
     API endpoint principal para gestionar el Catálogo (Productos).
     Incluye subida de imágenes a ImgBB y registro en Bitácora.
     """
-    queryset = Catalogo.objects.all().order_by('-fecha_creacion')
+    queryset = (
+        Catalogo.objects.all()
+        .select_related('marca', 'categoria', 'imagen')
+        .prefetch_related('contadores_stock')
+        .defer('search_vector')
+        .order_by('-fecha_creacion')
+    )
     serializer_class = CatalogoSerializer
+    recursos_cache = ('catalogo',)
 
-    filter_backends = [filters.SearchFilter]
+    # Búsqueda full-text en PostgreSQL (fallback LIKE en SQLite), ver catalogo/busqueda.py
+    # ?ordering=-popularidad (más vendidos) | precio | -precio; sin ?ordering se usa get_cursor_ordering
+    filter_backends = [BusquedaCatalogoFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'marca__nombre', 'categoria__nombre', 'sku', 'descripcion']
+    ordering_fields = ['popularidad', 'precio']
+    cursor_ordering = ('-fecha_creacion', '-id')
+
+    def get_cursor_ordering(self, request):
+        """
+        Con búsqueda full-text en PostgreSQL se pagina por relevancia (ver buscar_catalogo);
+        el historial de precios y las eliminaciones, de la más reciente a la más antigua.
+        """
+        termino = request.query_params.get(BusquedaCatalogoFilter.search_param, '').strip()
+        if self.action == 'historial_precios':
+            return ('-vigente_desde', '-id')
+        if self.action == 'eliminaciones':
+            return ('-fecha_creacion', '-id')
+        if termino and connection.vendor == 'postgresql':
+            return ('-relevancia', '-id')
+        return self.cursor_ordering
+
+    def get_queryset(self):
+        """
+        Filtros opcionales (los mismos que usa /facets/):
+        ?marca=<id>&categoria=<id>&estado=activo&precio_min=100&precio_max=500&en_stock=true
+        """
+        queryset = super().get_queryset()
+        params = self.request.query_params
+
+        marca_id = params.get('marca', None)
+        if marca_id:
+            queryset = queryset.filter(marca_id=marca_id)
+
+        categoria_id = params.get('categoria', None)
+        if categoria_id:
+            queryset = queryset.filter(categoria_id=categoria_id)
+
+        estado = params.get('estado', None)
+        if estado:
+            queryset = queryset.filter(estado=estado)
+
+        for param, lookup in (('precio_min', 'precio__gte'), ('precio_max', 'precio__lte')):
+            valor = params.get(param, None)
+            if valor:
+                try:
+                    queryset = queryset.filter(**{lookup: Decimal(valor)})
+                except InvalidOperation:
+                    raise ValidationError({param: "Debe ser un número"})
+
+        stock = params.get('en_stock', None)
+        if stock in ('true', 'false'):
+            queryset = queryset.filter(en_stock()) if stock == 'true' else queryset.exclude(en_stock())
+
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Conteos para la barra de filtros con la búsqueda y filtros actuales.
+        Ruta: GET /api/catalogo/facets/?search=laptop&categoria=2
+        Se cachea por versión del catálogo y URL, igual que list/retrieve.
+        """
+        return self.responder_con_cache(request, self.calcular_facetas)
+
+    def calcular_facetas(self, request):
+        return Response(calcular_facetas(self.filter_queryset(self.get_queryset())))
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        """
+        Importación masiva (upsert por SKU) desde un archivo CSV o NDJSON.
+        Ruta: POST /api/catalogo/importar/  (multipart: archivo=<archivo>, formato=csv|ndjson opcional)
+        Devuelve el resumen con los errores por fila. Ver catalogo/importacion.py.
+        """
+        archivo = request.FILES.get('archivo')
+        if not archivo:
+            return Response({"error": "Debe enviar el archivo en el campo 'archivo'"}, status=status.HTTP_400_BAD_REQUEST)
+        formato = request.data.get('formato') or detectar_formato(archivo.name or '')
+        if formato not in ('csv', 'ndjson'):
+            return Response({"error": "formato debe ser csv o ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+
+        flujo = io.TextIOWrapper(archivo.file, encoding='utf-8-sig', newline='')
+        try:
+            resumen = ImportadorCatalogo(usuario=request.user).importar(leer_filas(flujo, formato))
+        except UnicodeDecodeError:
+            return Response({"error": "El archivo debe estar en UTF-8"}, status=status.HTTP_400_BAD_REQUEST)
 
-    # --- LÓGICA DE IMG BB (adaptada de VehiculoViewSet) ---
+        registrar_bitacora(
+            request=self.request,
+            usuario=self.request.user,
+            accion="IMPORTAR CATALOGO",
+            descripcion=describir_resumen(resumen, archivo.name),
+            modulo="Catalogo"
+        )
+        return Response(resumen)
+
+    @action(detail=False, methods=['post'])
+    def ajustar_precios(self, request):
+        """
+        Ajuste porcentual de precios de una categoría y/o marca (ej: +8%).
+        Ruta: POST /api/catalogo/ajustar_precios/
+        Body: {"porcentaje": "8", "categoria_id": 2}  o  {"porcentaje": "-5", "marca_id": 3}
+        Un solo UPDATE y un solo INSERT en el historial de precios (ver catalogo/precios.py).
+        """
+        serializer = AjustePreciosSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        categoria = datos.get('categoria_id')
+        marca = datos.get('marca_id')
+
+        try:
+            resultado = ajustar_precios(
+                datos['porcentaje'],
+                categoria_id=categoria.pk if categoria else None,
+                marca_id=marca.pk if marca else None,
+                usuario=request.user,
+            )
+        except AjusteFueraDeRango as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        filtros = []
+        if categoria:
+            filtros.append(f"categoría '{categoria.nombre}'")
+        if marca:
+            filtros.append(f"marca '{marca.nombre}'")
+        registrar_bitacora(
+            request=self.request,
+            usuario=self.request.user,
+            accion="AJUSTE MASIVO PRECIOS",
+            descripcion=(
+                f"Precios ajustados {datos['porcentaje']}% para {' y '.join(filtros)}: "
+                f"{resultado['actualizados']} productos"
+            ),
+            modulo="Catalogo"
+        )
+        return Response(resultado)
+
+    @action(detail=True, methods=['get'])
+    def historial_precios(self, request, pk=None):
+        """
+        Historial de precios del producto, del más reciente al más antiguo.
+        Ruta: GET /api/catalogo/{id}/historial_precios/
+        Con ?fecha=2025-06-30T12:00:00 (o solo fecha, a las 00:00) devuelve el precio vigente a esa fecha.
+        """
+        catalogo = self.get_object()
+        fecha = request.query_params.get('fecha', None)
+        if fecha:
+            try:
+                valor = parse_datetime(fecha) or parse_date(fecha)
+            except ValueError:
+                valor = None
+            if valor is None:
+                return Response({"error": "fecha inválida; use YYYY-MM-DD o fecha-hora ISO 8601"}, status=status.HTTP_400_BAD_REQUEST)
+            if not isinstance(valor, datetime):
+                valor = datetime.combine(valor, time.min)
+            if timezone.is_naive(valor):
+                valor = timezone.make_aware(valor)
+            return Response({
+                'catalogo': catalogo.pk,
+                'fecha': valor,
+                'precio': precio_vigente(catalogo.pk, valor),
+            })
+
+        page = self.paginate_queryset(HistorialPrecio.objects.filter(catalogo=catalogo).select_related('usuario'))
+        serializer = HistorialPrecioSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='changes')
+    def cambios(self, request):
+        """
+        Sincronización incremental para las apps móviles y POS (ver catalogo/cambios.py).
+        Ruta: GET /api/catalogo/changes/?since=<cursor>&limit=500
+        Devuelve los catálogos e ítems de inventario creados o modificados (estado actual) y los
+        ids eliminados desde el cursor, más el cursor siguiente. Sin 'since' solo devuelve el
+        cursor actual: pedirlo ANTES de la descarga completa y sincronizar desde ahí.
+        Un cursor anterior a la retención del log (CATALOGO_CAMBIOS_RETENCION_DIAS) responde 410
+        con el cursor actual: repetir la descarga completa y seguir desde ese cursor.
+        """
+        since = request.query_params.get('since', None)
+        if not since:
+            return Response({
+                'cursor': cursor_actual(), 'hay_mas': False,
+                'catalogo': {'actualizados': [], 'eliminados': []},
+                'producto': {'actualizados': [], 'eliminados': []},
+            })
+        try:
+            limite = int(request.query_params.get('limit', settings.CATALOGO_CAMBIOS_LIMITE))
+        except ValueError:
+            return Response({"error": "limit debe ser un número entero"}, status=status.HTTP_400_BAD_REQUEST)
+        limite = max(1, min(limite, settings.CATALOGO_CAMBIOS_LIMITE))
+
+        try:
+            cambios, cursor, hay_mas = leer_cambios(since, limite)
+        except CursorVencido as e:
+            return Response({"error": str(e), "cursor": cursor_actual()}, status=status.HTTP_410_GONE)
+        except CursorInvalido as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'cursor': cursor,
+            'hay_mas': hay_mas,
+            'catalogo': self.serializar_cambios(cambios['catalogo'], self.queryset.all(), CatalogoSerializer),
+            'producto': self.serializar_cambios(
+                cambios['producto'], Producto.objects.select_related('catalogo__imagen'), ProductoSerializer
+            ),
+        })
+
+    def serializar_cambios(self, cambios, queryset, serializer_class):
+        vigentes = [id_ for id_, operacion in cambios.items() if operacion != 'baja']
+        objetos = list(queryset.filter(pk__in=vigentes)) if vigentes else []
+        encontrados = {objeto.pk for objeto in objetos}
+        return {
+            'actualizados': serializer_class(objetos, many=True, context=self.get_serializer_context()).data,
+            # Bajas y también modificaciones de objetos que ya se eliminaron
+            'eliminados': sorted(id_ for id_ in cambios if id_ not in encontrados),
+        }
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Sugerencias para la caja de búsqueda (tolera errores de tipeo en PostgreSQL).
+        Ruta: GET /api/catalogo/autocomplete/?q=lapto&limit=10
+        Devuelve solo id, nombre, sku e imagen_url (sin serializer ni stock).
+        """
+        try:
+            limite = int(request.query_params.get('limit', settings.CATALOGO_AUTOCOMPLETAR_LIMITE))
+        except ValueError:
+            return Response({"error": "limit debe ser un número entero"}, status=status.HTTP_400_BAD_REQUEST)
+        limite = max(1, min(limite, settings.CATALOGO_AUTOCOMPLETAR_LIMITE_MAX))
+
+        return Response(autocompletar_catalogo(request.query_params.get('q', ''), limite))
+
+    # --- SUBIDA DE IMAGEN (asíncrona, ver catalogo/imagenes.py) ---
 
     def create(self, request, *args, **kwargs):
         """
-        Sobrescribe el método CREATE para manejar la subida de imagen ANTES de crear.
+        Sobrescribe el método CREATE para separar el archivo de imagen ANTES de crear.
         """
-        # 1. Pasa la request al manejador de imagen
-        # 2. El manejador llama a 'super().create' (la acción original)
         return self.handle_image_upload(request, super().create)
 
     def update(self, request, *args, **kwargs):
         """
-        Sobrescribe el método UPDATE para manejar la subida de imagen ANTES de actualizar.
+        Sobrescribe el método UPDATE para separar el archivo de imagen ANTES de actualizar.
         """
-        # 1. Pasa la request al manejador de imagen
-        # 2. El manejador llama a 'super().update' (la acción original)
         return self.handle_image_upload(request, super().update, *args, **kwargs)
 
     def handle_image_upload(self, request, action, *args, **kwargs):
         """
-        Manejador que revisa, sube y reemplaza el archivo de imagen por una URL.
+        Si llega un archivo en 'imagen_url' lo aparta de los datos del serializer;
+        perform_create/perform_update lo dejan en el spool y el catálogo queda con
+        imagen_estado='pendiente' hasta que el worker lo suba al backend.
         """
         # IMPORTANTE: Usamos 'imagen_url' porque así se llama
         # el campo en tu CatalogoSerializer.
-        imagen_file = request.FILES.get("imagen_url")
-
-        if imagen_file:
-            # 1. SI HAY ARCHIVO: Subir a ImgBB
-            url = "https://api.imgbb.com/1/upload"
-            payload = {"key": settings.API_KEY_IMGBB}
-            files = {"image": imagen_file.read()}
-            response = requests.post(url, payload, files=files)
-
-            if response.status_code == 200:
-                # 2. ÉXITO: Reemplazar el archivo por la URL en la request
-                image_url = response.json()["data"]["url"]
-                data = request.data.copy()
-                data["imagen_url"] = image_url  # Reemplaza el archivo por la URL
-                request._full_data = data  # Sobrescribe la data de la request
-            else:
-                # 3. FALLO: Devolver error
-                return Response(
-                    {"error": "Error al subir imagen a ImgBB", "details": response.text}, 
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-        else:
-            # 4. SI NO HAY ARCHIVO (en un UPDATE):
+        self.imagen_pendiente = request.FILES.get("imagen_url")
+
+        if self.imagen_pendiente:
+            # Solo los campos de formulario (sin archivos); imagen_url se completa después
+            data = request.POST.copy()
+            data.pop("imagen_url", None)
+            request._full_data = data
+        elif request.method in ["PUT", "PATCH"]:
+            # SI NO HAY ARCHIVO (en un UPDATE):
             # Prevenir que la URL se borre si no se envía una nueva imagen
-            if request.method in ["PUT", "PATCH"]:
-                instance = self.get_object()
-                data = request.data.copy()
-                # Si 'imagen_url' no se envió en el formulario,
-                # reasignamos la URL que ya existía en la base de datos.
-                if not data.get("imagen_url"):
-                    data["imagen_url"] = instance.imagen_url
-                    request._full_data = data
-
-        # 5. Ejecutar la acción original (super().create o super().update)
+            instance = self.get_object()
+            data = request.data.copy()
+            # Si 'imagen_url' no se envió en el formulario,
+            # reasignamos la URL que ya existía en la base de datos.
+            if not data.get("imagen_url"):
+                data["imagen_url"] = instance.imagen_url
+                request._full_data = data
+
+        # Ejecutar la acción original (super().create o super().update)
         # DRF se encargará de llamar a perform_create o perform_update DESPUÉS de esto.
         return action(request, *args, **kwargs)
 
+    def encolar_imagen_pendiente(self, instance):
+        if getattr(self, 'imagen_pendiente', None):
+            encolar_imagen(instance, self.imagen_pendiente)
+
     # --- LÓGICA DE BITÁCORA (Tus métodos originales, sin cambios) ---
 
     def perform_create(self, serializer):
-        instance = serializer.save()
+        # Catálogo, imagen encolada, historial de precios y versión de caché: todo o nada
+        with transaction.atomic():
+            instance = serializer.save()
+            self.encolar_imagen_pendiente(instance)
+            HistorialPrecio.registrar([(instance.pk, instance.precio)], 'creacion', usuario=self.request.user)
+            incrementar_version('catalogo')
         
         # Obtenemos nombres para la bitácora
         marca_nombre = instance.marca.nombre if instance.marca else 'N/A'
@@ -181,15 +447,22 @@ class CatalogoViewSet(viewsets.ModelViewSet):
         )
 
     def perform_update(self, serializer):
-        # 1. Guardar estado original
-        instance = self.get_object()
-        nombre_orig = instance.nombre
-        precio_orig = instance.precio
-        marca_orig = instance.marca.nombre if instance.marca else 'N/A'
-        cat_orig = instance.categoria.nombre if instance.categoria else 'N/A'
-        
-        # 2. Guardar cambios
-        instance = serializer.save()
+        with transaction.atomic():
+            # 1. Guardar estado original (fila bloqueada: el historial compara contra este precio)
+            instance = Catalogo.objects.select_for_update().select_related('marca', 'categoria').get(
+                pk=serializer.instance.pk
+            )
+            nombre_orig = instance.nombre
+            precio_orig = instance.precio
+            marca_orig = instance.marca.nombre if instance.marca else 'N/A'
+            cat_orig = instance.categoria.nombre if instance.categoria else 'N/A'
+
+            # 2. Guardar cambios, historial de precios y versión de caché en la misma transacción
+            instance = serializer.save()
+            self.encolar_imagen_pendiente(instance)
+            if instance.precio != precio_orig:
+                HistorialPrecio.registrar([(instance.pk, instance.precio)], 'edicion', usuario=self.request.user)
+            incrementar_version('catalogo')
 
         # 3. Obtener nuevos valores
         marca_nueva = instance.marca.nombre if instance.marca else 'N/A'
@@ -220,28 +493,130 @@ class CatalogoViewSet(viewsets.ModelViewSet):
             modulo="Catalogo"
         )
 
-    def perform_destroy(self, instance):
-        nombre_producto = instance.nombre
-        sku_producto = instance.sku
-        instance.delete()
-        
-        registrar_bitacora(
-            request=self.request,
-            usuario=self.request.user,
-            accion="ELIMINAR PRODUCTO",
-            descripcion=f"Se eliminó el producto: '{nombre_producto}' (SKU: {sku_producto})",
-            modulo="Catalogo"
-        )
+    def destroy(self, request, *args, **kwargs):
+        """
+        Marca el producto como inactivo y deja el borrado de su inventario a un proceso en
+        segundo plano por lotes (ver catalogo/eliminacion.py). Responde 202 con la eliminación,
+        cuyo avance se consulta en /api/catalogo/eliminaciones/?id=<id>.
+        """
+        instance = self.get_object()
+        try:
+            eliminacion, creada = solicitar_eliminacion(instance, request.user)
+        except CatalogoConVentas as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if creada:
+            registrar_bitacora(
+                request=self.request,
+                usuario=self.request.user,
+                accion="ELIMINAR PRODUCTO",
+                descripcion=(
+                    f"Se solicitó eliminar el producto: '{instance.nombre}' (SKU: {instance.sku}); "
+                    f"{eliminacion.total_productos} items de inventario se borran en segundo plano"
+                ),
+                modulo="Catalogo"
+            )
+        return Response(EliminacionCatalogoSerializer(eliminacion).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'])
+    def eliminaciones(self, request):
+        """
+        Avance de las eliminaciones en segundo plano, de la más reciente a la más antigua.
+        Ruta: GET /api/catalogo/eliminaciones/?id=<id>&catalogo=<id>&estado=procesando
+        """
+        queryset = EliminacionCatalogo.objects.select_related('usuario')
+        for param, campo in (('id', 'id'), ('catalogo', 'catalogo_id'), ('estado', 'estado')):
+            valor = request.query_params.get(param, None)
+            if valor:
+                queryset = queryset.filter(**{campo: valor})
+        page = self.paginate_queryset(queryset)
+        serializer = EliminacionCatalogoSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 class ProductoViewSet(viewsets.ModelViewSet):
     """
     API endpoint para gestionar el Inventario Físico (Producto).
     """
-    queryset = Producto.objects.all().order_by('-fecha_ingreso')
+    queryset = Producto.objects.all().select_related('catalogo__imagen').order_by('-fecha_ingreso')
     serializer_class = ProductoSerializer
-    # (Aquí puedes añadir filtros para 'catalogo_id' si lo necesitas)
-    # filter_backends = [DjangoFilterBackend]
-    # filterset_fields = ['catalogo']
+    cursor_ordering = ('-fecha_ingreso', '-id')
+
+    def get_queryset(self):
+        """
+        Filtros opcionales: ?catalogo=<id>&estado=disponible&fecha_desde=2025-01-01&fecha_hasta=2025-01-31
+        (fecha_ingreso; acepta fecha o fecha-hora ISO). Usan el índice (catalogo, estado, fecha_ingreso).
+        """
+        queryset = super().get_queryset()
+        params = self.request.query_params
+
+        catalogo_id = params.get('catalogo', None)
+        if catalogo_id:
+            queryset = queryset.filter(catalogo_id=catalogo_id)
+
+        estado = params.get('estado', None)
+        if estado:
+            queryset = queryset.filter(estado=estado)
+
+        fecha_desde = params.get('fecha_desde', None)
+        if fecha_desde:
+            queryset = queryset.filter(fecha_ingreso__gte=self.parsear_fecha(fecha_desde, 'fecha_desde'))
+
+        fecha_hasta = params.get('fecha_hasta', None)
+        if fecha_hasta:
+            fecha = self.parsear_fecha(fecha_hasta, 'fecha_hasta')
+            if isinstance(fecha, datetime):
+                queryset = queryset.filter(fecha_ingreso__lte=fecha)
+            else:
+                # Solo fecha: incluye todo ese día (comparación por rango para usar el índice)
+                queryset = queryset.filter(fecha_ingreso__lt=self.inicio_del_dia(fecha + timedelta(days=1)))
+
+        return queryset
+
+    def parsear_fecha(self, valor, param):
+        try:
+            fecha = parse_date(valor) or parse_datetime(valor)
+        except ValueError:
+            fecha = None
+        if fecha is None:
+            raise ValidationError({param: "Formato inválido; use YYYY-MM-DD o fecha-hora ISO 8601"})
+        if isinstance(fecha, datetime):
+            return fecha if timezone.is_aware(fecha) else timezone.make_aware(fecha)
+        if param == 'fecha_desde':
+            return self.inicio_del_dia(fecha)
+        return fecha
+
+    def inicio_del_dia(self, dia):
+        return timezone.make_aware(datetime.combine(dia, time.min))
+
+    def get_cursor_ordering(self, request):
+        # /garantias/ pagina por fecha de vencimiento (índice de fecha_fin_garantia)
+        if self.action == 'garantias':
+            return ('fecha_fin_garantia', 'id')
+        return self.cursor_ordering
+
+    @action(detail=False, methods=['get'])
+    def garantias(self, request):
+        """
+        Ítems vendidos cuya garantía vence en los próximos N días (por defecto 30),
+        del vencimiento más próximo al más lejano.
+        Ruta: GET /api/productos/garantias/?vence_en_dias=30  (acepta también ?catalogo=<id>)
+        """
+        try:
+            dias = int(request.query_params.get('vence_en_dias', 30))
+        except ValueError:
+            return Response({"error": "vence_en_dias debe ser un número entero"}, status=status.HTTP_400_BAD_REQUEST)
+        if dias < 0:
+            return Response({"error": "vence_en_dias no puede ser negativo"}, status=status.HTTP_400_BAD_REQUEST)
+
+        ahora = timezone.now()
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            estado='vendido',
+            fecha_fin_garantia__gte=ahora,
+            fecha_fin_garantia__lte=ahora + timedelta(days=dias),
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     def perform_create(self, serializer):
         """Guardar item de inventario y registrar en bitácora"""
@@ -309,3 +684,75 @@ class ProductoViewSet(viewsets.ModelViewSet):
             descripcion=f"Se eliminó el item S/N: '{numero_serie_borrado}' (del Catálogo: '{catalogo_nombre}')",
             modulo="Inventario"
         )
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, MultiPartParser])
+    def ingreso(self, request):
+        """
+        Ingreso masivo de inventario (recepción de un envío).
+        Ruta: POST /api/productos/ingreso/
+        Body: {"catalogo_id": 1, "costo": "850.00", "numeros_serie": ["SN1", "SN2", ...]}
+              o multipart con 'archivo' (un número de serie por línea).
+        Los números ya registrados o repetidos se devuelven en 'duplicados' / 'repetidos'.
+        """
+        serializer = IngresoProductosSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        catalogo = datos['catalogo']
+
+        resultado = ingresar_productos(catalogo, datos['costo'], datos['numeros_serie'])
+
+        registrar_bitacora(
+            request=self.request,
+            usuario=self.request.user,
+            accion="INGRESO INVENTARIO (LOTE)",
+            descripcion=(
+                f"Se ingresaron {resultado['creados']} items al producto: '{catalogo.nombre}' "
+                f"(Costo: {datos['costo']}). Duplicados: {len(resultado['duplicados'])}, "
+                f"repetidos en el lote: {len(resultado['repetidos'])}"
+            ),
+            modulo="Inventario"
+        )
+        codigo = status.HTTP_201_CREATED if resultado['creados'] else status.HTTP_200_OK
+        return Response(resultado, status=codigo)
+
+    @action(detail=False, methods=['post'])
+    def cambiar_estado(self, request):
+        """
+        Cambio de estado masivo (ej: lote a 'en_reparacion' o 'dado_de_baja').
+        Ruta: POST /api/productos/cambiar_estado/
+        Body: {"estado": "dado_de_baja", "numeros_serie": [...]}
+              o {"estado": "en_reparacion", "catalogo_id": 3, "fecha_desde": "...", "estado_actual": "disponible"}
+        Un solo UPDATE por bloque; los ítems cuyo estado no permite la transición no se tocan
+        y se cuentan en 'no_permitidos'.
+        """
+        serializer = CambioEstadoMasivoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = dict(serializer.validated_data)
+        destino = datos.pop('estado')
+
+        resultado = cambiar_estado_masivo(destino, **datos)
+
+        registrar_bitacora(
+            request=self.request,
+            usuario=self.request.user,
+            accion="CAMBIO ESTADO INVENTARIO (LOTE)",
+            descripcion=(
+                f"{resultado['actualizados']} items pasaron a '{destino}' "
+                f"(desde: {resultado['por_estado_anterior'] or '-'}). "
+                f"No permitidos: {resultado['no_permitidos'] or '-'}"
+            ),
+            modulo="Inventario"
+        )
+        return Response(resultado)
+
+    @action(detail=False, methods=['post'])
+    def consultar_series(self, request):
+        """
+        Consulta por lote para los lectores de mesa de servicio: estado de venta y garantía
+        de varios números de serie en una sola petición (y una sola consulta).
+        Ruta: POST /api/productos/consultar_series/
+        Body: {"numeros_serie": ["SN1", "SN2", ...]}
+        """
+        serializer = ConsultaSeriesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(consultar_series(serializer.validated_data['numeros_serie']))
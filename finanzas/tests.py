@@ -1,3 +1,46 @@
 from django.test import TestCase
 
-# Create your tests here.
+from administracion.models import Cliente
+from catalogo.models import Catalogo, Producto, StockCatalogo
+from finanzas.views import StockInsuficiente, actualizar_stock_productos, completar_venta
+from ventas.models import DetalleVenta, Venta
+
+
+class ActualizarStockVentaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = Cliente.objects.create(nombre='Cliente')
+        cls.monitor = Catalogo.objects.create(sku='MON-01', nombre='Monitor', precio=100)
+        cls.mouse = Catalogo.objects.create(sku='MOU-01', nombre='Mouse', precio=10)
+        for i in range(3):
+            Producto.objects.create(catalogo=cls.monitor, numero_serie=f'MON-{i}', costo=50)
+        Producto.objects.create(catalogo=cls.mouse, numero_serie='MOU-0', costo=5)
+
+    def crear_venta(self, cantidad_mouse):
+        venta = Venta.objects.create(cliente=self.cliente, subtotal=210)
+        DetalleVenta.objects.create(venta=venta, catalogo=self.monitor, cantidad=2, precio_unitario=100)
+        DetalleVenta.objects.create(venta=venta, catalogo=self.mouse, cantidad=cantidad_mouse, precio_unitario=10)
+        return venta
+
+    def disponibles(self, catalogo):
+        return StockCatalogo.objects.get(catalogo=catalogo, estado='disponible').cantidad
+
+    def test_marca_los_items_vendidos(self):
+        actualizar_stock_productos(self.crear_venta(cantidad_mouse=1))
+        self.assertEqual(Producto.objects.filter(estado='vendido').count(), 3)
+        self.assertEqual(self.disponibles(self.monitor), 1)
+        self.assertEqual(self.disponibles(self.mouse), 0)
+
+    def test_stock_insuficiente_no_marca_nada(self):
+        with self.assertRaises(StockInsuficiente):
+            actualizar_stock_productos(self.crear_venta(cantidad_mouse=2))
+        self.assertFalse(Producto.objects.filter(estado='vendido').exists())
+        self.assertEqual(self.disponibles(self.monitor), 3)
+
+    def test_venta_sin_stock_queda_pendiente(self):
+        venta = self.crear_venta(cantidad_mouse=2)
+        with self.assertLogs('finanzas.views', 'ERROR'):
+            self.assertIsNotNone(completar_venta(venta))
+        venta.refresh_from_db()
+        self.assertEqual(venta.estado, 'pendiente')
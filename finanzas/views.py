@@ -7,6 +7,8 @@ from rest_framework.response import Response
 from rest_framework import permissions, status, viewsets
 from django.conf import settings
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.utils import timezone
 from decimal import Decimal
 import stripe
 import logging
@@ -29,44 +31,68 @@ stripe.api_key = settings.STRIPE_SECRET_KEY
 # FUNCIONES AUXILIARES
 # ============================================
 
+class StockInsuficiente(Exception):
+    """No hay suficientes ítems disponibles para cubrir un detalle de la venta."""
+
+
 def actualizar_stock_productos(venta):
     """
     Actualiza el stock de productos cuando se completa una venta.
     Marca productos como 'vendido' según la cantidad vendida.
+    Los contadores de StockCatalogo se ajustan en la misma transacción (Producto.save).
+    Si algún detalle no tiene ítems suficientes lanza StockInsuficiente y no se marca nada.
     """
     from catalogo.models import Producto
     
-    try:
+    with transaction.atomic():
         # Iterar sobre los detalles de la venta
-        for detalle in venta.detalles.all():
+        for detalle in venta.detalles.select_related('catalogo'):
             catalogo = detalle.catalogo
             cantidad_vendida = detalle.cantidad
             
             logger.info(f"📦 Actualizando stock: {catalogo.nombre} - Cantidad: {cantidad_vendida}")
             
-            # Obtener productos disponibles del catálogo
-            productos_disponibles = Producto.objects.filter(
+            # Obtener productos disponibles del catálogo (FIFO), bloqueándolos
+            # para que dos ventas simultáneas no tomen el mismo ítem
+            productos_disponibles = list(Producto.objects.select_for_update().filter(
                 catalogo=catalogo,
                 estado='disponible'
-            ).order_by('fecha_ingreso')[:cantidad_vendida]
+            ).order_by('fecha_ingreso')[:cantidad_vendida])
+            
+            if len(productos_disponibles) < cantidad_vendida:
+                raise StockInsuficiente(
+                    f"Solo hay {len(productos_disponibles)}/{cantidad_vendida} unidades disponibles de {catalogo.nombre}"
+                )
             
-            # Marcar productos como vendidos
-            productos_actualizados = 0
+            # Marcar productos como vendidos (fecha_venta define el fin de la garantía)
+            ahora = timezone.now()
             for producto in productos_disponibles:
+                producto.catalogo = catalogo
                 producto.estado = 'vendido'
-                producto.save(update_fields=['estado'])
-                productos_actualizados += 1
+                producto.fecha_venta = ahora
+                producto.save(update_fields=['estado', 'fecha_venta'])
                 logger.info(f"✅ Producto {producto.numero_serie} marcado como vendido")
             
-            if productos_actualizados < cantidad_vendida:
-                logger.warning(f"⚠️ Solo se pudieron marcar {productos_actualizados}/{cantidad_vendida} productos como vendidos para {catalogo.nombre}")
-            else:
-                logger.info(f"✅ Stock actualizado: {productos_actualizados} productos de {catalogo.nombre} marcados como vendidos")
-                
-    except Exception as e:
-        logger.error(f"❌ Error al actualizar stock: {str(e)}")
-        import traceback
-        logger.error(traceback.format_exc())
+            logger.info(f"✅ Stock actualizado: {cantidad_vendida} productos de {catalogo.nombre} marcados como vendidos")
+
+
+def completar_venta(venta):
+    """
+    Marca la venta como completada y descuenta su stock en una sola transacción.
+    Devuelve None o, si no hay stock suficiente, el mensaje de error: el pago ya se cobró,
+    así que la venta queda 'pendiente' para revisarla a mano.
+    """
+    try:
+        with transaction.atomic():
+            venta.estado = 'completada'
+            venta.save(update_fields=['estado'])
+            actualizar_stock_productos(venta)
+    except StockInsuficiente as e:
+        venta.estado = 'pendiente'
+        logger.error(f"❌ Venta #{venta.id} pagada sin stock suficiente: {e}")
+        return str(e)
+    logger.info(f"✅ Venta #{venta.id} marcada como completada")
+    return None
 
 
 # ============================================
@@ -383,30 +409,29 @@ class ConfirmPaymentWithCardVenta(APIView):
             logger.info(f"✅ Payment Intent confirmado: {status_pi}")
             
             # Si el pago fue exitoso, actualizar el registro en BD
+            error_stock = None
             if status_pi == "succeeded":
                 pago = Pago.objects.filter(transaccion_id=pi_id).first()
                 if pago:
                     pago.estado = 'completado'
                     pago.save(update_fields=['estado'])
                     
-                    # Actualizar estado de la venta
+                    # Completar la venta y marcar sus productos como vendidos
                     if pago.venta:
-                        pago.venta.estado = 'completada'
-                        pago.venta.save(update_fields=['estado'])
-                        logger.info(f"✅ Venta #{pago.venta.id} marcada como completada")
-                        
-                        # Actualizar stock de productos (marcar como vendidos)
-                        actualizar_stock_productos(pago.venta)
+                        error_stock = completar_venta(pago.venta)
                     
                     logger.info(f"✅ Pago #{pago.id} marcado como completado")
             
-            return Response({
+            respuesta = {
                 "success": True,
                 "status": status_pi,
                 "payment_intent_id": pi_id,
                 "payment_method_id": payment_method_id,
                 "message": "Pago procesado exitosamente"
-            }, status=status.HTTP_200_OK)
+            }
+            if error_stock:
+                respuesta["advertencia"] = f"Pago cobrado pero la venta quedó pendiente: {error_stock}"
+            return Response(respuesta, status=status.HTTP_200_OK)
             
         except stripe.StripeError as e:
             error_message = getattr(e, 'user_message', None) or str(e)
@@ -467,18 +492,14 @@ class VerifyPaymentIntentVenta(APIView):
                 }, status=status.HTTP_404_NOT_FOUND)
             
             # Si el pago fue exitoso, actualizar
+            error_stock = None
             if status_pi == "succeeded" and pago.estado != 'completado':
                 pago.estado = 'completado'
                 pago.save(update_fields=['estado'])
                 
-                # Actualizar estado de la venta
+                # Completar la venta y marcar sus productos como vendidos
                 if pago.venta and pago.venta.estado != 'completada':
-                    pago.venta.estado = 'completada'
-                    pago.venta.save(update_fields=['estado'])
-                    logger.info(f"✅ Venta #{pago.venta.id} marcada como completada")
-                    
-                    # Actualizar stock de productos (marcar como vendidos)
-                    actualizar_stock_productos(pago.venta)
+                    error_stock = completar_venta(pago.venta)
                 
                 logger.info(f"✅ Pago #{pago.id} confirmado exitosamente")
             
@@ -489,12 +510,15 @@ class VerifyPaymentIntentVenta(APIView):
             # Serializar el pago
             pago_data = PagoStripeSerializer(pago).data
             
-            return Response({
+            respuesta = {
                 "status": status_pi,
                 "venta_id": venta_id,
                 "pago": pago_data,
                 "message": f"Pago en estado: {status_pi}"
-            }, status=status.HTTP_200_OK)
+            }
+            if error_stock:
+                respuesta["advertencia"] = f"Pago cobrado pero la venta quedó pendiente: {error_stock}"
+            return Response(respuesta, status=status.HTTP_200_OK)
             
         except stripe.StripeError as e:
             error_message = str(e)
@@ -563,6 +587,7 @@ class PagoStripeViewSet(viewsets.ReadOnlyModelViewSet):
     ViewSet de solo lectura para consultar pagos realizados (Admin)
     """
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-fecha_pago', '-id')
     
     def get_queryset(self):
         """Retorna pagos filtrados"""
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class VentasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ventas'
+
+    def ready(self):
+        # Con el carrito en caché, una caché no compartida o que desaloja claves pierde carritos
+        from ventas.carrito import validar_configuracion
+        validar_configuracion()
@@ -0,0 +1,730 @@
+"""
+Almacén del carrito de compras detrás de CartViewSet.
+
+El almacén activo se elige con settings.CARRITO_ALMACEN (ruta a la clase):
+
+- AlmacenCarritoBase: cada operación lee y escribe Cart / CartItem en la base.
+- AlmacenCarritoCache: el carrito vivo está en la caché CACHES['carritos'] (separada de la de
+  respuestas) y las operaciones no escriben en la base.
+  Los carritos modificados se persisten en Cart / CartItem en segundo plano: un hilo del proceso
+  tras CARRITO_PERSISTENCIA_RETARDO segundos (CARRITO_PERSISTENCIA_MODO='hilo') o el comando
+  `python manage.py persistir_carritos` (cron); las claves a persistir se anotan en un conjunto
+  de Redis. El checkout llama a persistir() antes de crear la venta, así que la venta sale
+  siempre de lo que el cliente ve en su carrito.
+  En este almacén el id de cada ítem es el id de su catálogo (la línea puede no existir aún en
+  la base). La caché debe ser compartida entre workers y no desalojar claves antes de que se
+  persistan: solo se acepta RedisCache (con maxmemory-policy noeviction); validar_configuracion()
+  corta el arranque con cualquier otro backend.
+
+Los visitantes anónimos tienen carrito con un token (cabecera X-Cart-Token) que se entrega al
+agregar el primer producto; si un usuario autenticado envía el token, ese carrito se fusiona
+con el suyo. Los carritos se crean con la primera escritura: leer un carrito que no existe
+(ej. un token desconocido) no crea nada y devuelve None.
+"""
+import functools
+import logging
+import re
+import secrets
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Prefetch, Sum, Value, prefetch_related_objects
+from django.db.models.functions import Least
+from django.utils import timezone
+from django.utils.connection import ConnectionProxy
+from django.utils.module_loading import import_string
+
+from catalogo.models import Catalogo
+from ventas.models import Cart, CartItem
+
+logger = logging.getLogger(__name__)
+
+CACHE_CARRITOS = 'carritos'
+# Igual que django.core.cache.cache pero sobre CACHES['carritos']
+cache = ConnectionProxy(caches, CACHE_CARRITOS)
+
+# Carritos con cambios sin persistir: conjunto de Redis (SADD / SPOP) en CACHES['carritos']
+PENDIENTES = 'carrito:pendientes'
+BLOQUEO_TIMEOUT = 30  # segundos; un bloqueo de un proceso que murió se libera solo
+BLOQUEO_ESPERA = 5
+CANTIDAD_MAXIMA = 32767  # tope de CartItem.quantity (PositiveSmallIntegerField = smallint en PostgreSQL)
+
+
+class CarritoOcupado(Exception):
+    """Otra petición tiene tomado el carrito y no se liberó a tiempo."""
+
+
+class VersionDesactualizada(Exception):
+    """El cliente envió una versión del carrito que ya no es la actual (concurrencia optimista)."""
+
+    def __init__(self, actual):
+        super().__init__(f"El carrito cambió (versión actual: {actual}); recárguelo e intente de nuevo")
+        self.actual = actual
+
+
+def items_para_mostrar():
+    """
+    Ítems con todo lo que anida CatalogoSerializer: un JOIN con catálogo, marca, categoría e
+    imagen y una consulta para los contadores de stock, sin importar cuántos ítems haya.
+    """
+    return (
+        CartItem.objects
+        .select_related('catalogo__marca', 'catalogo__categoria', 'catalogo__imagen')
+        .prefetch_related('catalogo__contadores_stock')
+        .order_by('id')
+    )
+
+
+def obtener_almacen(usuario=None, token=None):
+    return import_string(settings.CARRITO_ALMACEN)(usuario=usuario, token=token)
+
+
+def nuevo_token():
+    return uuid.uuid4().hex
+
+
+def token_valido(token):
+    return bool(token) and re.fullmatch(r'[0-9a-f]{32}', token) is not None
+
+
+def aplicar_operaciones(lineas, operaciones):
+    """
+    Aplica en orden operaciones {'op': 'add' | 'set' | 'remove', 'catalogo_id', 'quantity'} sobre
+    {catalogo_id: cantidad} y devuelve el resultado sin modificar `lineas`. 'set' con 0 quita la línea.
+    """
+    resultado = dict(lineas)
+    for operacion in operaciones:
+        catalogo_id = operacion['catalogo_id']
+        if operacion['op'] == 'add':
+            resultado[catalogo_id] = min(resultado.get(catalogo_id, 0) + operacion['quantity'], CANTIDAD_MAXIMA)
+        elif operacion['op'] == 'set' and operacion['quantity'] > 0:
+            resultado[catalogo_id] = operacion['quantity']
+        else:
+            resultado.pop(catalogo_id, None)
+    return resultado
+
+
+def sumar_item(cart_id, catalogo_id, cantidad):
+    """
+    Suma `cantidad` a la línea (cart, catalogo), la crea si no existe y sube la versión del
+    carrito. La cantidad queda topada en CANTIDAD_MAXIMA. Devuelve la nueva versión.
+    Lanza Catalogo.DoesNotExist.
+
+    En PostgreSQL es una sola sentencia: un CTE con INSERT ... SELECT ... ON CONFLICT DO UPDATE
+    (el SELECT valida el catálogo y la suma la hace la base) y el UPDATE de version/updated_at
+    del carrito, que solo se aplica si hubo línea. Dos peticiones simultáneas (doble clic) no
+    pierden ninguna suma ni chocan con unique_together (cart, catalogo).
+    SQLite no admite INSERT dentro de WITH: el mismo upsert y el UPDATE del carrito van en dos
+    sentencias dentro de una transacción (SQLite ya serializa las escrituras).
+    En otros motores: UPDATE con F() y, si no había línea, INSERT; si otra petición la creó
+    en el medio, se vuelve a sumar con UPDATE.
+    """
+    tabla_item = CartItem._meta.db_table
+    tabla_cart = Cart._meta.db_table
+    cart_db = Cart._meta.pk.get_db_prep_value(cart_id, connection)
+    ahora = Cart._meta.get_field('updated_at').get_db_prep_value(timezone.now(), connection)
+    upsert = f"""
+        INSERT INTO {tabla_item} (cart_id, catalogo_id, quantity)
+        SELECT %s, id, %s FROM {Catalogo._meta.db_table} WHERE id = %s
+        ON CONFLICT (cart_id, catalogo_id)
+        DO UPDATE SET quantity = {{minimo}}({tabla_item}.quantity + excluded.quantity, %s)
+        RETURNING id
+    """
+    parametros = [cart_db, min(cantidad, CANTIDAD_MAXIMA), catalogo_id, CANTIDAD_MAXIMA]
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                WITH linea AS ({upsert.format(minimo='LEAST')})
+                UPDATE {tabla_cart} SET version = version + 1, updated_at = %s
+                WHERE id = %s AND EXISTS (SELECT 1 FROM linea)
+                RETURNING version
+            """, parametros + [ahora, cart_db])
+            fila = cursor.fetchone()
+        if fila is None:
+            raise Catalogo.DoesNotExist(f"No existe el catálogo {catalogo_id}")
+        return fila[0]
+
+    if connection.vendor == 'sqlite' and connection.features.can_return_columns_from_insert:
+        with transaction.atomic(), connection.cursor() as cursor:
+            # MIN con dos argumentos es la función escalar de SQLite (equivale a LEAST)
+            cursor.execute(upsert.format(minimo='MIN'), parametros)
+            if cursor.fetchone() is None:
+                raise Catalogo.DoesNotExist(f"No existe el catálogo {catalogo_id}")
+            cursor.execute(
+                f"UPDATE {tabla_cart} SET version = version + 1, updated_at = %s WHERE id = %s RETURNING version",
+                [ahora, cart_db],
+            )
+            return cursor.fetchone()[0]
+
+    suma = Least(F('quantity') + cantidad, Value(CANTIDAD_MAXIMA))
+    with transaction.atomic():
+        linea = CartItem.objects.filter(cart_id=cart_id, catalogo_id=catalogo_id)
+        if not linea.update(quantity=suma):
+            if not Catalogo.objects.filter(pk=catalogo_id).exists():
+                raise Catalogo.DoesNotExist(f"No existe el catálogo {catalogo_id}")
+            try:
+                with transaction.atomic():
+                    CartItem.objects.create(
+                        cart_id=cart_id, catalogo_id=catalogo_id, quantity=min(cantidad, CANTIDAD_MAXIMA)
+                    )
+            except IntegrityError:
+                linea.update(quantity=suma)
+        carrito = Cart.objects.filter(pk=cart_id)
+        carrito.update(version=F('version') + 1, updated_at=timezone.now())
+        return carrito.values_list('version', flat=True).get()
+
+
+def sincronizar_items(cart, existentes, lineas):
+    """
+    Lleva los CartItem `existentes` ({catalogo_id: CartItem}) a `lineas` ({catalogo_id: cantidad})
+    con a lo sumo un DELETE, un bulk_update y un bulk_create.
+    Devuelve (catalogo_ids creados o modificados, pks de los ítems eliminados).
+    """
+    eliminados = [item.pk for catalogo_id, item in existentes.items() if catalogo_id not in lineas]
+    if eliminados:
+        CartItem.objects.filter(pk__in=eliminados).delete()
+    cambiados = []
+    for catalogo_id, cantidad in lineas.items():
+        item = existentes.get(catalogo_id)
+        if item is not None and item.quantity != cantidad:
+            item.quantity = cantidad
+            cambiados.append(item)
+    CartItem.objects.bulk_update(cambiados, ['quantity'])
+    # Si un add_item concurrente creó la línea entretanto, se sobrescribe en lugar de fallar
+    conflictos = {}
+    if connection.features.supports_update_conflicts_with_target:
+        conflictos = {'update_conflicts': True, 'unique_fields': ['cart', 'catalogo'], 'update_fields': ['quantity']}
+    nuevos = CartItem.objects.bulk_create([
+        CartItem(cart=cart, catalogo_id=catalogo_id, quantity=cantidad)
+        for catalogo_id, cantidad in lineas.items() if catalogo_id not in existentes
+    ], **conflictos)
+    return [item.catalogo_id for item in cambiados + nuevos], eliminados
+
+
+# Borra la clave solo si todavía guarda el token de quien la tomó
+LIBERAR_BLOQUEO_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+@contextmanager
+def bloqueo(clave):
+    """
+    Exclusión mutua entre procesos: cache.add es atómico en locmem y Redis. La clave guarda un
+    token propio y al salir solo se borra si sigue siendo ese token: si el bloqueo venció y otro
+    proceso lo tomó, no se le quita.
+    """
+    nombre = f'{clave}:bloqueo'
+    # Entero: RedisCache lo guarda sin serializar y el script Lua lo compara como texto
+    token = secrets.randbits(62)
+    limite = time.monotonic() + BLOQUEO_ESPERA
+    while not cache.add(nombre, token, timeout=BLOQUEO_TIMEOUT):
+        if time.monotonic() > limite:
+            raise CarritoOcupado("El carrito se está actualizando, intente de nuevo")
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        liberar_bloqueo(nombre, token)
+
+
+def cliente_redis():
+    """
+    Cliente de redis-py del servidor de escritura de CACHES['carritos'] (el primero de LOCATION,
+    igual que RedisCache), o None si el alias no es RedisCache. Se usa para las operaciones que
+    la API de caché no ofrece (scripts Lua, conjuntos).
+    """
+    if not isinstance(caches[CACHE_CARRITOS], RedisCache):
+        return None
+    ubicacion = settings.CACHES[CACHE_CARRITOS]['LOCATION']
+    servidores = ubicacion if isinstance(ubicacion, (list, tuple)) else ubicacion.split(',')
+    return _conectar_redis(servidores[0].strip())
+
+
+@functools.cache
+def _conectar_redis(url):
+    # Import diferido como en RedisCache: redis solo hace falta con ese backend
+    import redis
+    return redis.Redis.from_url(url)
+
+
+def liberar_bloqueo(nombre, token):
+    cliente = cliente_redis()
+    if cliente is not None:
+        # Comparar y borrar en una sola operación del servidor
+        clave = cache.make_and_validate_key(nombre)
+        cliente.eval(LIBERAR_BLOQUEO_LUA, 1, clave, token)
+    elif cache.get(nombre) == token:
+        # locmem (un solo proceso, pruebas): no hay otro proceso que lo tome entre get y delete
+        cache.delete(nombre)
+
+
+def validar_configuracion():
+    """
+    Con AlmacenCarritoCache los carritos solo viven en la caché hasta persistirse: se exige el
+    alias CACHES['carritos'] con un backend compartido entre procesos que no descarte claves por
+    su cuenta (locmem, archivos y base de datos las podan al llegar a MAX_ENTRIES; Memcached
+    desaloja por LRU). Se llama al arrancar (VentasConfig.ready).
+    """
+    if import_string(settings.CARRITO_ALMACEN) is not AlmacenCarritoCache:
+        return
+    if CACHE_CARRITOS not in settings.CACHES:
+        raise ImproperlyConfigured(f"AlmacenCarritoCache requiere CACHES['{CACHE_CARRITOS}']")
+    backend = settings.CACHES[CACHE_CARRITOS]['BACKEND']
+    if import_string(backend) is not RedisCache:
+        raise ImproperlyConfigured(
+            f"AlmacenCarritoCache requiere CACHES['{CACHE_CARRITOS}'] con "
+            f"django.core.cache.backends.redis.RedisCache (configurado: {backend})"
+        )
+
+
+class AlmacenCarrito:
+    """
+    Interfaz común. Cada instancia representa el carrito de un usuario autenticado o,
+    si no hay usuario, el de un token anónimo.
+    """
+
+    def __init__(self, usuario=None, token=None):
+        self.usuario = usuario if usuario is not None and usuario.is_authenticated else None
+        self.token = None if self.usuario else token
+        if self.usuario is None and not self.token:
+            raise ValueError("El carrito necesita un usuario autenticado o un token")
+
+    def dueno(self):
+        """Filtro de Cart que identifica a este carrito en la base."""
+        if self.usuario:
+            return {'user': self.usuario}
+        return {'user': None, 'token': self.token}
+
+    def obtener(self):
+        """Cart con sus ítems precargados, listo para CartSerializer; None si todavía no existe."""
+        raise NotImplementedError
+
+    def agregar(self, catalogo_id, cantidad):
+        """Suma `cantidad` a la línea del catálogo. Lanza Catalogo.DoesNotExist."""
+        raise NotImplementedError
+
+    def actualizar(self, item_id, cantidad):
+        """Fija la cantidad de un ítem (0 o menos lo quita). Lanza CartItem.DoesNotExist."""
+        raise NotImplementedError
+
+    def quitar(self, item_id):
+        """Quita un ítem. Lanza CartItem.DoesNotExist."""
+        raise NotImplementedError
+
+    def vaciar(self):
+        raise NotImplementedError
+
+    def persistir(self):
+        """Deja el carrito completo en Cart / CartItem y devuelve el Cart (None si no existe)."""
+        raise NotImplementedError
+
+    def fusionar(self, token):
+        """Pasa los ítems del carrito anónimo `token` a este carrito y elimina aquel."""
+        raise NotImplementedError
+
+    def aplicar_lote(self, operaciones, version=None):
+        """
+        Aplica las operaciones (ver aplicar_operaciones) de forma atómica: todas o ninguna.
+        Con `version`, lanza VersionDesactualizada si el carrito ya no está en esa versión.
+        Devuelve {'version', 'items': CartItem creados o modificados, 'eliminados': ids de ítem,
+        'total_price', 'total_items'}.
+        """
+        raise NotImplementedError
+
+
+class AlmacenCarritoBase(AlmacenCarrito):
+    """Lee y escribe Cart / CartItem directamente en cada operación."""
+
+    _cart = None
+
+    def carrito(self, crear=True):
+        """Cart del dueño; solo las escrituras lo crean (con crear=False devuelve None si no existe)."""
+        if self._cart is None:
+            if crear:
+                self._cart, _ = Cart.objects.get_or_create(**self.dueno())
+            else:
+                self._cart = Cart.objects.filter(**self.dueno()).first()
+        return self._cart
+
+    def carrito_existente(self):
+        cart = self.carrito(crear=False)
+        if cart is None:
+            raise CartItem.DoesNotExist("El carrito está vacío")
+        return cart
+
+    def obtener(self):
+        cart = self.carrito(crear=False)
+        if cart is not None:
+            prefetch_related_objects([cart], Prefetch('items', queryset=items_para_mostrar()))
+        return cart
+
+    def tocar(self):
+        """Nueva versión del carrito tras una modificación."""
+        cart = self.carrito()
+        Cart.objects.filter(pk=cart.pk).update(version=F('version') + 1, updated_at=timezone.now())
+        cart.version += 1
+
+    def agregar(self, catalogo_id, cantidad):
+        cart = self.carrito()
+        cart.version = sumar_item(cart.pk, catalogo_id, cantidad)
+
+    def actualizar(self, item_id, cantidad):
+        cart_item = CartItem.objects.get(pk=item_id, cart=self.carrito_existente())
+        if cantidad > 0:
+            cart_item.quantity = cantidad
+            cart_item.save()
+        else:
+            cart_item.delete()
+        self.tocar()
+
+    def quitar(self, item_id):
+        CartItem.objects.get(pk=item_id, cart=self.carrito_existente()).delete()
+        self.tocar()
+
+    def vaciar(self):
+        cart = self.carrito(crear=False)
+        if cart is None:
+            return
+        cart.items.all().delete()
+        self.tocar()
+
+    def persistir(self):
+        return self.carrito(crear=False)
+
+    def fusionar(self, token):
+        anonimo = Cart.objects.filter(user=None, token=token).first()
+        if anonimo is None:
+            return
+        with transaction.atomic():
+            for catalogo_id, cantidad in anonimo.items.values_list('catalogo_id', 'quantity'):
+                self.agregar(catalogo_id, cantidad)
+            anonimo.delete()
+
+    def aplicar_lote(self, operaciones, version=None):
+        cart = self.carrito()
+        with transaction.atomic():
+            # El bloqueo de la fila serializa los lotes concurrentes del mismo carrito
+            actual = Cart.objects.select_for_update().values_list('version', flat=True).get(pk=cart.pk)
+            if version is not None and version != actual:
+                raise VersionDesactualizada(actual)
+
+            ids = {operacion['catalogo_id'] for operacion in operaciones}
+            existentes = {item.catalogo_id: item for item in CartItem.objects.filter(cart=cart, catalogo_id__in=ids)}
+            lineas = aplicar_operaciones({catalogo_id: item.quantity for catalogo_id, item in existentes.items()}, operaciones)
+            cambiados, eliminados = sincronizar_items(cart, existentes, lineas)
+            if cambiados or eliminados:
+                actual += 1
+                Cart.objects.filter(pk=cart.pk).update(version=actual, updated_at=timezone.now())
+
+        items = list(items_para_mostrar().filter(cart=cart, catalogo_id__in=cambiados)) if cambiados else []
+        totales = cart.items.aggregate(
+            total_price=Sum(F('quantity') * F('catalogo__precio')), total_items=Sum('quantity')
+        )
+        return {
+            'version': actual,
+            'items': items,
+            'eliminados': eliminados,
+            'total_price': totales['total_price'] or Decimal('0'),
+            'total_items': totales['total_items'] or 0,
+        }
+
+
+class AlmacenCarritoCache(AlmacenCarrito):
+    """
+    Carrito vivo en la caché con persistencia diferida (ver el docstring del módulo).
+
+    Estado guardado en la caché:
+        {'id', 'usuario_id', 'token', 'lineas': {catalogo_id: cantidad},
+         'version', 'persistida', 'creado', 'actualizado'}
+    'version' aumenta con cada modificación; 'persistida' es la última versión escrita en la base.
+    """
+
+    def clave(self):
+        if self.usuario:
+            return f'carrito:u:{self.usuario.pk}'
+        return f'carrito:t:{self.token}'
+
+    def cargar_de_base(self):
+        """Estado inicial desde Cart / CartItem; None si el carrito no está en la base."""
+        cart = Cart.objects.filter(**self.dueno()).order_by('created_at').first()
+        if cart is None:
+            return None
+        return {
+            'id': str(cart.pk),
+            'usuario_id': self.usuario.pk if self.usuario else None,
+            'token': self.token,
+            'lineas': dict(cart.items.order_by('id').values_list('catalogo_id', 'quantity')),
+            'version': cart.version,
+            'persistida': cart.version,
+            'creado': cart.created_at,
+            'actualizado': cart.updated_at,
+        }
+
+    def estado_nuevo(self):
+        ahora = timezone.now()
+        return {
+            'id': str(uuid.uuid4()), 'usuario_id': self.usuario.pk if self.usuario else None,
+            'token': self.token, 'lineas': {}, 'version': 0, 'persistida': 0, 'creado': ahora, 'actualizado': ahora,
+        }
+
+    def leer(self, crear=True):
+        """Estado del carrito; con crear=False devuelve None (sin tocar la caché) si no existe."""
+        estado = cache.get(self.clave())
+        if estado is None:
+            estado = self.cargar_de_base()
+            if estado is None:
+                if not crear:
+                    return None
+                estado = self.estado_nuevo()
+            # add: si otro proceso lo cargó (y quizás modificó) mientras tanto, gana el suyo
+            cache.add(self.clave(), estado, settings.CARRITO_CACHE_TIMEOUT)
+            estado = cache.get(self.clave())
+        return estado
+
+    def modificar(self, cambio):
+        """Aplica cambio(lineas) bajo el bloqueo del carrito y programa su persistencia."""
+        with bloqueo(self.clave()):
+            estado = self.leer()
+            cambio(estado['lineas'])
+            estado['version'] += 1
+            estado['actualizado'] = timezone.now()
+            cache.set(self.clave(), estado, settings.CARRITO_CACHE_TIMEOUT)
+        programar_persistencia(self.clave())
+
+    def construir(self, estado):
+        """Cart (sin guardar) con sus CartItem: dos consultas de catálogo, sin importar los ítems."""
+        cart = Cart(
+            id=estado['id'], user=self.usuario, token=self.token, version=estado['version'],
+            created_at=estado['creado'], updated_at=estado['actualizado'],
+        )
+        catalogos = (
+            Catalogo.objects.select_related('marca', 'categoria', 'imagen')
+            .prefetch_related('contadores_stock')
+            .in_bulk(list(estado['lineas']))
+        )
+        items = [
+            CartItem(id=catalogo_id, cart=cart, catalogo=catalogos[catalogo_id], quantity=cantidad)
+            for catalogo_id, cantidad in estado['lineas'].items()
+            if catalogo_id in catalogos  # catálogos eliminados mientras estaban en el carrito
+        ]
+        # Mismo resultado que prefetch_related('items'): CartSerializer y total_price no consultan
+        precargados = CartItem.objects.none()
+        precargados._result_cache = items
+        precargados._prefetch_done = True
+        cart._prefetched_objects_cache = {'items': precargados}
+        return cart
+
+    def obtener(self):
+        estado = self.leer(crear=False)
+        return self.construir(estado) if estado is not None else None
+
+    def agregar(self, catalogo_id, cantidad):
+        if not Catalogo.objects.filter(pk=catalogo_id).exists():
+            raise Catalogo.DoesNotExist(f"No existe el catálogo {catalogo_id}")
+
+        def sumar(lineas):
+            lineas[catalogo_id] = min(lineas.get(catalogo_id, 0) + cantidad, CANTIDAD_MAXIMA)
+        self.modificar(sumar)
+
+    def linea(self, lineas, item_id):
+        try:
+            catalogo_id = int(item_id)
+        except (TypeError, ValueError):
+            catalogo_id = None
+        if catalogo_id not in lineas:
+            raise CartItem.DoesNotExist(f"El ítem {item_id} no está en el carrito")
+        return catalogo_id
+
+    def actualizar(self, item_id, cantidad):
+        def fijar(lineas):
+            catalogo_id = self.linea(lineas, item_id)
+            if cantidad > 0:
+                lineas[catalogo_id] = cantidad
+            else:
+                del lineas[catalogo_id]
+        self.modificar(fijar)
+
+    def quitar(self, item_id):
+        self.modificar(lambda lineas: lineas.pop(self.linea(lineas, item_id)))
+
+    def vaciar(self):
+        self.modificar(lambda lineas: lineas.clear())
+
+    def persistir(self):
+        with bloqueo(self.clave()):
+            estado = self.leer(crear=False)
+            if estado is None:
+                return None
+            cart = guardar_estado(estado)
+            version = estado['version']
+        # Solo se da por persistida si la transacción del llamador confirma
+        transaction.on_commit(lambda: marcar_persistida(self.clave(), version))
+        return cart
+
+    def fusionar(self, token):
+        anonimo = AlmacenCarritoCache(token=token)
+        with bloqueo(anonimo.clave()):
+            lineas = (anonimo.leer(crear=False) or {'lineas': {}})['lineas']
+            cache.delete(anonimo.clave())
+            Cart.objects.filter(user=None, token=token).delete()
+        if lineas:
+            def sumar(propias):
+                for catalogo_id, cantidad in lineas.items():
+                    propias[catalogo_id] = min(propias.get(catalogo_id, 0) + cantidad, CANTIDAD_MAXIMA)
+            self.modificar(sumar)
+
+    def aplicar_lote(self, operaciones, version=None):
+        with bloqueo(self.clave()):
+            estado = self.leer()
+            if version is not None and version != estado['version']:
+                raise VersionDesactualizada(estado['version'])
+            antes = estado['lineas']
+            lineas = aplicar_operaciones(antes, operaciones)
+            cambiados = {catalogo_id for catalogo_id, cantidad in lineas.items() if antes.get(catalogo_id) != cantidad}
+            eliminados = [catalogo_id for catalogo_id in antes if catalogo_id not in lineas]
+            if cambiados or eliminados:
+                estado['lineas'] = lineas
+                estado['version'] += 1
+                estado['actualizado'] = timezone.now()
+                cache.set(self.clave(), estado, settings.CARRITO_CACHE_TIMEOUT)
+        if cambiados or eliminados:
+            programar_persistencia(self.clave())
+
+        items = list(self.construir(estado).items.all())
+        return {
+            'version': estado['version'],
+            'items': [item for item in items if item.catalogo_id in cambiados],
+            'eliminados': eliminados,
+            'total_price': sum((item.subtotal for item in items), Decimal('0')),
+            'total_items': sum(item.quantity for item in items),
+        }
+
+
+def guardar_estado(estado):
+    """Escribe un estado de la caché en Cart / CartItem (solo las líneas que cambiaron)."""
+    with transaction.atomic():
+        cart, _ = Cart.objects.get_or_create(
+            pk=estado['id'], defaults={'user_id': estado['usuario_id'], 'token': estado['token']}
+        )
+        vigentes = set(Catalogo.objects.filter(pk__in=list(estado['lineas'])).values_list('id', flat=True))
+        lineas = {catalogo_id: cantidad for catalogo_id, cantidad in estado['lineas'].items() if catalogo_id in vigentes}
+        existentes = {item.catalogo_id: item for item in CartItem.objects.filter(cart=cart)}
+        sincronizar_items(cart, existentes, lineas)
+        Cart.objects.filter(pk=cart.pk).update(version=estado['version'], updated_at=estado['actualizado'])
+    return cart
+
+
+def marcar_persistida(clave, version):
+    with bloqueo(clave):
+        estado = cache.get(clave)
+        if estado is not None and estado['persistida'] < version:
+            estado['persistida'] = version
+            cache.set(clave, estado, settings.CARRITO_CACHE_TIMEOUT)
+
+
+def marcar_pendiente(clave):
+    cliente = cliente_redis()
+    if cliente is not None:
+        # SADD es atómico: sin bloqueo global ni reescribir el conjunto en cada modificación
+        cliente.sadd(cache.make_and_validate_key(PENDIENTES), clave)
+        return
+    # locmem (un solo proceso, pruebas)
+    with bloqueo(PENDIENTES):
+        pendientes = cache.get(PENDIENTES) or set()
+        pendientes.add(clave)
+        cache.set(PENDIENTES, pendientes, None)
+
+
+def sacar_pendientes():
+    """Saca y devuelve las claves pendientes; las que se marquen después quedan para la próxima corrida."""
+    cliente = cliente_redis()
+    if cliente is not None:
+        nombre = cache.make_and_validate_key(PENDIENTES)
+        return {clave.decode() for clave in cliente.spop(nombre, cliente.scard(nombre))}
+    with bloqueo(PENDIENTES):
+        pendientes = cache.get(PENDIENTES) or set()
+        cache.delete(PENDIENTES)
+    return pendientes
+
+
+def hay_pendientes():
+    cliente = cliente_redis()
+    if cliente is not None:
+        return cliente.scard(cache.make_and_validate_key(PENDIENTES)) > 0
+    return bool(cache.get(PENDIENTES))
+
+
+def persistir_clave(clave):
+    """Persiste un carrito de la caché si tiene cambios sin escribir. Devuelve True si escribió."""
+    with bloqueo(clave):
+        estado = cache.get(clave)
+        if estado is None or estado['persistida'] >= estado['version']:
+            return False
+        guardar_estado(estado)
+        estado['persistida'] = estado['version']
+        cache.set(clave, estado, settings.CARRITO_CACHE_TIMEOUT)
+    return True
+
+
+def persistir_pendientes():
+    """Persiste los carritos modificados desde la última corrida. Devuelve {'persistidos', 'fallidos'}."""
+    persistidos = fallidos = 0
+    for clave in sacar_pendientes():
+        try:
+            persistidos += persistir_clave(clave)
+        except Exception:
+            fallidos += 1
+            logger.exception(f"❌ Error persistiendo el carrito {clave}")
+            # Se reintenta en la próxima corrida
+            marcar_pendiente(clave)
+    return {'persistidos': persistidos, 'fallidos': fallidos}
+
+
+# --- Persistencia en segundo plano ---
+
+_estado_hilo = {'en_curso': False}
+_mutex_hilo = threading.Lock()
+
+
+def programar_persistencia(clave):
+    marcar_pendiente(clave)
+    if settings.CARRITO_PERSISTENCIA_MODO == 'hilo':
+        _lanzar_hilo()
+
+
+def _lanzar_hilo():
+    # Un solo hilo por proceso: las modificaciones que llegan mientras espera se escriben juntas
+    with _mutex_hilo:
+        if _estado_hilo['en_curso']:
+            return
+        _estado_hilo['en_curso'] = True
+    threading.Thread(target=_persistir_en_hilo, daemon=True).start()
+
+
+def _persistir_en_hilo():
+    try:
+        while True:
+            time.sleep(settings.CARRITO_PERSISTENCIA_RETARDO)
+            try:
+                persistir_pendientes()
+            except Exception:
+                logger.exception("❌ Error persistiendo carritos")
+            with _mutex_hilo:
+                if not hay_pendientes():
+                    _estado_hilo['en_curso'] = False
+                    return
+    finally:
+        connection.close()
@@ -0,0 +1,86 @@
+"""
+Limpieza de carritos abandonados.
+
+Cada usuario autenticado (y cada visitante con token) tiene un Cart que nunca se borra. El
+comando `python manage.py limpiar_carritos` (cron diario) elimina, junto con sus ítems:
+
+- los carritos sin actividad (updated_at) hace más de CARRITO_TTL_DIAS días;
+- los carritos vacíos sin actividad hace más de CARRITO_VACIO_TTL_DIAS días.
+
+Trabaja por lotes de CARRITO_LIMPIEZA_LOTE carritos, una transacción corta por lote, para no
+bloquear las tablas del carrito mientras la tienda está en uso.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from ventas.models import Cart, CartItem
+
+
+def filtro_vencidos(ahora=None):
+    ahora = ahora or timezone.now()
+    return (
+        Q(updated_at__lt=ahora - timedelta(days=settings.CARRITO_TTL_DIAS))
+        | Q(con_items=False, updated_at__lt=ahora - timedelta(days=settings.CARRITO_VACIO_TTL_DIAS))
+    )
+
+
+def carritos_con_items():
+    return Cart.objects.annotate(con_items=Exists(CartItem.objects.filter(cart=OuterRef('pk'))))
+
+
+def estadisticas_carritos(ahora=None):
+    """
+    Conteos para planificar capacidad, en una consulta sobre Cart y otra sobre CartItem:
+    {'total', 'vivos' (con ítems y actividad dentro del TTL), 'vacios', 'vencidos', 'items'}.
+    """
+    ahora = ahora or timezone.now()
+    conteos = carritos_con_items().aggregate(
+        total=Count('id'),
+        vivos=Count('id', filter=Q(con_items=True, updated_at__gte=ahora - timedelta(days=settings.CARRITO_TTL_DIAS))),
+        vacios=Count('id', filter=Q(con_items=False)),
+        vencidos=Count('id', filter=filtro_vencidos(ahora)),
+    )
+    conteos['items'] = CartItem.objects.count()
+    return conteos
+
+
+def eliminar_lote(tamano, ahora=None):
+    """
+    Borra hasta `tamano` carritos vencidos con sus ítems en una transacción.
+    Devuelve (carritos, items) eliminados.
+    """
+    with transaction.atomic():
+        ids = list(
+            carritos_con_items()
+            .select_for_update(skip_locked=True, of=('self',))
+            .filter(filtro_vencidos(ahora))
+            .order_by('updated_at')
+            .values_list('id', flat=True)[:tamano]
+        )
+        if not ids:
+            return 0, 0
+        # CartItem no tiene dependientes: un DELETE ... WHERE cart_id IN y otro para Cart
+        _, por_modelo = Cart.objects.filter(id__in=ids).delete()
+    return por_modelo.get(Cart._meta.label, 0), por_modelo.get(CartItem._meta.label, 0)
+
+
+def limpiar_carritos(tamano=None, pausa=0):
+    """Elimina los carritos vencidos lote por lote. Devuelve {'carritos', 'items', 'lotes'}."""
+    tamano = tamano or settings.CARRITO_LIMPIEZA_LOTE
+    ahora = timezone.now()
+    resumen = {'carritos': 0, 'items': 0, 'lotes': 0}
+    while True:
+        carritos, items = eliminar_lote(tamano, ahora)
+        if not carritos:
+            break
+        resumen['carritos'] += carritos
+        resumen['items'] += items
+        resumen['lotes'] += 1
+        if pausa:
+            time.sleep(pausa)
+    return resumen
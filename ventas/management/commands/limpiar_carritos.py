@@ -0,0 +1,32 @@
+"""
+Elimina los carritos abandonados por lotes (ver ventas/limpieza.py).
+
+Uso:
+    python manage.py limpiar_carritos                   # limpia y muestra los conteos
+    python manage.py limpiar_carritos --estadisticas    # solo muestra los conteos
+"""
+from django.core.management.base import BaseCommand
+
+from ventas.limpieza import estadisticas_carritos, limpiar_carritos
+
+
+class Command(BaseCommand):
+    help = 'Elimina los carritos sin actividad por más del TTL configurado y muestra cuántos quedan vivos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--estadisticas', action='store_true', help='Solo mostrar los conteos, sin eliminar')
+        parser.add_argument('--lote', type=int, default=None, help='Carritos por transacción (CARRITO_LIMPIEZA_LOTE)')
+        parser.add_argument('--pausa', type=float, default=0, help='Segundos de espera entre lotes')
+
+    def handle(self, *args, **options):
+        if not options['estadisticas']:
+            resumen = limpiar_carritos(tamano=options['lote'], pausa=options['pausa'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Carritos eliminados: {resumen['carritos']}, items: {resumen['items']} ({resumen['lotes']} lotes)"
+            ))
+
+        conteos = estadisticas_carritos()
+        self.stdout.write(
+            f"Carritos: {conteos['total']} (vivos: {conteos['vivos']}, vacíos: {conteos['vacios']}, "
+            f"vencidos: {conteos['vencidos']}), items: {conteos['items']}"
+        )
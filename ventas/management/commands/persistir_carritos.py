@@ -0,0 +1,34 @@
+"""
+Persiste en Cart / CartItem los carritos modificados en la caché (ver ventas/carrito.py).
+Solo hace falta con CARRITO_ALMACEN=ventas.carrito.AlmacenCarritoCache y CARRITO_PERSISTENCIA_MODO='comando'.
+El comando corre en otro proceso: la caché debe ser compartida (ej. Redis), no memoria local.
+
+Uso:
+    python manage.py persistir_carritos               # persiste lo pendiente y termina
+    python manage.py persistir_carritos --continuo    # repite cada --intervalo segundos
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ventas.carrito import persistir_pendientes
+
+
+class Command(BaseCommand):
+    help = 'Escribe en la base los carritos con cambios pendientes en la caché'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true', help='No terminar; persistir cada --intervalo segundos')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos entre corridas en modo continuo')
+
+    def handle(self, *args, **options):
+        persistidos = fallidos = 0
+        while True:
+            resultado = persistir_pendientes()
+            persistidos += resultado['persistidos']
+            fallidos += resultado['fallidos']
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
+
+        self.stdout.write(self.style.SUCCESS(f'Carritos persistidos: {persistidos}, fallidos: {fallidos}'))
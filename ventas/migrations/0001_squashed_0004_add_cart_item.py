@@ -0,0 +1,119 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:20
+#
+# Reemplaza 0001-0004 (ya aplicadas en las bases existentes, no se modifican): 0002 falla en una
+# base nueva (quita CartItem.cart antes de su unique_together) y saca a Cart del estado, aunque la
+# tabla ventas_cart sigue en uso. Las bases con 0001-0004 aplicadas la dan por aplicada y toman de
+# aquí el estado con Cart; una base nueva ejecuta solo esta.
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    replaces = [('ventas', '0001_initial'), ('ventas', '0002_add_venta_detalleventa'), ('ventas', '0003_alter_detalleventa_cantidad_and_more'), ('ventas', '0004_add_cart_item')]
+
+    initial = True
+
+    dependencies = [
+        ('administracion', '0009_add_venta_detalleventa'),
+        ('catalogo', '0003_alter_catalogo_estado_alter_producto_catalogo_and_more'),
+        ('catalogo', '0006_add_venta_detalleventa'),
+        ('catalogo', '0007_alter_producto_estado'),
+        ('catalogo', '0008_add_cart_item'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Venta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Venta')),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Subtotal')),
+                ('impuesto', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Impuesto')),
+                ('descuento', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Descuento')),
+                ('total', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Total')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('completada', 'Completada'), ('cancelada', 'Cancelada')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('costo_envio', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Costo de Envío')),
+                ('direccion', models.TextField(default='Por definir', verbose_name='Dirección de Entrega')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ventas', to='administracion.cliente', verbose_name='Cliente')),
+            ],
+            options={
+                'verbose_name': 'Venta',
+                'verbose_name_plural': 'Ventas',
+                'ordering': ['-fecha'],
+                'db_table': 'ventas_venta',
+            },
+        ),
+        migrations.CreateModel(
+            name='DetalleVenta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)], verbose_name='Cantidad')),
+                ('precio_unitario', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Precio Unitario')),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Subtotal')),
+                ('descuento', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Descuento')),
+                ('total', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Total')),
+                ('catalogo', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='detalles_venta', to='catalogo.catalogo', verbose_name='Producto')),
+                ('venta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='detalles', to='ventas.venta', verbose_name='Venta')),
+            ],
+            options={
+                'verbose_name': 'Detalle de Venta',
+                'verbose_name_plural': 'Detalles de Venta',
+                'db_table': 'ventas_detalle_venta',
+            },
+        ),
+        migrations.CreateModel(
+            name='Pago',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_pago', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Pago')),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Monto')),
+                ('moneda', models.CharField(choices=[('BOB', 'Bolivianos'), ('USD', 'Dólares'), ('EUR', 'Euros')], default='BOB', max_length=3, verbose_name='Moneda')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('completado', 'Completado'), ('fallido', 'Fallido'), ('reembolsado', 'Reembolsado')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('proveedor', models.CharField(help_text='Ej: Stripe, PayPal, Transferencia Bancaria, etc.', max_length=100, verbose_name='Proveedor de Pago')),
+                ('transaccion_id', models.CharField(help_text='ID único proporcionado por el proveedor de pago', max_length=255, unique=True, verbose_name='ID de Transacción')),
+                ('venta', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pagos', to='ventas.venta', verbose_name='Venta')),
+            ],
+            options={
+                'verbose_name': 'Pago',
+                'verbose_name_plural': 'Pagos',
+                'db_table': 'ventas_pago',
+                'ordering': ['-fecha_pago'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Cart',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cart', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Carrito',
+                'verbose_name_plural': 'Carritos',
+                'db_table': 'ventas_cart',
+            },
+        ),
+        migrations.CreateModel(
+            name='CartItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveSmallIntegerField(default=1)),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='ventas.cart')),
+                ('catalogo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='catalogo.catalogo')),
+            ],
+            options={
+                'verbose_name': 'Item del Carrito',
+                'verbose_name_plural': 'Items del Carrito',
+                'db_table': 'ventas_cart_item',
+                'unique_together': {('cart', 'catalogo')},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administracion', '0010_merge_20261018_0043'),
+        ('ventas', '0004_add_cart_item'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['-fecha_pago'], name='ventas_pago_fecha_p_b37a00_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['-fecha'], name='ventas_vent_fecha_370588_idx'),
+        ),
+    ]
@@ -2,7 +2,9 @@
 Modelos para el carrito de compras
 """
 import uuid
+from decimal import Decimal
 from django.db import models
+from django.db.models import F, Sum
 from django.conf import settings
 from catalogo.models import Catalogo  # Importa tu modelo Catalogo
 
@@ -13,18 +15,31 @@ class Cart(models.Model):
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='cart', null=True, blank=True)
+    # Carritos de visitantes anónimos (cabecera X-Cart-Token, ver ventas/carrito.py)
+    token = models.CharField(max_length=32, unique=True, null=True, blank=True)
+    # Aumenta con cada modificación; POST /api/cart/batch/ la usa para la concurrencia optimista
+    version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def total_price(self):
-        return sum([item.subtotal for item in self.items.all()])
+        """
+        Con los ítems precargados (prefetch_related('items__catalogo')) suma en memoria sin queries;
+        si no, lo calcula la base con un solo aggregate en lugar de cargar cada ítem y su catálogo.
+        """
+        if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+            return sum((item.subtotal for item in self.items.all()), Decimal('0'))
+        total = self.items.aggregate(total=Sum(F('quantity') * F('catalogo__precio')))['total']
+        return total or Decimal('0')
 
     def __str__(self):
         return f"Carrito de {self.user.username if self.user else 'Anónimo'}"
 
     class Meta:
         db_table = 'ventas_cart'
+        # Limpieza de carritos abandonados por antigüedad (ver ventas/limpieza.py)
+        indexes = [models.Index(fields=['updated_at'], name='cart_actualizado')]
         verbose_name = 'Carrito'
         verbose_name_plural = 'Carritos'
 
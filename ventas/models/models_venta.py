@@ -78,6 +78,9 @@ class Venta(models.Model):
         verbose_name = 'Venta'
         verbose_name_plural = 'Ventas'
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['-fecha']),
+        ]
     
     def __str__(self):
         return f"Venta #{self.id} - {self.cliente.nombre} - Bs. {self.total}"
@@ -229,6 +232,9 @@ class Pago(models.Model):
         verbose_name = 'Pago'
         verbose_name_plural = 'Pagos'
         ordering = ['-fecha_pago']
+        indexes = [
+            models.Index(fields=['-fecha_pago']),
+        ]
     
     def __str__(self):
         return f"Pago #{self.id} - Venta #{self.venta.id} - {self.moneda} {self.monto}"
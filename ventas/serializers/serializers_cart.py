@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from ..models import Cart, CartItem
+from catalogo.models import Catalogo
+from ventas.carrito import CANTIDAD_MAXIMA
 from catalogo.serializers.serializers_catalogo import CatalogoSerializer # Asegúrate de tener esto
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -23,13 +25,13 @@ class CartSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Cart
-        fields = ['id', 'items', 'total_price', 'created_at', 'updated_at']
+        fields = ['id', 'items', 'total_price', 'version', 'created_at', 'updated_at']
         # No incluimos 'user' porque generalmente el usuario sabe quién es él mismo.
 
 class AddCartItemSerializer(serializers.ModelSerializer):
     # El cliente envía el ID del catálogo y la cantidad que quiere
     catalogo_id = serializers.IntegerField(write_only=True) # write_only para que no salga en las respuestas GET
-    quantity = serializers.IntegerField(default=1)
+    quantity = serializers.IntegerField(default=1, max_value=CANTIDAD_MAXIMA)
 
     class Meta:
         model = CartItem
@@ -41,4 +43,44 @@ class AddCartItemSerializer(serializers.ModelSerializer):
         return value
     
     # Aquí podrías agregar la validación de stock si quieres ser muy pro:
-    # def validate_catalogo_id(self, value): ...
\ No newline at end of file
+    # def validate_catalogo_id(self, value): ...
+
+
+class OperacionCarritoSerializer(serializers.Serializer):
+    OPERACIONES = ['add', 'set', 'remove']
+
+    op = serializers.ChoiceField(choices=OPERACIONES)
+    catalogo_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(required=False, min_value=0, max_value=CANTIDAD_MAXIMA)
+
+    def validate(self, data):
+        if data['op'] == 'add' and data.get('quantity', 0) < 1:
+            raise serializers.ValidationError({'quantity': "Para 'add' la cantidad debe ser al menos 1."})
+        if data['op'] == 'set' and 'quantity' not in data:
+            raise serializers.ValidationError({'quantity': "Para 'set' la cantidad es obligatoria (0 quita el ítem)."})
+        return data
+
+
+class LoteCarritoSerializer(serializers.Serializer):
+    """Operaciones de POST /api/cart/batch/ (ver ventas/carrito.py: aplicar_operaciones)."""
+    MAX_OPERACIONES = 100
+
+    operaciones = OperacionCarritoSerializer(many=True, allow_empty=False, max_length=MAX_OPERACIONES)
+    version = serializers.IntegerField(required=False, min_value=0)
+
+    def validate_operaciones(self, value):
+        # Un solo query para todos los catálogos del lote
+        ids = {operacion['catalogo_id'] for operacion in value if operacion['op'] != 'remove'}
+        faltantes = ids - set(Catalogo.objects.filter(pk__in=ids).values_list('id', flat=True))
+        if faltantes:
+            raise serializers.ValidationError(f"No existen los catálogos: {sorted(faltantes)}")
+        return value
+
+
+class ResultadoLoteCarritoSerializer(serializers.Serializer):
+    """Respuesta de POST /api/cart/batch/: solo lo que cambió y los nuevos totales."""
+    version = serializers.IntegerField()
+    items = CartItemSerializer(many=True)
+    eliminados = serializers.ListField(child=serializers.IntegerField())
+    total_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    total_items = serializers.IntegerField()
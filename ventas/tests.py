@@ -1,3 +1,493 @@
-from django.test import TestCase
+import io
+import threading
+from datetime import timedelta
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from catalogo.models import Catalogo, Categoria, ImagenMedia, Marca, StockCatalogo
+from ventas import carrito, limpieza
+from ventas.models import Cart, CartItem
+
+
+class ConsultasCarritoTests(TestCase):
+    """
+    La respuesta del carrito se arma con un número fijo de consultas:
+    carrito + ítems (JOIN con catálogo, marca, categoría e imagen) + contadores de stock.
+    """
+    CONSULTAS_CARRITO = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(username='cliente', password='x')
+        cls.cart = Cart.objects.create(user=cls.usuario)
+        marca = Marca.objects.create(nombre='Marca')
+        categoria = Categoria.objects.create(nombre='Categoría')
+        imagen = ImagenMedia.objects.create(
+            hash='a' * 64, url_original='https://img/o.jpg', url_miniatura='https://img/m.jpg',
+            url_mediana='https://img/md.jpg', ancho=10, alto=10,
+        )
+        cls.catalogos = [
+            Catalogo.objects.create(
+                sku=f'SKU-{i}', nombre=f'Producto {i}', precio=10 + i, marca=marca, categoria=categoria, imagen=imagen
+            )
+            for i in range(10)
+        ]
+        StockCatalogo.objects.bulk_create([
+            StockCatalogo(catalogo=catalogo, estado='disponible', cantidad=5) for catalogo in cls.catalogos
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def agregar_items(self, cantidad):
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.cart, catalogo=catalogo, quantity=2) for catalogo in self.catalogos[:cantidad]
+        ])
+
+    def test_consultas_constantes_con_un_item(self):
+        self.agregar_items(1)
+        with self.assertNumQueries(self.CONSULTAS_CARRITO):
+            respuesta = self.client.get('/api/cart/my_cart/')
+        self.assertEqual(len(respuesta.data['items']), 1)
+
+    def test_consultas_constantes_con_muchos_items(self):
+        self.agregar_items(10)
+        with self.assertNumQueries(self.CONSULTAS_CARRITO):
+            respuesta = self.client.get('/api/cart/my_cart/')
+        items = respuesta.data['items']
+        self.assertEqual(len(items), 10)
+        self.assertEqual(items[0]['catalogo']['marca']['nombre'], 'Marca')
+        self.assertEqual(items[0]['catalogo']['stock_disponible'], 5)
+        self.assertEqual(respuesta.data['total_price'], f'{sum(2 * (10 + i) for i in range(10))}.00')
+
+    def test_total_sin_precarga_usa_aggregate(self):
+        self.agregar_items(10)
+        cart = Cart.objects.get(pk=self.cart.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(cart.total_price, sum(2 * (10 + i) for i in range(10)))
+
+
+class ConfiguracionCarritoCacheTests(SimpleTestCase):
+
+    def caches(self, backend):
+        return {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'carritos': {'BACKEND': backend, 'LOCATION': 'redis://localhost:6379/1'},
+        }
+
+    @override_settings(CARRITO_ALMACEN='ventas.carrito.AlmacenCarritoCache')
+    def test_backend_no_compartido_corta_el_arranque(self):
+        for backend in (
+            'django.core.cache.backends.locmem.LocMemCache',
+            'django.core.cache.backends.db.DatabaseCache',
+            'django.core.cache.backends.memcached.PyMemcacheCache',
+        ):
+            with self.subTest(backend=backend), override_settings(CACHES=self.caches(backend)):
+                with self.assertRaises(ImproperlyConfigured):
+                    carrito.validar_configuracion()
+
+    @override_settings(CARRITO_ALMACEN='ventas.carrito.AlmacenCarritoCache')
+    def test_sin_alias_propio_corta_el_arranque(self):
+        with override_settings(CACHES={'default': self.caches('django.core.cache.backends.redis.RedisCache')['carritos']}):
+            with self.assertRaises(ImproperlyConfigured):
+                carrito.validar_configuracion()
+
+    @override_settings(CARRITO_ALMACEN='ventas.carrito.AlmacenCarritoCache')
+    def test_redis_es_valido(self):
+        with override_settings(CACHES=self.caches('django.core.cache.backends.redis.RedisCache')):
+            carrito.validar_configuracion()
+
+    def test_almacen_en_base_no_exige_cache(self):
+        carrito.validar_configuracion()
+
+
+class BloqueoCarritoTests(SimpleTestCase):
+
+    def setUp(self):
+        carrito.cache.clear()
+
+    def test_libera_el_bloqueo_propio(self):
+        with carrito.bloqueo('carrito:t:a'):
+            self.assertIsNotNone(carrito.cache.get('carrito:t:a:bloqueo'))
+        self.assertIsNone(carrito.cache.get('carrito:t:a:bloqueo'))
+
+    def test_no_borra_el_bloqueo_tomado_por_otro(self):
+        # El bloqueo venció durante la operación y otro proceso lo tomó con su propio token
+        with carrito.bloqueo('carrito:t:a'):
+            carrito.cache.set('carrito:t:a:bloqueo', 12345)
+        self.assertEqual(carrito.cache.get('carrito:t:a:bloqueo'), 12345)
+
+    def test_usa_la_cache_de_carritos(self):
+        with carrito.bloqueo('carrito:t:a'):
+            self.assertIsNone(caches['default'].get('carrito:t:a:bloqueo'))
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'carritos': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://primario:6379/1,redis://replica:6379/1',
+            'KEY_PREFIX': 'ss',
+        },
+    })
+    def test_con_redis_compara_y_borra_en_el_servidor(self):
+        with mock.patch.object(carrito, '_conectar_redis') as conectar:
+            carrito.liberar_bloqueo('carrito:t:a:bloqueo', 12345)
+
+        conectar.assert_called_once_with('redis://primario:6379/1')
+        conectar.return_value.eval.assert_called_once_with(
+            carrito.LIBERAR_BLOQUEO_LUA, 1, 'ss:1:carrito:t:a:bloqueo', 12345
+        )
+
+
+class RedisEnMemoria:
+    """Lo mínimo de redis-py que usan los pendientes: un conjunto por clave."""
+
+    def __init__(self):
+        self.conjuntos = {}
+
+    def sadd(self, nombre, valor):
+        self.conjuntos.setdefault(nombre, set()).add(valor.encode())
+
+    def scard(self, nombre):
+        return len(self.conjuntos.get(nombre, ()))
+
+    def spop(self, nombre, cantidad):
+        conjunto = self.conjuntos.get(nombre, set())
+        return [conjunto.pop() for _ in range(min(cantidad, len(conjunto)))]
+
+
+class PendientesRedisTests(SimpleTestCase):
+
+    def setUp(self):
+        carrito.cache.clear()
+        self.redis = RedisEnMemoria()
+        patcher = mock.patch.object(carrito, 'cliente_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_marca_con_sadd_sin_bloqueo_global(self):
+        with mock.patch.object(carrito, 'bloqueo') as bloqueo:
+            carrito.marcar_pendiente('carrito:t:a')
+            carrito.marcar_pendiente('carrito:t:b')
+            carrito.marcar_pendiente('carrito:t:a')
+
+        bloqueo.assert_not_called()
+        self.assertEqual(
+            self.redis.conjuntos, {carrito.cache.make_key(carrito.PENDIENTES): {b'carrito:t:a', b'carrito:t:b'}}
+        )
+        self.assertIsNone(carrito.cache.get(carrito.PENDIENTES))
+
+    def test_saca_todos_los_pendientes(self):
+        carrito.marcar_pendiente('carrito:t:a')
+        carrito.marcar_pendiente('carrito:t:b')
+        self.assertTrue(carrito.hay_pendientes())
+
+        self.assertEqual(carrito.sacar_pendientes(), {'carrito:t:a', 'carrito:t:b'})
+        self.assertFalse(carrito.hay_pendientes())
+        self.assertEqual(carrito.sacar_pendientes(), set())
+
+
+class CarritoAnonimoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalogo = Catalogo.objects.create(sku='SKU-A', nombre='Producto A', precio=10)
+
+    def setUp(self):
+        self.client = APIClient(HTTP_X_CART_TOKEN='f' * 32)
+
+    def test_leer_token_desconocido_no_crea_carrito(self):
+        respuesta = self.client.get('/api/cart/my_cart/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual((respuesta.data['id'], respuesta.data['items'], respuesta.data['token']), (None, [], 'f' * 32))
+        self.assertFalse(Cart.objects.exists())
+
+    def test_modificar_token_desconocido_no_crea_carrito(self):
+        self.assertEqual(self.client.patch('/api/cart/update_item/1/', {'quantity': 2}).status_code, 404)
+        self.assertEqual(self.client.delete('/api/cart/remove_item/1/').status_code, 404)
+        self.assertEqual(self.client.post('/api/cart/clear_cart/').status_code, 200)
+        self.assertFalse(Cart.objects.exists())
+
+    def test_primera_escritura_crea_el_carrito(self):
+        respuesta = self.client.post('/api/cart/add_item/', {'catalogo_id': self.catalogo.pk, 'quantity': 2})
+        self.assertEqual(respuesta.status_code, 200)
+        cart = Cart.objects.get(token='f' * 32)
+        self.assertEqual(respuesta.data['id'], str(cart.pk))
+        self.assertEqual(respuesta.data['items'][0]['quantity'], 2)
+
+
+@override_settings(CARRITO_ALMACEN='ventas.carrito.AlmacenCarritoCache', CARRITO_PERSISTENCIA_MODO='comando')
+class CarritoAnonimoCacheTests(CarritoAnonimoTests):
+
+    def setUp(self):
+        super().setUp()
+        carrito.cache.clear()
+
+    def test_leer_token_desconocido_no_crea_carrito(self):
+        super().test_leer_token_desconocido_no_crea_carrito()
+        self.assertIsNone(carrito.cache.get(f'carrito:t:{"f" * 32}'))
+
+    def test_primera_escritura_crea_el_carrito(self):
+        respuesta = self.client.post('/api/cart/add_item/', {'catalogo_id': self.catalogo.pk, 'quantity': 2})
+        self.assertEqual(respuesta.data['items'][0]['quantity'], 2)
+        # Se escribe en la base al persistir
+        self.assertEqual(carrito.persistir_pendientes()['persistidos'], 1)
+        self.assertEqual(str(Cart.objects.get(token='f' * 32).pk), respuesta.data['id'])
+
+
+class AgregarItemTests(TestCase):
+    """add_item: suma y versión en la base, tope de cantidad y catálogo inexistente."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(username='cliente', password='x')
+        cls.catalogo = Catalogo.objects.create(sku='SKU-A', nombre='Producto A', precio=10)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def agregar(self, catalogo_id, quantity):
+        return self.client.post('/api/cart/add_item/', {'catalogo_id': catalogo_id, 'quantity': quantity})
+
+    def test_doble_agregado_suma_y_sube_la_version(self):
+        self.agregar(self.catalogo.pk, 1)
+        respuesta = self.agregar(self.catalogo.pk, 2)
+        self.assertEqual(respuesta.data['items'][0]['quantity'], 3)
+        self.assertEqual(respuesta.data['version'], 2)
+        self.assertEqual(Cart.objects.get(user=self.usuario).version, 2)
+
+    def test_catalogo_inexistente_devuelve_404_sin_linea(self):
+        self.agregar(self.catalogo.pk, 1)
+        respuesta = self.agregar(self.catalogo.pk + 100, 1)
+        self.assertEqual(respuesta.status_code, 404)
+        self.assertEqual(CartItem.objects.count(), 1)
+        self.assertEqual(Cart.objects.get(user=self.usuario).version, 1)
+
+    def test_suma_topada_en_cantidad_maxima(self):
+        self.agregar(self.catalogo.pk, carrito.CANTIDAD_MAXIMA)
+        respuesta = self.agregar(self.catalogo.pk, 5)
+        self.assertEqual(respuesta.data['items'][0]['quantity'], carrito.CANTIDAD_MAXIMA)
+
+    def test_cantidad_mayor_al_maximo_es_400(self):
+        self.assertEqual(self.agregar(self.catalogo.pk, carrito.CANTIDAD_MAXIMA + 1).status_code, 400)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_otros_motores_usan_update_e_insert(self):
+        cart = Cart.objects.create(user=self.usuario)
+        with mock.patch.object(connection.features, 'can_return_columns_from_insert', False):
+            self.assertEqual(carrito.sumar_item(cart.pk, self.catalogo.pk, 2), 1)
+            self.assertEqual(carrito.sumar_item(cart.pk, self.catalogo.pk, carrito.CANTIDAD_MAXIMA), 2)
+            with self.assertRaises(Catalogo.DoesNotExist):
+                carrito.sumar_item(cart.pk, self.catalogo.pk + 100, 1)
+        self.assertEqual(CartItem.objects.get(cart=cart).quantity, carrito.CANTIDAD_MAXIMA)
+        self.assertEqual(Cart.objects.get(pk=cart.pk).version, 2)
+
+    def test_otros_motores_suman_si_otra_peticion_creo_la_linea(self):
+        cart = Cart.objects.create(user=self.usuario)
+        filtrar = Catalogo.objects.filter
+
+        def crear_en_paralelo(*args, **kwargs):
+            # La otra petición inserta la línea entre nuestro UPDATE (sin filas) y nuestro INSERT
+            CartItem.objects.bulk_create([CartItem(cart=cart, catalogo=self.catalogo, quantity=1)])
+            return filtrar(*args, **kwargs)
+
+        with mock.patch.object(connection.features, 'can_return_columns_from_insert', False), \
+                mock.patch.object(Catalogo.objects, 'filter', side_effect=crear_en_paralelo):
+            carrito.sumar_item(cart.pk, self.catalogo.pk, 1)
+        self.assertEqual(CartItem.objects.get(cart=cart).quantity, 2)
+
+
+@skipIf(connection.vendor == 'sqlite', 'La base de pruebas de SQLite en memoria no admite escrituras concurrentes')
+class AgregarItemConcurrenteTests(TransactionTestCase):
+    """Dos add_item simultáneos (doble clic) no pierden ninguna suma."""
+
+    def test_doble_clic(self):
+        usuario = User.objects.create_user(username='cliente', password='x')
+        catalogo = Catalogo.objects.create(sku='SKU-A', nombre='Producto A', precio=10)
+        cart = Cart.objects.create(user=usuario)
+        barrera = threading.Barrier(2)
+        errores = []
+
+        def agregar():
+            try:
+                barrera.wait()
+                carrito.AlmacenCarritoBase(usuario=usuario).agregar(catalogo.pk, 1)
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=agregar) for _ in range(2)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        self.assertEqual(CartItem.objects.get(cart=cart).quantity, 2)
+        self.assertEqual(Cart.objects.get(pk=cart.pk).version, 2)
+
+
+class LoteCarritoTests(TestCase):
+    """POST /api/cart/batch/: operaciones en orden, respuesta con solo lo que cambió y control de versión."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(username='cliente', password='x')
+        cls.catalogos = [
+            Catalogo.objects.create(sku=f'SKU-{i}', nombre=f'Producto {i}', precio=10 * (i + 1)) for i in range(4)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        # Carrito inicial: 2 del catálogo 0, 1 del 1 y 3 del 2
+        for catalogo, cantidad in zip(self.catalogos, [2, 1, 3]):
+            self.client.post('/api/cart/add_item/', {'catalogo_id': catalogo.pk, 'quantity': cantidad})
+
+    def carrito(self):
+        respuesta = self.client.get('/api/cart/my_cart/')
+        return respuesta.data['version'], {item['catalogo']['id']: item for item in respuesta.data['items']}
+
+    def lote(self, operaciones, **datos):
+        return self.client.post('/api/cart/batch/', {'operaciones': operaciones, **datos}, format='json')
+
+    def test_operaciones_en_orden_devuelven_solo_lo_cambiado(self):
+        c0, c1, c2, c3 = (catalogo.pk for catalogo in self.catalogos)
+        version, items = self.carrito()
+        respuesta = self.lote([
+            {'op': 'add', 'catalogo_id': c0, 'quantity': 1},
+            {'op': 'set', 'catalogo_id': c3, 'quantity': 4},
+            {'op': 'add', 'catalogo_id': c3, 'quantity': 1},
+            {'op': 'remove', 'catalogo_id': c2},
+        ], version=version)
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual({item['catalogo']['id']: item['quantity'] for item in respuesta.data['items']}, {c0: 3, c3: 5})
+        self.assertEqual(respuesta.data['eliminados'], [items[c2]['id']])
+        self.assertEqual(respuesta.data['version'], version + 1)
+        # 3 x 10 + 1 x 20 + 5 x 40
+        self.assertEqual(respuesta.data['total_price'], '250.00')
+        self.assertEqual(respuesta.data['total_items'], 9)
+        cantidades = {catalogo_id: item['quantity'] for catalogo_id, item in self.carrito()[1].items()}
+        self.assertEqual(cantidades, {c0: 3, c1: 1, c3: 5})
+
+    def test_set_en_cero_aparece_en_eliminados(self):
+        c0 = self.catalogos[0].pk
+        _, items = self.carrito()
+        respuesta = self.lote([{'op': 'set', 'catalogo_id': c0, 'quantity': 0}])
+
+        self.assertEqual(respuesta.data['items'], [])
+        self.assertEqual(respuesta.data['eliminados'], [items[c0]['id']])
+        self.assertNotIn(c0, self.carrito()[1])
+
+    def test_version_desactualizada_es_409_sin_cambios(self):
+        version, _ = self.carrito()
+        self.client.post('/api/cart/add_item/', {'catalogo_id': self.catalogos[1].pk, 'quantity': 1})
+        antes = self.carrito()
+
+        respuesta = self.lote([{'op': 'remove', 'catalogo_id': self.catalogos[0].pk}], version=version)
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.data['version'], version + 1)
+        self.assertEqual(self.carrito(), antes)
+
+    def test_catalogo_inexistente_es_400(self):
+        antes = self.carrito()
+        respuesta = self.lote([
+            {'op': 'add', 'catalogo_id': self.catalogos[0].pk, 'quantity': 1},
+            {'op': 'add', 'catalogo_id': self.catalogos[-1].pk + 100, 'quantity': 1},
+        ])
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(self.carrito(), antes)
+
+    def test_mas_de_100_operaciones_es_400(self):
+        operaciones = [{'op': 'add', 'catalogo_id': self.catalogos[0].pk, 'quantity': 1}] * 101
+        self.assertEqual(self.lote(operaciones).status_code, 400)
+        self.assertEqual(self.lote(operaciones[:100]).status_code, 200)
+
+
+@override_settings(CARRITO_ALMACEN='ventas.carrito.AlmacenCarritoCache', CARRITO_PERSISTENCIA_MODO='comando')
+class LoteCarritoCacheTests(LoteCarritoTests):
+
+    def setUp(self):
+        carrito.cache.clear()
+        super().setUp()
+
+
+@override_settings(CARRITO_TTL_DIAS=30, CARRITO_VACIO_TTL_DIAS=1)
+class LimpiezaCarritosTests(TestCase):
+    """limpiar_carritos: borra por lotes los carritos vencidos con sus ítems y reporta lo que queda."""
+
+    @classmethod
+    def setUpTestData(cls):
+        catalogos = [Catalogo.objects.create(sku=f'SKU-{i}', nombre=f'Producto {i}', precio=10) for i in range(2)]
+        ahora = timezone.now()
+        # nombre: (días sin actividad, catálogos en el carrito)
+        carritos = {'viejo': (40, catalogos), 'viejo_2': (35, catalogos[:1]), 'vacio_viejo': (2, []),
+                    'fresco': (0, catalogos[:1]), 'vacio_fresco': (0, [])}
+        cls.carritos = {}
+        for nombre, (dias, con_items) in carritos.items():
+            cart = Cart.objects.create(token=nombre)
+            CartItem.objects.bulk_create([CartItem(cart=cart, catalogo=catalogo, quantity=1) for catalogo in con_items])
+            Cart.objects.filter(pk=cart.pk).update(updated_at=ahora - timedelta(days=dias))
+            cls.carritos[nombre] = cart
+
+    def test_borra_vencidos_por_lotes_con_sus_items(self):
+        resumen = limpieza.limpiar_carritos(tamano=2)
+
+        self.assertEqual(resumen, {'carritos': 3, 'items': 3, 'lotes': 2})
+        self.assertEqual(set(Cart.objects.values_list('token', flat=True)), {'fresco', 'vacio_fresco'})
+        self.assertEqual(list(CartItem.objects.values_list('cart__token', flat=True)), ['fresco'])
+
+    def test_lote_acotado(self):
+        self.assertEqual(limpieza.eliminar_lote(1), (1, 2))
+        # Primero el de actividad más antigua
+        self.assertFalse(Cart.objects.filter(token='viejo').exists())
+        self.assertEqual(Cart.objects.count(), 4)
+
+    def test_comando_reporta_lo_eliminado_y_los_vivos(self):
+        salida = io.StringIO()
+        call_command('limpiar_carritos', lote=2, stdout=salida)
+
+        self.assertIn('Carritos eliminados: 3, items: 3 (2 lotes)', salida.getvalue())
+        self.assertIn('Carritos: 2 (vivos: 1, vacíos: 1, vencidos: 0), items: 1', salida.getvalue())
+
+    def test_estadisticas_no_elimina(self):
+        salida = io.StringIO()
+        call_command('limpiar_carritos', estadisticas=True, stdout=salida)
+
+        self.assertEqual(salida.getvalue().strip(), 'Carritos: 5 (vivos: 1, vacíos: 2, vencidos: 3), items: 4')
+        self.assertEqual(Cart.objects.count(), 5)
+
+
+@override_settings(CARRITO_ALMACEN='ventas.carrito.AlmacenCarritoCache', CARRITO_PERSISTENCIA_MODO='comando')
+class PersistirCarritosTests(TestCase):
+
+    def setUp(self):
+        carrito.cache.clear()
+        self.catalogo = Catalogo.objects.create(sku='SKU-A', nombre='Producto A', precio=10)
+
+    def test_comando_persiste_los_pendientes(self):
+        almacen = carrito.AlmacenCarritoCache(token='f' * 32)
+        almacen.agregar(self.catalogo.pk, 2)
+        self.assertFalse(Cart.objects.exists())
+
+        salida = io.StringIO()
+        call_command('persistir_carritos', stdout=salida)
+
+        self.assertIn('Carritos persistidos: 1, fallidos: 0', salida.getvalue())
+        cart = Cart.objects.get(token='f' * 32)
+        self.assertEqual(list(cart.items.values_list('catalogo_id', 'quantity')), [(self.catalogo.pk, 2)])
+        # Ya no queda nada pendiente
+        call_command('persistir_carritos', stdout=salida)
+        self.assertIn('Carritos persistidos: 0, fallidos: 0', salida.getvalue())
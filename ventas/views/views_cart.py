@@ -5,53 +5,94 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
-from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
+from django.http import Http404
 from ventas.models import Cart, CartItem
 from catalogo.models import Catalogo
-from ventas.serializers.serializers_cart import CartSerializer, AddCartItemSerializer
+from ventas.carrito import CANTIDAD_MAXIMA, CarritoOcupado, VersionDesactualizada, nuevo_token, obtener_almacen, token_valido
+from ventas.serializers.serializers_cart import (
+    CartSerializer, AddCartItemSerializer, LoteCarritoSerializer, ResultadoLoteCarritoSerializer,
+)
 
 
 class CartViewSet(viewsets.GenericViewSet):
     """
-    ViewSet para gestión del carrito de compras
+    ViewSet para gestión del carrito de compras.
+    El carrito se lee y modifica a través del almacén configurado en CARRITO_ALMACEN
+    (ver ventas/carrito.py). Sin sesión, el carrito se identifica con la cabecera X-Cart-Token.
     """
     # permission_classes = [IsAuthenticated]
     serializer_class = CartSerializer
 
-    def get_cart(self):
+    def get_almacen(self, crear=False):
         """
-        Obtiene o crea el carrito del usuario autenticado
-        Requiere autenticación - cada usuario tiene su propio carrito
+        Almacén del carrito del usuario autenticado o del token anónimo (cabecera X-Cart-Token).
+        Con usuario y token, el carrito anónimo se fusiona con el del usuario.
+        Sin usuario ni token devuelve None, salvo con crear=True (se genera un token nuevo).
         """
-        if not self.request.user.is_authenticated:
-            return None
-        
-        user = self.request.user
-        print(f"DEBUG get_cart - Usuario autenticado: {user.username} (ID: {user.id})")
-        
-        # Cada usuario autenticado tiene su propio carrito
-        cart, created = Cart.objects.get_or_create(user=user)
-        print(f"DEBUG get_cart - Cart ID: {cart.id}, Creado: {created}, Items: {cart.items.count()}")
-        return cart
+        token = self.request.headers.get('X-Cart-Token')
+        token = token if token_valido(token) else None
+
+        if self.request.user.is_authenticated:
+            almacen = obtener_almacen(usuario=self.request.user)
+            if token:
+                almacen.fusionar(token)
+            return almacen
+
+        if token is None:
+            if not crear:
+                return None
+            token = nuevo_token()
+        return obtener_almacen(token=token)
+
+    def serializar_carrito(self, almacen):
+        """
+        Serializa el carrito con sus ítems precargados (consultas constantes).
+        Un carrito que todavía no existe (se crea con la primera escritura) se devuelve vacío.
+        """
+        cart = almacen.obtener()
+        if cart is None:
+            datos = {'id': None, 'items': [], 'total_price': '0.00', 'version': 0, 'created_at': None, 'updated_at': None}
+        else:
+            datos = CartSerializer(cart, context=self.get_serializer_context()).data
+        if almacen.token:
+            datos['token'] = almacen.token
+        return datos
+
+    def respuesta_carrito(self, almacen, status_code=status.HTTP_200_OK):
+        response = Response(self.serializar_carrito(almacen), status=status_code)
+        if almacen.token:
+            response['X-Cart-Token'] = almacen.token
+        return response
+
+    def sin_carrito(self, mensaje):
+        return Response({'error': mensaje}, status=status.HTTP_401_UNAUTHORIZED)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (Catalogo.DoesNotExist, CartItem.DoesNotExist)):
+            exc = Http404(str(exc))
+        elif isinstance(exc, CarritoOcupado):
+            return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+        elif isinstance(exc, VersionDesactualizada):
+            return Response({'error': str(exc), 'version': exc.actual}, status=status.HTTP_409_CONFLICT)
+        return super().handle_exception(exc)
 
     @action(detail=False, methods=['get'])
     def my_cart(self, request):
         """
         Ver mi carrito actual
         Ruta: GET /api/cart/my_cart/
-        Requiere autenticación
+        Requiere autenticación o la cabecera X-Cart-Token
         """
-        if not request.user.is_authenticated:
+        almacen = self.get_almacen()
+        if almacen is None:
             return Response({
                 'items': [],
                 'total_price': 0,
                 'message': 'Debes iniciar sesión para ver tu carrito'
             }, status=status.HTTP_200_OK)
-        
-        cart = self.get_cart()
-        serializer = self.get_serializer(cart)
-        return Response(serializer.data)
+
+        return self.respuesta_carrito(almacen)
 
     @action(detail=False, methods=['post'], serializer_class=AddCartItemSerializer)
     def add_item(self, request):
@@ -59,34 +100,48 @@ class CartViewSet(viewsets.GenericViewSet):
         Añadir un ítem al carrito.
         Ruta: POST /api/cart/add_item/
         Body: { "catalogo_id": 10, "quantity": 2 }
-        Requiere autenticación
+        Sin sesión ni X-Cart-Token se crea un carrito anónimo: su token viene en la
+        respuesta (campo 'token' y cabecera X-Cart-Token) y debe enviarse en las siguientes.
         """
-        if not request.user.is_authenticated:
-            return Response({
-                'error': 'Debes iniciar sesión para agregar productos al carrito'
-            }, status=status.HTTP_401_UNAUTHORIZED)
-        
-        cart = self.get_cart()
         serializer = AddCartItemSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        catalogo = get_object_or_404(Catalogo, pk=serializer.validated_data['catalogo_id'])
-        quantity = serializer.validated_data['quantity']
+        almacen = self.get_almacen(crear=True)
+        almacen.agregar(serializer.validated_data['catalogo_id'], serializer.validated_data['quantity'])
 
-        # Lógica de update_or_create
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            catalogo=catalogo,
-            defaults={'quantity': quantity}
-        )
+        # Devolvemos el carrito actualizado completo
+        return self.respuesta_carrito(almacen)
 
-        if not created:
-            # Si ya existía, sumamos la cantidad
-            cart_item.quantity += quantity
-            cart_item.save()
+    @action(detail=False, methods=['post'], serializer_class=LoteCarritoSerializer)
+    def batch(self, request):
+        """
+        Aplicar varias modificaciones en orden y de forma atómica (todas o ninguna).
+        Ruta: POST /api/cart/batch/
+        Body: {
+            "version": 7,                                       (opcional)
+            "operaciones": [
+                {"op": "add", "catalogo_id": 10, "quantity": 2},
+                {"op": "set", "catalogo_id": 11, "quantity": 5},   (0 quita el ítem)
+                {"op": "remove", "catalogo_id": 12}
+            ]
+        }
+        Con "version", responde 409 (con la versión actual) si el carrito cambió desde entonces.
+        Devuelve solo los ítems creados o modificados, los ids de los eliminados y los nuevos totales.
+        """
+        serializer = LoteCarritoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        # Devolvemos el carrito actualizado completo
-        return Response(CartSerializer(cart).data, status=status.HTTP_200_OK)
+        almacen = self.get_almacen(crear=True)
+        resultado = almacen.aplicar_lote(
+            serializer.validated_data['operaciones'], serializer.validated_data.get('version')
+        )
+
+        datos = ResultadoLoteCarritoSerializer(resultado, context=self.get_serializer_context()).data
+        response = Response(datos)
+        if almacen.token:
+            response.data['token'] = almacen.token
+            response['X-Cart-Token'] = almacen.token
+        return response
 
     @action(detail=False, methods=['patch'], url_path='update_item/(?P<item_id>[^/.]+)')
     def update_item_quantity(self, request, item_id=None):
@@ -94,44 +149,37 @@ class CartViewSet(viewsets.GenericViewSet):
         Actualizar la cantidad de un ítem específico.
         Ruta: PATCH /api/cart/update_item/{item_id}/
         Body: { "quantity": 5 }
-        Requiere autenticación
+        Requiere autenticación o la cabecera X-Cart-Token
         """
-        if not request.user.is_authenticated:
-            return Response({
-                'error': 'Debes iniciar sesión para actualizar el carrito'
-            }, status=status.HTTP_401_UNAUTHORIZED)
-        
-        cart = self.get_cart()
-        # Aseguramos que el ítem pertenezca al carrito del usuario actual
-        cart_item = get_object_or_404(CartItem, pk=item_id, cart=cart)
+        almacen = self.get_almacen()
+        if almacen is None:
+            return self.sin_carrito('Debes iniciar sesión para actualizar el carrito')
 
-        quantity = int(request.data.get('quantity', 1))
-        if quantity > 0:
-            cart_item.quantity = quantity
-            cart_item.save()
-        else:
-            # Si envían cantidad 0 o menor, lo borramos
-            cart_item.delete()
+        cantidad = int(request.data.get('quantity', 1))
+        if cantidad > CANTIDAD_MAXIMA:
+            return Response(
+                {'error': f'La cantidad máxima por ítem es {CANTIDAD_MAXIMA}'}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Si envían cantidad 0 o menor, el almacén lo borra. Solo busca en el carrito actual.
+        almacen.actualizar(item_id, cantidad)
 
-        return Response(CartSerializer(cart).data)
+        return self.respuesta_carrito(almacen)
 
     @action(detail=False, methods=['delete'], url_path='remove_item/(?P<item_id>[^/.]+)')
     def remove_item(self, request, item_id=None):
         """
         Eliminar un ítem del carrito.
         Ruta: DELETE /api/cart/remove_item/{item_id}/
-        Requiere autenticación
+        Requiere autenticación o la cabecera X-Cart-Token
         """
-        if not request.user.is_authenticated:
-            return Response({
-                'error': 'Debes iniciar sesión para modificar el carrito'
-            }, status=status.HTTP_401_UNAUTHORIZED)
-        
-        cart = self.get_cart()
-        cart_item = get_object_or_404(CartItem, pk=item_id, cart=cart)
-        cart_item.delete()
-        
-        return Response(CartSerializer(cart).data)
+        almacen = self.get_almacen()
+        if almacen is None:
+            return self.sin_carrito('Debes iniciar sesión para modificar el carrito')
+
+        almacen.quitar(item_id)
+
+        return self.respuesta_carrito(almacen)
     
     @action(detail=False, methods=['post'])
     def clear_cart(self, request):
@@ -139,19 +187,17 @@ class CartViewSet(viewsets.GenericViewSet):
         Vaciar completamente el carrito.
         Se llama cuando el pago es exitoso o al cerrar sesión.
         Ruta: POST /api/cart/clear_cart/
-        Requiere autenticación
+        Requiere autenticación o la cabecera X-Cart-Token
         """
-        if not request.user.is_authenticated:
-            return Response({
-                'error': 'Debes iniciar sesión'
-            }, status=status.HTTP_401_UNAUTHORIZED)
-        
-        cart = self.get_cart()
-        cart.items.all().delete()
-        
+        almacen = self.get_almacen()
+        if almacen is None:
+            return self.sin_carrito('Debes iniciar sesión')
+
+        almacen.vaciar()
+
         return Response({
             'message': 'Carrito vaciado exitosamente',
-            'cart': CartSerializer(cart).data
+            'cart': self.serializar_carrito(almacen)
         })
 
     @action(detail=False, methods=['post'])
@@ -172,16 +218,16 @@ class CartViewSet(viewsets.GenericViewSet):
         from administracion.models import Cliente
         from administracion.core.utils import registrar_bitacora
         
-        cart = self.get_cart()
-        
-        # Debug: Imprimir información del carrito
-        print(f"DEBUG - Usuario: {request.user if request.user.is_authenticated else 'No autenticado'}")
-        print(f"DEBUG - Cart ID: {cart.id}")
-        print(f"DEBUG - Cantidad de items: {cart.items.count()}")
-        print(f"DEBUG - Items: {list(cart.items.values_list('id', 'catalogo__nombre', 'quantity'))}")
+        almacen = self.get_almacen()
+        if almacen is None:
+            return self.sin_carrito('Debes iniciar sesión para finalizar la compra')
+
+        # Con el almacén en caché el carrito puede tener cambios sin escribir: la venta
+        # se arma desde la base, así que primero se persiste
+        cart = almacen.persistir()
         
         # Validar que el carrito no esté vacío
-        if not cart.items.exists():
+        if cart is None or not cart.items.exists():
             return Response(
                 {'error': 'El carrito está vacío'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -229,7 +275,7 @@ class CartViewSet(viewsets.GenericViewSet):
                 )
                 
                 # Crear los detalles de venta a partir de los items del carrito
-                for item in cart.items.all():
+                for item in cart.items.select_related('catalogo'):
                     DetalleVenta.objects.create(
                         venta=venta,
                         catalogo=item.catalogo,
@@ -22,8 +22,14 @@ class VentaViewSet(viewsets.ModelViewSet):
     """
     ViewSet para gestión de Ventas
     """
-    queryset = Venta.objects.all().select_related('cliente').prefetch_related('detalles')
+    queryset = Venta.objects.all().select_related('cliente').prefetch_related(
+        'detalles__catalogo__marca',
+        'detalles__catalogo__categoria',
+        'detalles__catalogo__imagen',
+        'detalles__catalogo__contadores_stock',
+    )
     permission_classes = [AllowAny]
+    cursor_ordering = ('-fecha', '-id')
     
     def get_serializer_class(self):
         """
@@ -161,9 +167,12 @@ class DetalleVentaViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet de solo lectura para Detalles de Venta
     """
-    queryset = DetalleVenta.objects.all().select_related('venta', 'catalogo')
+    queryset = DetalleVenta.objects.all().select_related(
+        'venta', 'catalogo__marca', 'catalogo__categoria', 'catalogo__imagen'
+    ).prefetch_related('catalogo__contadores_stock')
     serializer_class = DetalleVentaSerializer
     permission_classes = [AllowAny]
+    cursor_ordering = ('-id',)
     
     def get_queryset(self):
         """
@@ -184,6 +193,7 @@ class PagoViewSet(viewsets.ModelViewSet):
     """
     queryset = Pago.objects.all().select_related('venta')
     permission_classes = [AllowAny]
+    cursor_ordering = ('-fecha_pago', '-id')
     
     def get_serializer_class(self):
         """